@@ -1,23 +1,104 @@
+from typing import Optional
+
 from aggregation_tool.aggregator import AggregatorFactory
+from aggregation_tool.incremental import IncrementalAggregation
+from aggregation_tool.row_budget import plan_windows
+from aggregation_tool.windows import AggregationWindows
+from common import metrics
 from common.config import Config
 from common.data_exporter import DataExporter
 from common.data_importer import DataImporter
+from common.metrics import Metrics
+from common.models.records import RawRecord
 
 
 class AggregationTool:
-    def __init__(self):
-        self.config = Config("./aggregation_tool/data/config.json")
-        self.importer = DataImporter(self.config)
+    def __init__(
+        self, config: Optional[Config] = None, records: Optional[list[RawRecord]] = None
+    ):
+        """
+        `config` defaults to `./aggregation_tool/data/config.json`.
+        `records` are already parsed, unfiltered import records (see batch_tool);
+        the import file is then not read.
+        """
+        self.config = config or Config("./aggregation_tool/data/config.json")
+        self.importer = DataImporter(self.config, records=records)
         self.aggregator = AggregatorFactory.get_aggregator(
-            self.config.get_data_format()
+            self.config.get_data_format(),
+            self.config.get_aggregation_engine(),
+            self.config,
+        )
+        self.exporter = DataExporter(
+            self.importer.get_fixed_point_scale(), self.config.get_export_format()
         )
-        self.exporter = DataExporter()
+        self.metrics = Metrics.from_config(self.config)
+        self.incremental = None
+        if self.config.get_incremental_state_file():
+            # The previous export is read back as (compressed) CSV
+            if self.config.get_export_format() not in ("csv", "csv.gz", "csv.xz"):
+                raise ValueError('incremental_state_file requires a CSV export_format')
+            self.incremental = IncrementalAggregation(
+                self.config.get_incremental_state_file(), self.aggregator, self.importer
+            )
 
     def run(self):
-        records = self.importer.load_data()
-        aggregated_records = self.aggregator.aggregate_lines(records)
-        path = self.config.get_export_file()
-        self.exporter.save_raw_data(path, aggregated_records)
+        self.importer.with_fallback(self._run, self._use_decimal_amounts)
+
+    def _use_decimal_amounts(self):
+        self.exporter = DataExporter(export_format=self.config.get_export_format())
+        self.metrics = Metrics.from_config(self.config)
+
+    def _run(self):
+        with metrics.collect(self.metrics):
+            records = metrics.counted("aggregate", self.importer.iter_data())
+            if self.config.get_max_rows():
+                records = self._apply_row_budget(records)
+            path = self.config.get_export_file()
+            with metrics.stage("aggregate"):
+                if self.incremental is None:
+                    aggregated_records = self.aggregator.aggregate_lines(records)
+                else:
+                    aggregated_records = self.incremental.aggregate(records, path)
+            metrics.add_rows("aggregate", rows_out=len(aggregated_records))
+
+            with metrics.stage("write"):
+                self.exporter.save_raw_data(path, aggregated_records)
+                if self.incremental is not None:
+                    self.incremental.save(path)
+            metrics.add_rows("write", rows_in=len(aggregated_records))
+
+        if self.metrics is not None:
+            if aggregated_records:
+                records_in = self.metrics.stages["aggregate"].rows_in
+                self.metrics.values["compression_ratio"] = round(
+                    records_in / len(aggregated_records), 4
+                )
+            self.metrics.write(self.config.get_metrics_output())
+
+    def _apply_row_budget(self, records):
+        """
+        Counts the groups of every window, chooses the windows that fit the
+        row budget and returns the records for the (single) aggregation pass.
+        Under a memory budget the import file is read twice instead of holding it.
+        """
+        if self.config.get_max_records_in_memory():
+            planned_records = self.importer.iter_data()
+        else:
+            records = list(records)
+            planned_records = records
+
+        with metrics.stage("plan"):
+            plan = plan_windows(
+                planned_records,
+                self.config.get_max_rows(),
+                AggregationWindows.from_config(self.config),
+            )
+        self.aggregator.windows = plan.windows
+
+        print(plan.report())
+        if self.metrics is not None:
+            self.metrics.values["window_plan"] = plan.as_dict()
+        return records
 
 
 if __name__ == "__main__":
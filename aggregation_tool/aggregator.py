@@ -1,10 +1,19 @@
 from dataclasses import replace
-from datetime import datetime, timedelta
+from datetime import timedelta
 from decimal import Decimal
-from typing import Any
+from typing import Any, Iterable
 
+from aggregation_tool.windows import AggregationWindows
+from common.asset_registry import COIN_BUY, COIN_SELL, AssetRegistry
 from common.models.records import RawRecord
-from common.utils.helper import sort_records_for_aggregation
+from common.utils.helper import (
+    iter_sorted_for_aggregation,
+    sort_records_for_aggregation,
+)
+
+# Timestamps of adjusted records, relative to the aggregation window (see `_adjust_timestamp`)
+_AFTER_START = timedelta(minutes=1)
+_BEFORE_END = {COIN_BUY: timedelta(minutes=5), COIN_SELL: timedelta(minutes=4)}
 
 
 class BaseAggregator:
@@ -13,10 +22,18 @@ class BaseAggregator:
         Base constructor to store configuration for all aggregators.
         """
         self.config = config
+        self.assets = AssetRegistry.from_config(config) if config else AssetRegistry()
+        self.windows = AggregationWindows.from_config(config) if config else AggregationWindows()
 
-    def aggregate_lines(self, records: list[RawRecord]) -> list[RawRecord]:
+    def aggregate_lines(self, records: Iterable[RawRecord]) -> list[RawRecord]:
         raise NotImplementedError("Implementation missing")
 
+    def _max_records_in_memory(self) -> int:
+        """Memory budget for sorting (0 = unlimited)."""
+        if self.config is None:
+            return 0
+        return self.config.get_max_records_in_memory()
+
     @staticmethod
     def safe_float(value):
         """Convert to float, return 0.0 if the value is empty or invalid."""
@@ -51,94 +68,6 @@ class BaseAggregator:
         # Otherwise, normal equality
         return val1 == val2
 
-    @staticmethod
-    def _is_coin_buy(record: RawRecord) -> bool:
-        """
-        A coin buy occurs when a crypto asset is bought in exchange for
-        fiat currency or another asset.
-        """
-
-        crypto_currencies = {
-            "BTC",
-            "ETH",
-            "ADA",
-            "SOL2",
-            "LUNA2",
-            "LUNA3",
-            "DFI",
-            "BNB",
-            "XRP",
-            "KFEE",
-        }
-
-        stablecoins = {"USDC", "USDT", "BUSD"}
-        fiat_currencies = {"EUR", "USD"}
-
-        buy_curr = record.buy_currency
-        sell_curr = record.sell_currency
-
-        # Buying crypto with fiat
-        if buy_curr in crypto_currencies and sell_curr in fiat_currencies:
-            return True
-
-        # Buying crypto with stablecoin
-        if buy_curr in crypto_currencies and sell_curr in stablecoins:
-            return True
-
-        return False
-
-    @staticmethod
-    def _is_coin_sell(record: RawRecord) -> bool:
-        """
-        A coin sell occurs when a crypto asset is sold in exchange for
-        fiat currency or another asset.
-        """
-
-        crypto_currencies = {
-            "BTC",
-            "ETH",
-            "ADA",
-            "SOL2",
-            "LUNA2",
-            "LUNA3",
-            "DFI",
-            "BNB",
-            "XRP",
-            "KFEE",
-        }
-
-        stablecoins = {"USDC", "USDT", "BUSD"}
-        fiat_currencies = {"EUR", "USD"}
-
-        buy_curr = record.buy_currency
-        sell_curr = record.sell_currency
-
-        # Buying crypto with fiat
-        if sell_curr in crypto_currencies and buy_curr in fiat_currencies:
-            return True
-
-        # Buying crypto with stablecoin
-        if sell_curr in crypto_currencies and buy_curr in stablecoins:
-            return True
-
-        return False
-    
-    @staticmethod
-    def _set_time(date_value: datetime, new_time: str) -> datetime:
-        """
-        Replace the time part of a datetime with a given HH:MM:SS value.
-        """
-        hours, minutes, seconds = map(int, new_time.split(":"))
-
-        return datetime(
-            year=date_value.year,
-            month=date_value.month,
-            day=date_value.day,
-            hour=hours,
-            minute=minutes,
-            second=seconds,
-        )
-
 
 class CoinTrackingAggregator(BaseAggregator):
     def _is_aggregation_applicable(
@@ -159,8 +88,8 @@ class CoinTrackingAggregator(BaseAggregator):
             and BaseAggregator.values_equal(current_line.group, next_line.group)
             and BaseAggregator.values_equal(current_line.comment, next_line.comment)
             and BaseAggregator.values_equal(
-                current_line.date.date(), next_line.date.date()
-            )  # nur Datum vergleichen
+                self.windows.key(current_line), self.windows.key(next_line)
+            )  # nur Zeitfenster vergleichen (Standard: Tag)
         ):
             return True
         else:
@@ -170,24 +99,31 @@ class CoinTrackingAggregator(BaseAggregator):
         """
         Adjust the timestamp of a record based on its business meaning.
 
-        Rules:
+        Rules (for the default window of one day):
         - Deposits are set to 00:01:00
         - Coin buys are set to 23:55:00
         - Coin sells are set to 23:56:00
+
+        With other aggregation windows the same offsets apply to the window
+        boundaries: 1 minute after the start, 5/4 minutes before the end
+        (e.g. HH:01, HH:55 and HH:56 for hourly windows).
+
+        Coin buys/sells are trades of crypto against fiat or a stablecoin,
+        as classified by the asset registry (`asset_classes` setting).
         """
-        
+
         if record.type == "Deposit":
-            new_date = BaseAggregator._set_time(record.date, "00:01:00")
-            return replace(record, date=new_date)
-
-        if record.type == "Trade": 
-            if self._is_coin_buy(record):
-                new_date = BaseAggregator._set_time(record.date, "23:55:00")
-                return replace(record, date=new_date)
-            if self._is_coin_sell(record):
-                new_date = BaseAggregator._set_time(record.date, "23:56:00")
-                return replace(record, date=new_date)
-            
+            start, _end = self.windows.bounds(record)
+            return replace(record, date=start + _AFTER_START)
+
+        if record.type == "Trade":
+            before_end = _BEFORE_END.get(
+                self.assets.classify_trade(record.buy_currency, record.sell_currency)
+            )
+            if before_end is not None:
+                _start, end = self.windows.bounds(record)
+                return replace(record, date=end - before_end)
+
         # Default: no change
         return record
 
@@ -196,7 +132,7 @@ class CoinTrackingAggregator(BaseAggregator):
         Adjust the timestamp of a record based on its business meaning.
 
         Rules:         
-        - Margin Profit: 00:01:00 
+        - Margin Profit: 00:01:00 (1 minute after the start of the aggregation window)
         - deactivated: Margin Fee: +1 min (except the old time is 23:59)
         """
                   
@@ -209,8 +145,8 @@ class CoinTrackingAggregator(BaseAggregator):
 
         # Margin Profit: -1 Minute (Limit 00:00)
         if record.type == "Margin Profit":
-            new_date = BaseAggregator._set_time(record.date, "00:01:00")            
-            return replace(record, date=new_date)
+            start, _end = self.windows.bounds(record)
+            return replace(record, date=start + _AFTER_START)
 
         # Default: no change
         return record
@@ -221,30 +157,53 @@ class CoinTrackingAggregator(BaseAggregator):
         """
         return sorted(records, key=lambda r: r.date)
 
-    def aggregate_lines(self, records: list[RawRecord]) -> list[RawRecord]:
+    def aggregate_lines(self, records: Iterable[RawRecord]) -> list[RawRecord]:
         """
         The aggregation process consolidates multiple transactions of one day (and further criterias) into a single daily entry.
         The specific logic for the time adjustment is documented in the `_adjust_timestamp` method.
+        Any iterable (e.g. the streaming output of `DataImporter.iter_data`) is accepted.
+        With a memory budget (`max_records_in_memory`) the input is sorted externally
+        and streamed through the aggregation, so it is never held in memory as a whole.
         """
-        if len(records) <= 1:
-            return records
+        max_records_in_memory = self._max_records_in_memory()
+        if max_records_in_memory:
+            return self._aggregate_external(records, max_records_in_memory)
+
+        if not isinstance(records, list):
+            records = list(records)
 
         # Ensure data is in the correct order
         sort_records_for_aggregation(records)
 
+        return self._sort_result(self._aggregate_sorted(records))
+
+    def _aggregate_external(
+        self, records: Iterable[RawRecord], max_records_in_memory: int
+    ) -> list[RawRecord]:
+        sorted_records = iter_sorted_for_aggregation(records, max_records_in_memory)
+        return self._sort_result(self._aggregate_sorted(sorted_records))
+
+    def _aggregate_sorted(self, records: Iterable[RawRecord]) -> list[RawRecord]:
+        """
+        Walks records sorted by `sort_records_for_aggregation` and merges
+        neighbouring lines that belong to the same daily group.
+        The result is in input order, i.e. not yet sorted by date.
+        """
+        records = iter(records)
+        current = next(records, None)
+        if current is None:
+            return []
+
         result: list[RawRecord] = []
 
-        aggr_buy = Decimal("0")
-        aggr_sell = Decimal("0")
-        aggr_fee = Decimal("0")
+        # int 0 keeps the amount type: Decimal, or int in fixed-point mode
+        aggr_buy = 0
+        aggr_sell = 0
+        aggr_fee = 0
         aggregation_happened = False
         aggr_count = 1
 
-        i = 0
-        while i < len(records) - 1:
-            current = records[i]
-            next_rec = records[i + 1]
-
+        for next_rec in records:
             if self._is_aggregation_applicable(current, next_rec):
                 aggr_buy += current.buy_amount
                 aggr_sell += current.sell_amount
@@ -258,19 +217,19 @@ class CoinTrackingAggregator(BaseAggregator):
                         current, aggr_buy, aggr_sell, aggr_fee, aggr_count
                     )
 
-                    aggr_buy = Decimal("0")
-                    aggr_sell = Decimal("0")
-                    aggr_fee = Decimal("0")
+                    aggr_buy = 0
+                    aggr_sell = 0
+                    aggr_fee = 0
                     aggr_count = 1    
                                     
                 current = self._adjust_margin_timestamp( current )
                 result.append(current)
                 aggregation_happened = False
 
-            i += 1
+            current = next_rec
 
         # letzte Zeile behandeln
-        last = records[-1]
+        last = current
         if aggregation_happened:
             last = self._finalize_aggregation(
                 last, aggr_buy, aggr_sell, aggr_fee, aggr_count
@@ -279,7 +238,7 @@ class CoinTrackingAggregator(BaseAggregator):
         last = self._adjust_margin_timestamp( last )
         result.append(last)
 
-        return self._sort_result(result)
+        return result
 
     def _finalize_aggregation(
         self, base_rec: RawRecord, buy: Decimal, sell: Decimal, fee: Decimal, count: int
@@ -305,10 +264,158 @@ class CoinTrackingAggregator(BaseAggregator):
         return final_rec
 
 
+class _GroupBucket:
+    """
+    Running sums of one aggregation group.
+    `last` is the record that comes last in aggregation sort order
+    (latest date, ties resolved by input position); it serves as the
+    base record exactly like the final line of a run in the sorted engine.
+    """
+
+    __slots__ = ("last", "buy", "sell", "fee", "count")
+
+    def __init__(self, record: RawRecord):
+        self.last = record
+        # int 0 keeps the amount type: Decimal, or int in fixed-point mode
+        self.buy = 0
+        self.sell = 0
+        self.fee = 0
+        self.count = 1
+
+    def add(self, record: RawRecord) -> None:
+        # Sums hold every record except the current base record
+        if record.date >= self.last.date:
+            record, self.last = self.last, record
+
+        self.buy += record.buy_amount
+        self.sell += record.sell_amount
+        self.fee += record.fee_amount
+        self.count += 1
+
+
+class HashCoinTrackingAggregator(CoinTrackingAggregator):
+    """
+    Single-pass aggregation engine.
+
+    Instead of sorting and comparing neighbouring lines, the composite group key
+    (type, currencies, exchange, group, comment, day) is computed once per record
+    and the amounts are accumulated in a dict of buckets.
+    The output is identical to `CoinTrackingAggregator`.
+    """
+
+    def _group_key(self, record: RawRecord) -> tuple:
+        """
+        Group key without the comment, in aggregation sort order.
+        """
+        return (
+            record.exchange,
+            record.group,
+            record.type,
+            record.buy_currency,
+            record.sell_currency,
+            record.fee_currency,
+            self.windows.key(record),
+        )
+
+    def aggregate_lines(self, records: Iterable[RawRecord]) -> list[RawRecord]:
+        """
+        Aggregates unsorted records in one pass. See `CoinTrackingAggregator.aggregate_lines`.
+        Under a memory budget the bounded-memory sorted engine is used instead.
+        """
+        if self._max_records_in_memory():
+            return super().aggregate_lines(records)
+
+        if not isinstance(records, list):
+            records = list(records)
+
+        return self._aggregate_unsorted(records)
+
+    def _aggregate_unsorted(self, records: list[RawRecord]) -> list[RawRecord]:
+        """
+        Aggregates records in any order. The result is sorted by date; equal
+        dates are ordered like in the sorted engine (by the group key).
+        """
+        buckets: dict[tuple, _GroupBucket] = {}
+        first_comment: dict[tuple, str] = {}
+        conflicts: set[tuple] = set()
+
+        for record in records:
+            key = self._group_key(record)
+            bucket_key = (key, record.comment)
+
+            bucket = buckets.get(bucket_key)
+            if bucket is None:
+                buckets[bucket_key] = _GroupBucket(record)
+                if first_comment.setdefault(key, record.comment) != record.comment:
+                    conflicts.add(key)
+            else:
+                bucket.add(record)
+
+        # (sort key, record); the sort key reproduces the order of the sorted engine
+        result: list[tuple[tuple, RawRecord]] = []
+
+        for (key, _comment), bucket in buckets.items():
+            if key in conflicts:
+                continue
+
+            record = bucket.last
+            if bucket.count > 1:
+                record = self._finalize_aggregation(
+                    record, bucket.buy, bucket.sell, bucket.fee, bucket.count
+                )
+            record = self._adjust_margin_timestamp(record)
+            result.append(((record.date, *key[:6], 0), record))
+
+        if conflicts:
+            result.extend(self._aggregate_conflicts(records, conflicts))
+
+        result.sort(key=lambda item: item[0])
+        return [record for _, record in result]
+
+    def _aggregate_conflicts(
+        self, records: list[RawRecord], conflicts: set[tuple]
+    ) -> list[tuple[tuple, RawRecord]]:
+        """
+        Groups that contain different comments on the same day are split into
+        runs by the sorted engine, depending on the chronological order of the
+        comments. These (rare) groups are collected and handed to it unchanged.
+        """
+        members = [r for r in records if self._group_key(r) in conflicts]
+        sort_records_for_aggregation(members)
+
+        return [
+            ((record.date, *self._group_key(record)[:6], index), record)
+            for index, record in enumerate(self._aggregate_sorted(members))
+        ]
+
+
 class AggregatorFactory:
+    ENGINES = {
+        "hash": HashCoinTrackingAggregator,
+        "sorted": CoinTrackingAggregator,
+    }
+
     @staticmethod
-    def get_aggregator(format: str) -> BaseAggregator:
-        if format == "CoinTracking":
-            return CoinTrackingAggregator()
-        else:
+    def get_aggregator(format: str, engine: str = "hash", config=None) -> BaseAggregator:
+        if format != "CoinTracking":
             raise ValueError(f"Unknown format: {format}")
+
+        if engine == "batch":
+            # Imported lazily: the batch engine depends on the optional NumPy package
+            from aggregation_tool.batch_aggregator import BatchCoinTrackingAggregator
+
+            return BatchCoinTrackingAggregator(config)
+
+        if engine == "parallel":
+            from aggregation_tool.parallel_aggregator import (
+                ParallelCoinTrackingAggregator,
+            )
+
+            workers = config.get_aggregation_workers() if config is not None else 1
+            return ParallelCoinTrackingAggregator(config, workers)
+
+        aggregator_cls = AggregatorFactory.ENGINES.get(engine)
+        if aggregator_cls is None:
+            raise ValueError(f"Unknown aggregation engine: {engine}")
+
+        return aggregator_cls(config)
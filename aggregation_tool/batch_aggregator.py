@@ -0,0 +1,139 @@
+from typing import Iterable
+
+from aggregation_tool.aggregator import CoinTrackingAggregator
+from aggregation_tool.windows import WINDOWS
+from common.models.record_batch import RecordBatch, np
+from common.models.records import RawRecord
+
+
+class BatchCoinTrackingAggregator(CoinTrackingAggregator):
+    """
+    Vectorized aggregation engine on top of a columnar RecordBatch.
+
+    Records are ordered with a single `np.lexsort` on the dictionary codes,
+    group boundaries are found by comparing neighbouring key columns, and
+    the amounts of each group are summed with `np.add.reduceat`.
+    The business rules (`_finalize_aggregation`, timestamp adjustment) are
+    applied per output line, so the output equals `CoinTrackingAggregator`.
+
+    Amounts that do not fit the int64 fixed-point representation fall back
+    to the sorted Decimal engine.
+    """
+
+    def _fixed_point_scale(self) -> int:
+        if self.config is None:
+            return 10
+        return self.config.get_fixed_point_scale()
+
+    def aggregate_lines(self, records: Iterable[RawRecord]) -> list[RawRecord]:
+        if self._max_records_in_memory():
+            return super().aggregate_lines(records)
+
+        if not isinstance(records, list):
+            records = list(records)
+
+        if not records:
+            return []
+
+        try:
+            batch = RecordBatch.from_records(records, self._fixed_point_scale())
+        except ValueError:
+            return super().aggregate_lines(records)
+
+        # lexsort: last key is the primary key, same order as sort_records_for_aggregation
+        order = np.lexsort(
+            (
+                batch.date,
+                batch.fee_currency,
+                batch.sell_currency,
+                batch.buy_currency,
+                batch.type,
+                batch.group,
+                batch.exchange,
+            )
+        )
+
+        # A group starts wherever one of the key columns differs from the previous line
+        starts_mask = np.zeros(len(order), dtype=bool)
+        starts_mask[0] = True
+        for column in (
+            batch.type,
+            batch.buy_currency,
+            batch.sell_currency,
+            batch.fee_currency,
+            batch.exchange,
+            batch.group,
+            batch.comment,
+            self._window_starts(batch, records),
+        ):
+            sorted_column = column[order]
+            starts_mask[1:] |= sorted_column[1:] != sorted_column[:-1]
+
+        starts = np.flatnonzero(starts_mask)
+        ends = np.append(starts[1:], len(order))
+        counts = ends - starts
+        # The last line of each group is the base record
+        base_indices = order[ends - 1]
+
+        sums = {
+            name: np.add.reduceat(getattr(batch, name)[order], starts)
+            for name in ("buy_amount", "sell_amount", "fee_amount")
+        }
+
+        result: list[RawRecord] = []
+        for g, base_index in enumerate(base_indices.tolist()):
+            record = records[base_index]
+
+            if counts[g] > 1:
+                # _finalize_aggregation adds the base amounts to the sums of the others
+                others = {
+                    name: batch.to_amount(
+                        sums[name][g] - getattr(batch, name)[base_index]
+                    )
+                    for name in sums
+                }
+                record = self._finalize_aggregation(
+                    record,
+                    others["buy_amount"],
+                    others["sell_amount"],
+                    others["fee_amount"],
+                    int(counts[g]),
+                )
+
+            result.append(self._adjust_margin_timestamp(record))
+
+        return self._sort_result(result)
+
+    def _window_starts(self, batch: RecordBatch, records: list[RawRecord]) -> "np.ndarray":
+        """
+        Start of the aggregation window of every record (see `AggregationWindows`).
+        """
+        if self.windows.used() == {"day"}:
+            return batch.day()
+
+        window_of = self.windows.window
+        window_index = np.fromiter(
+            (WINDOWS.index(window_of(r.exchange, r.type)) for r in records),
+            dtype=np.int8,
+            count=len(records),
+        )
+        starts = np.empty(len(records), dtype="datetime64[us]")
+        for index, window in enumerate(WINDOWS):
+            mask = window_index == index
+            if mask.any():
+                starts[mask] = _window_start(batch.date[mask], window)
+        return starts
+
+
+def _window_start(dates: "np.ndarray", window: str) -> "np.ndarray":
+    if window == "hour":
+        return dates.astype("datetime64[h]")
+    if window == "day":
+        return dates.astype("datetime64[D]")
+    month_starts = dates.astype("datetime64[M]").astype("datetime64[D]")
+    if window == "month":
+        return month_starts
+    # ISO week, split at month boundaries; 1970-01-01 was a Thursday
+    days = dates.astype("datetime64[D]")
+    mondays = days - (days.astype(np.int64) + 3) % 7
+    return np.maximum(mondays, month_starts)
@@ -0,0 +1,137 @@
+import hashlib
+import heapq
+import json
+import os
+from dataclasses import fields
+from operator import attrgetter
+from pathlib import Path
+from typing import Iterable, Optional
+
+from aggregation_tool.aggregator import BaseAggregator
+from common.data_importer import DataImporter
+from common.models.records import RawRecord
+
+# Bump when the state format or the aggregation rules change
+STATE_VERSION = 2
+
+_values_of = attrgetter(*[f.name for f in fields(RawRecord)])
+
+
+def _file_fingerprint(path: Path) -> Optional[dict]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class IncrementalAggregation:
+    """
+    Incremental aggregation on top of the previous aggregated export.
+
+    Aggregation groups never span periods (days, or months if any aggregation
+    window is longer than a day), so every period can be aggregated on its
+    own. The state file remembers a digest of the input records of each
+    period. On the next run only periods whose digest changed (new, edited or
+    removed rows) are aggregated again; all other periods are taken from the
+    previous export. The result is identical to a full run.
+
+    A full run is done if there is no usable state, if the settings that
+    affect the output changed, or if the export file was modified since it
+    was written.
+    """
+
+    def __init__(self, state_file: Path, aggregator: BaseAggregator, importer: DataImporter):
+        self.state_file = Path(state_file)
+        self.aggregator = aggregator
+        self.importer = importer
+        self._pending_periods: Optional[dict[str, str]] = None
+
+    def _signature(self, export_file: Path) -> dict:
+        return {
+            "version": STATE_VERSION,
+            "export_file": str(Path(export_file).resolve()),
+            "data_format": self.importer.data_format,
+            "ct_exchanges": sorted(self.importer.ct_exchanges or []),
+            "ct_year": str(self.importer.ct_year or ""),
+            "fixed_point_scale": self.importer.get_fixed_point_scale(),
+            # The asset classes decide the timestamps of aggregated trades
+            "asset_classes": self.aggregator.assets.classes,
+            "default_asset_class": self.aggregator.assets.default_class,
+            "windows": self.aggregator.windows.signature(),
+        }
+
+    def _load_state(self) -> dict:
+        try:
+            with open(self.state_file, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _previous_periods(self, export_file: Path) -> Optional[dict[str, str]]:
+        """
+        Period digests of the previous run, or None if a full run is needed.
+        """
+        state = self._load_state()
+        if state.get("signature") != self._signature(export_file):
+            return None
+        if state.get("export") != _file_fingerprint(Path(export_file)):
+            return None
+        return state.get("periods")
+
+    def aggregate(self, records: Iterable[RawRecord], export_file: Path) -> list[RawRecord]:
+        if not isinstance(records, list):
+            records = list(records)
+
+        period = self.aggregator.windows.period
+        digests = {}
+        for record in records:
+            key = period(record)
+            digest = digests.get(key)
+            if digest is None:
+                digest = digests[key] = hashlib.blake2b(digest_size=16)
+            digest.update("\x1f".join(map(str, _values_of(record))).encode())
+            digest.update(b"\x1e")
+        periods = {key: digest.hexdigest() for key, digest in digests.items()}
+        self._pending_periods = periods
+
+        previous = self._previous_periods(export_file)
+        if previous is None:
+            return self.aggregator.aggregate_lines(records)
+
+        changed = {key for key, digest in periods.items() if previous.get(key) != digest}
+        changed |= previous.keys() - periods.keys()
+
+        delta = [record for record in records if period(record) in changed]
+
+        unchanged = [
+            record
+            for record in DataImporter.iter_csv_file(
+                str(export_file),
+                fixed_point_scale=self.importer.get_fixed_point_scale(),
+            )
+            if period(record) not in changed
+        ]
+        print(f"Incremental aggregation: {len(changed)} of {len(periods)} periods changed.")
+
+        # Periods are disjoint and both lists are sorted by date
+        key = attrgetter("date")
+        return list(heapq.merge(unchanged, self.aggregator.aggregate_lines(delta), key=key))
+
+    def save(self, export_file: Path) -> None:
+        """
+        Persists the state of the last `aggregate` call, after the export was written.
+        """
+        if self._pending_periods is None:
+            return
+
+        state = {
+            "signature": self._signature(export_file),
+            "export": _file_fingerprint(Path(export_file)),
+            "periods": self._pending_periods,
+        }
+        tmp_path = self.state_file.with_name(f"{self.state_file.name}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_file)
+        self._pending_periods = None
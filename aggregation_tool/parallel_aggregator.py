@@ -0,0 +1,122 @@
+import heapq
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable
+
+from aggregation_tool.aggregator import HashCoinTrackingAggregator
+from aggregation_tool.windows import AggregationWindows
+from common.models.records import RawRecord
+
+# Tasks per worker, so that uneven partitions still keep all workers busy
+_TASKS_PER_WORKER = 4
+
+
+def _partition_key(record: RawRecord) -> tuple:
+    """
+    Aggregation groups never span different values of these fields.
+    The order matches `sort_records_for_aggregation`.
+    """
+    return (
+        record.exchange,
+        record.group,
+        record.type,
+        record.buy_currency,
+        record.sell_currency,
+        record.fee_currency,
+    )
+
+
+def _merge_key(record: RawRecord) -> tuple:
+    return (record.date, *_partition_key(record))
+
+
+# Tasks of the running aggregation, inherited by forked workers without pickling
+_FORKED_TASKS: list[list[RawRecord]] = []
+
+
+def _aggregate_task(
+    config, windows: AggregationWindows, records: list[RawRecord]
+) -> list[RawRecord]:
+    """
+    Worker: aggregates the partitions of one task with the hash engine.
+    The windows are passed on, as they may differ from the config (row budget).
+    """
+    aggregator = HashCoinTrackingAggregator(config)
+    aggregator.windows = windows
+    return aggregator._aggregate_unsorted(records)
+
+
+def _aggregate_forked_task(config, windows: AggregationWindows, index: int) -> list[RawRecord]:
+    return _aggregate_task(config, windows, _FORKED_TASKS[index])
+
+
+class ParallelCoinTrackingAggregator(HashCoinTrackingAggregator):
+    """
+    Partition-parallel aggregation engine.
+
+    Records are partitioned by (exchange, group, type, currencies), which no
+    aggregation group crosses. The partitions are distributed over tasks of
+    roughly equal size and aggregated in a process pool with the regular
+    rules. The date-sorted task outputs are merged by (date, partition key),
+    which reproduces the order of the serial engines exactly.
+    """
+
+    def __init__(self, config=None, workers: int = 1):
+        super().__init__(config)
+        self.workers = workers
+
+    def aggregate_lines(self, records: Iterable[RawRecord]) -> list[RawRecord]:
+        if self._max_records_in_memory() or self.workers <= 1:
+            return super().aggregate_lines(records)
+
+        if not isinstance(records, list):
+            records = list(records)
+
+        if len(records) <= 1:
+            return super().aggregate_lines(records)
+
+        partitions: dict[tuple, list[RawRecord]] = {}
+        for record in records:
+            partitions.setdefault(_partition_key(record), []).append(record)
+
+        tasks = self._build_tasks(partitions.values(), self.workers * _TASKS_PER_WORKER)
+
+        return list(heapq.merge(*self._run_tasks(tasks), key=_merge_key))
+
+    def _run_tasks(self, tasks: list[list[RawRecord]]) -> list[list[RawRecord]]:
+        configs = [self.config] * len(tasks)
+        windows = [self.windows] * len(tasks)
+
+        if "fork" not in multiprocessing.get_all_start_methods():
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                return list(pool.map(_aggregate_task, configs, windows, tasks))
+
+        # Forked workers see the tasks directly; only the (smaller) results are pickled
+        global _FORKED_TASKS
+        _FORKED_TASKS = tasks
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("fork"),
+            ) as pool:
+                return list(pool.map(_aggregate_forked_task, configs, windows, range(len(tasks))))
+        finally:
+            _FORKED_TASKS = []
+
+    @staticmethod
+    def _build_tasks(
+        partitions: Iterable[list[RawRecord]], task_count: int
+    ) -> list[list[RawRecord]]:
+        """
+        Distributes partitions over tasks: largest partition first, always
+        into the task with the fewest records so far.
+        """
+        heap = [(0, i) for i in range(task_count)]
+        tasks: list[list[RawRecord]] = [[] for _ in range(task_count)]
+
+        for partition in sorted(partitions, key=len, reverse=True):
+            size, i = heapq.heappop(heap)
+            tasks[i].extend(partition)
+            heapq.heappush(heap, (size + len(partition), i))
+
+        return [task for task in tasks if task]
@@ -0,0 +1,122 @@
+from dataclasses import dataclass
+from typing import Iterable
+
+from aggregation_tool.windows import WINDOW_KEYS, WINDOWS, AggregationWindows
+from common.models.records import RawRecord
+
+_KEY_FUNCTIONS = [WINDOW_KEYS[window] for window in WINDOWS]
+
+
+@dataclass
+class WindowPlan:
+    """
+    Aggregation windows chosen for a row budget, with the estimated
+    number of output rows per (exchange, type) partition.
+    """
+
+    windows: AggregationWindows
+    max_rows: int
+    # (exchange, type) -> (window, estimated rows)
+    partitions: dict[tuple[str, str], tuple[str, int]]
+
+    @property
+    def total_rows(self) -> int:
+        return sum(rows for _window, rows in self.partitions.values())
+
+    @property
+    def fits(self) -> bool:
+        return self.total_rows <= self.max_rows
+
+    def as_dict(self) -> dict:
+        return {
+            "max_rows": self.max_rows,
+            "estimated_rows": self.total_rows,
+            "partitions": [
+                {"exchange": exchange, "type": type_, "window": window, "rows": rows}
+                for (exchange, type_), (window, rows) in sorted(self.partitions.items())
+            ],
+        }
+
+    def report(self) -> str:
+        lines = [
+            f"Row budget {self.max_rows}: {self.total_rows} estimated rows"
+            + ("" if self.fits else " (budget not reachable, even with monthly windows)")
+        ]
+        for (exchange, type_), (window, rows) in sorted(self.partitions.items()):
+            lines.append(f"  {exchange:<15} {type_:<15} {window:<6} {rows:>10}")
+        return "\n".join(lines)
+
+
+def count_groups(records: Iterable[RawRecord]) -> dict[tuple[str, str], list[int]]:
+    """
+    Counting pass: number of aggregation groups per (exchange, type) partition
+    for every window of `WINDOWS`. Only group hashes are kept, no records.
+    """
+    groups: dict[tuple[str, str], list[set]] = {}
+
+    for record in records:
+        partition = (record.exchange, record.type)
+        hashes = groups.get(partition)
+        if hashes is None:
+            hashes = groups[partition] = [set() for _ in WINDOWS]
+
+        base = (
+            record.group,
+            record.buy_currency,
+            record.sell_currency,
+            record.fee_currency,
+            record.comment,
+        )
+        date = record.date
+        for window_hashes, key_of in zip(hashes, _KEY_FUNCTIONS):
+            window_hashes.add(hash((base, key_of(date))))
+
+    return {partition: [len(h) for h in hashes] for partition, hashes in groups.items()}
+
+
+def plan_windows(
+    records: Iterable[RawRecord], max_rows: int, windows: AggregationWindows
+) -> WindowPlan:
+    """
+    Chooses the finest window per (exchange, type) partition such that the
+    estimated output fits `max_rows`. The configured windows are the finest
+    candidates. Starting from them, the partition whose next coarser window
+    saves the most rows is coarsened until the budget is met.
+
+    The estimate counts distinct groups; groups whose comments alternate
+    within a window can produce a few more rows.
+    """
+    counts = count_groups(records)
+    levels = {partition: WINDOWS.index(windows.window(*partition)) for partition in counts}
+    total = sum(counts[p][level] for p, level in levels.items())
+
+    while total > max_rows:
+        best = None
+        for partition, level in levels.items():
+            rows = counts[partition]
+            # Next coarser window that merges anything (e.g. hour -> day may not)
+            coarser = next(
+                (l for l in range(level + 1, len(WINDOWS)) if rows[l] < rows[level]), None
+            )
+            if coarser is not None:
+                saving = rows[level] - rows[coarser]
+                if best is None or saving > best[0]:
+                    best = (saving, partition, coarser)
+
+        if best is None:
+            break
+        saving, partition, coarser = best
+        levels[partition] = coarser
+        total -= saving
+
+    by_exchange: dict[str, dict[str, str]] = {
+        exchange: dict(type_windows) for exchange, type_windows in windows.by_exchange.items()
+    }
+    partitions = {}
+    for (exchange, type_), level in levels.items():
+        window = WINDOWS[level]
+        by_exchange.setdefault(exchange, {})[type_] = window
+        partitions[exchange, type_] = (window, counts[exchange, type_][level])
+
+    planned = AggregationWindows(windows.default, windows.by_type, by_exchange)
+    return WindowPlan(planned, max_rows, partitions)
@@ -1,30 +1,40 @@
 import os
+from dataclasses import replace
+from datetime import datetime
 
 import pytest
 
-from aggregation_tool.aggregator import CoinTrackingAggregator
+from aggregation_tool.aggregator import (
+    CoinTrackingAggregator,
+    HashCoinTrackingAggregator,
+)
 from common.data_importer import DataImporter
+from common.test_utils.random_records import make_random_records
+from common.test_utils.record_assertions import assert_records_equal
 from common.test_utils.run_tool_test import run_csv_based_tool_test
 from common.utils.helper import sort_records_for_aggregation
 from tests.mocks.mock_config import MockConfig
 
+AGGREGATOR_ENGINES = [CoinTrackingAggregator, HashCoinTrackingAggregator]
+
 
+@pytest.mark.parametrize("aggregator_cls", AGGREGATOR_ENGINES)
 @pytest.mark.parametrize(
     "input_file, expected_file, config_params",
     [
         (
-            "./aggregation_tool/data/CT-test-data1.csv",
-            "./aggregation_tool/data/CT-test-data1-exp.csv",
+            "./aggregation_tool/examples/CT-test-data1.csv",
+            "./aggregation_tool/examples/CT-test-data1-exp.csv",
             {},
         ),
         (
-            "./aggregation_tool/data/CT-test-data2.csv",
-            "./aggregation_tool/data/CT-test-data2-exp.csv",
+            "./aggregation_tool/examples/CT-test-data2.csv",
+            "./aggregation_tool/examples/CT-test-data2-exp.csv",
             {"ct_exchanges": ["Kraken"]},
         ),
     ],
 )
-def test_aggregator_csv(input_file, expected_file, config_params):
+def test_aggregator_csv(input_file, expected_file, config_params, aggregator_cls):
     # 1. Skip if files are missing (Clean Code: keeps test output tidy)
     if not os.path.exists(input_file) or not os.path.exists(expected_file):
         pytest.skip(f"Test data missing: {input_file} or {expected_file}")
@@ -37,10 +47,79 @@ def test_aggregator_csv(input_file, expected_file, config_params):
         input_file,
         expected_file,
         # We pass the mock_config to the Aggregator here
-        run_tool=lambda records: CoinTrackingAggregator(mock_config).aggregate_lines(
+        run_tool=lambda records: aggregator_cls(mock_config).aggregate_lines(
             records
         ),
         load_input=DataImporter.parse_csv_file,
         load_expected=DataImporter.parse_csv_file,
         sort_result=sort_records_for_aggregation,
     )
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_hash_engine_matches_sorted_engine(seed):
+    records = make_random_records(2000, seed)
+
+    expected = CoinTrackingAggregator().aggregate_lines(list(records))
+    result = HashCoinTrackingAggregator().aggregate_lines(iter(records))
+
+    assert len(result) == len(expected)
+    for i, (res, exp) in enumerate(zip(result, expected)):
+        assert_records_equal(res, exp, i)
+
+
+def test_memory_budget_matches_in_memory_aggregation():
+    records = make_random_records(2000, 4)
+
+    expected = CoinTrackingAggregator().aggregate_lines(list(records))
+    budget_config = MockConfig(max_records_in_memory=150)
+
+    for aggregator_cls in AGGREGATOR_ENGINES:
+        result = aggregator_cls(budget_config).aggregate_lines(iter(records))
+
+        assert len(result) == len(expected)
+        for i, (res, exp) in enumerate(zip(result, expected)):
+            assert_records_equal(res, exp, i)
+
+
+def test_single_record_gets_the_aggregation_rules():
+    record = replace(
+        make_random_records(1, 6)[0], type="Margin Profit", date=datetime(2022, 3, 4, 17, 35)
+    )
+    budget_config = MockConfig(max_records_in_memory=150)
+
+    for aggregator in [cls() for cls in AGGREGATOR_ENGINES] + [
+        CoinTrackingAggregator(budget_config)
+    ]:
+        assert aggregator.aggregate_lines([]) == []
+        assert aggregator.aggregate_lines(iter([record])) == [
+            replace(record, date=datetime(2022, 3, 4, 0, 1))
+        ]
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_batch_engine_matches_sorted_engine(seed):
+    pytest.importorskip("numpy")
+    from aggregation_tool.batch_aggregator import BatchCoinTrackingAggregator
+
+    records = make_random_records(2000, seed)
+
+    expected = CoinTrackingAggregator().aggregate_lines(list(records))
+    result = BatchCoinTrackingAggregator().aggregate_lines(iter(records))
+
+    assert len(result) == len(expected)
+    for i, (res, exp) in enumerate(zip(result, expected)):
+        assert_records_equal(res, exp, i)
+
+
+def test_parallel_engine_matches_sorted_engine():
+    from aggregation_tool.parallel_aggregator import ParallelCoinTrackingAggregator
+
+    records = make_random_records(2000, 5)
+
+    expected = CoinTrackingAggregator().aggregate_lines(list(records))
+    result = ParallelCoinTrackingAggregator(workers=2).aggregate_lines(iter(records))
+
+    assert len(result) == len(expected)
+    for i, (res, exp) in enumerate(zip(result, expected)):
+        assert_records_equal(res, exp, i)
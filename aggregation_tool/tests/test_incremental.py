@@ -0,0 +1,58 @@
+from dataclasses import replace
+from datetime import timedelta
+
+from aggregation_tool.aggregator import HashCoinTrackingAggregator
+from aggregation_tool.incremental import IncrementalAggregation
+from common.data_exporter import DataExporter
+from common.data_importer import DataImporter
+from common.test_utils.random_records import make_random_records
+from tests.mocks.mock_config import MockConfig
+
+
+class CountingAggregator(HashCoinTrackingAggregator):
+    def __init__(self):
+        super().__init__()
+        self.aggregated_days: set = set()
+
+    def aggregate_lines(self, records):
+        records = list(records)
+        self.aggregated_days |= {record.date.date() for record in records}
+        return super().aggregate_lines(records)
+
+
+def run_incremental(records, export_file, state_file):
+    aggregator = CountingAggregator()
+    incremental = IncrementalAggregation(state_file, aggregator, DataImporter(MockConfig()))
+    result = incremental.aggregate(iter(records), export_file)
+    DataExporter().save_raw_data(export_file, result)
+    incremental.save(export_file)
+    return aggregator.aggregated_days
+
+
+def test_incremental_run_matches_full_run(tmp_path):
+    export_file = tmp_path / "export.csv"
+    state_file = tmp_path / "state.json"
+    records = make_random_records(2000, 6)
+
+    first_days = run_incremental(records, export_file, state_file)
+    assert len(first_days) == 4
+
+    # A new day, an edited row and a removed row
+    last = records[-1]
+    changed = records[:10] + [replace(records[10], buy_amount=records[10].buy_amount + 1)]
+    changed += records[12:]
+    changed.append(replace(last, date=last.date + timedelta(days=5), tx_id="Tx-new"))
+
+    refreshed_days = run_incremental(changed, export_file, state_file)
+    expected_days = {r.date.date() for r in (records[10], records[11], changed[-1])}
+    assert refreshed_days == expected_days
+
+    full_file = tmp_path / "full.csv"
+    DataExporter().save_raw_data(
+        full_file, HashCoinTrackingAggregator().aggregate_lines(changed)
+    )
+    assert export_file.read_text() == full_file.read_text()
+
+    # Unchanged input: nothing is aggregated again
+    assert run_incremental(changed, export_file, state_file) == set()
+    assert export_file.read_text() == full_file.read_text()
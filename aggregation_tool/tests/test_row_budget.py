@@ -0,0 +1,58 @@
+from dataclasses import replace
+
+from aggregation_tool.aggregator import HashCoinTrackingAggregator
+from aggregation_tool.row_budget import count_groups, plan_windows
+from aggregation_tool.windows import WINDOWS, AggregationWindows
+from common.test_utils.random_records import make_random_records
+from tests.mocks.mock_config import MockConfig
+
+
+def _aggregate(records, windows: AggregationWindows):
+    aggregator = HashCoinTrackingAggregator(MockConfig())
+    aggregator.windows = windows
+    return aggregator.aggregate_lines(list(records))
+
+
+def _without_comments(records):
+    return [replace(record, comment="") for record in records]
+
+
+def test_count_groups_matches_aggregation():
+    records = make_random_records(3000, 11)
+    counts = count_groups(records)
+    uniform = _without_comments(records)
+    uniform_counts = count_groups(uniform)
+
+    for index, window in enumerate(WINDOWS):
+        windows = AggregationWindows(window)
+        estimated = sum(rows[index] for rows in uniform_counts.values())
+        assert estimated == len(_aggregate(uniform, windows))
+
+        # Alternating comments within a group can add rows, never remove them
+        estimated = sum(rows[index] for rows in counts.values())
+        assert estimated <= len(_aggregate(records, windows))
+
+
+def test_plan_fits_budget():
+    records = _without_comments(make_random_records(3000, 12))
+    counts = count_groups(records).values()
+    daily = sum(rows[WINDOWS.index("day")] for rows in counts)
+    monthly = sum(rows[WINDOWS.index("month")] for rows in counts)
+
+    plan = plan_windows(records, daily, AggregationWindows("day"))
+    assert plan.windows.used() == {"day"}
+    assert plan.total_rows == daily
+
+    budget = (daily + monthly) // 2
+    plan = plan_windows(records, budget, AggregationWindows("hour"))
+    assert plan.fits
+    assert all(window != "hour" for window, _rows in plan.partitions.values())
+    assert len(_aggregate(records, plan.windows)) == plan.total_rows
+
+
+def test_unreachable_budget_uses_coarsest_windows():
+    records = make_random_records(500, 13)
+    plan = plan_windows(records, 1, AggregationWindows())
+
+    assert not plan.fits
+    assert "not reachable" in plan.report()
@@ -0,0 +1,124 @@
+from dataclasses import replace
+from datetime import datetime
+
+import pytest
+
+from aggregation_tool.aggregator import CoinTrackingAggregator, HashCoinTrackingAggregator
+from aggregation_tool.incremental import IncrementalAggregation
+from aggregation_tool.parallel_aggregator import ParallelCoinTrackingAggregator
+from aggregation_tool.windows import AggregationWindows
+from common.data_exporter import DataExporter
+from common.data_importer import DataImporter
+from common.test_utils.random_records import make_random_records
+from common.test_utils.record_assertions import assert_records_equal
+from tests.mocks.mock_config import MockConfig
+
+WINDOW_CONFIG = MockConfig(
+    aggregation_window="week",
+    aggregation_windows={"Trade": "hour", "Deposit": "day"},
+    aggregation_exchange_windows={"Kraken": {"Margin Fee": "month"}},
+)
+
+
+def test_window_bounds():
+    windows = AggregationWindows.from_config(WINDOW_CONFIG)
+    record = make_random_records(1, 1)[0]
+
+    def bounds(type_, exchange, date):
+        return windows.bounds(replace(record, type=type_, exchange=exchange, date=date))
+
+    sunday = datetime(2022, 1, 2, 15, 30)
+    # The ISO week of 27.12.2021 - 02.01.2022 is split at the month boundary
+    assert bounds("Margin Fee", "Binance", sunday) == (datetime(2022, 1, 1), datetime(2022, 1, 3))
+    assert bounds("Margin Fee", "Binance", datetime(2021, 12, 30)) == (
+        datetime(2021, 12, 27),
+        datetime(2022, 1, 1),
+    )
+    assert bounds("Margin Fee", "Kraken", sunday) == (datetime(2022, 1, 1), datetime(2022, 2, 1))
+    assert bounds("Trade", "Kraken", sunday) == (
+        datetime(2022, 1, 2, 15),
+        datetime(2022, 1, 2, 16),
+    )
+
+    with pytest.raises(ValueError):
+        AggregationWindows("year")
+
+
+@pytest.mark.parametrize(
+    "engine",
+    [HashCoinTrackingAggregator, "batch", "parallel"],
+)
+def test_engines_match_sorted_engine_with_windows(engine):
+    records = make_random_records(3000, 8)
+
+    if engine == "batch":
+        pytest.importorskip("numpy")
+        from aggregation_tool.batch_aggregator import BatchCoinTrackingAggregator
+
+        aggregator = BatchCoinTrackingAggregator(WINDOW_CONFIG)
+    elif engine == "parallel":
+        aggregator = ParallelCoinTrackingAggregator(WINDOW_CONFIG, workers=2)
+    else:
+        aggregator = engine(WINDOW_CONFIG)
+
+    expected = CoinTrackingAggregator(WINDOW_CONFIG).aggregate_lines(list(records))
+    result = aggregator.aggregate_lines(iter(records))
+
+    assert len(result) == len(expected)
+    for i, (res, exp) in enumerate(zip(result, expected)):
+        assert_records_equal(res, exp, i)
+
+
+def test_timestamps_follow_window_boundaries():
+    base = replace(
+        make_random_records(1, 1)[0],
+        type="Trade",
+        buy_currency="BTC",
+        sell_currency="EUR",
+        fee_currency="EUR",
+        comment="",
+    )
+    records = [
+        replace(base, date=datetime(2021, 12, 30, 8, 20)),
+        replace(base, date=datetime(2021, 12, 30, 8, 40)),
+        replace(base, date=datetime(2021, 12, 31, 9)),
+        replace(base, date=datetime(2021, 12, 31, 10)),
+    ]
+
+    hourly = HashCoinTrackingAggregator(MockConfig(aggregation_window="hour"))
+    monthly = HashCoinTrackingAggregator(MockConfig(aggregation_window="month"))
+
+    assert [r.date for r in hourly.aggregate_lines(list(records))] == [
+        datetime(2021, 12, 30, 8, 55),
+        datetime(2021, 12, 31, 9),
+        datetime(2021, 12, 31, 10),
+    ]
+    assert [r.date for r in monthly.aggregate_lines(list(records))] == [
+        datetime(2021, 12, 31, 23, 55)
+    ]
+
+
+def test_incremental_run_with_monthly_windows(tmp_path):
+    config = MockConfig(aggregation_windows={"Margin Fee": "month"})
+    export_file = tmp_path / "export.csv"
+    state_file = tmp_path / "state.json"
+    records = make_random_records(2000, 9)
+
+    def run(records):
+        incremental = IncrementalAggregation(
+            state_file, HashCoinTrackingAggregator(config), DataImporter(config)
+        )
+        result = incremental.aggregate(iter(records), export_file)
+        DataExporter().save_raw_data(export_file, result)
+        incremental.save(export_file)
+
+    run(records)
+    # A changed row refreshes its whole month
+    changed = [replace(records[0], buy_amount=records[0].buy_amount + 1)] + records[1:]
+    run(changed)
+
+    full_file = tmp_path / "full.csv"
+    DataExporter().save_raw_data(
+        full_file, HashCoinTrackingAggregator(config).aggregate_lines(changed)
+    )
+    assert export_file.read_text() == full_file.read_text()
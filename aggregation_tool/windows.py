@@ -0,0 +1,145 @@
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from common.models.records import RawRecord
+
+# Aggregation windows, from fine to coarse
+WINDOWS = ("hour", "day", "week", "month")
+
+
+def _hour_start(date: datetime) -> datetime:
+    return datetime(date.year, date.month, date.day, date.hour)
+
+
+def _day_start(date: datetime) -> datetime:
+    return datetime(date.year, date.month, date.day)
+
+
+def _week_start(date: datetime) -> datetime:
+    # ISO week (Monday to Sunday), split at month boundaries
+    monday = _day_start(date) - timedelta(days=date.weekday())
+    return max(monday, datetime(date.year, date.month, 1))
+
+
+def _month_start(date: datetime) -> datetime:
+    return datetime(date.year, date.month, 1)
+
+
+def _month_end(start: datetime) -> datetime:
+    return datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+
+def _day_key(date: datetime):
+    # Same key as before windows were configurable; cheaper than a datetime
+    return date.date()
+
+
+def _record_day(record: RawRecord):
+    return record.date.date()
+
+
+WINDOW_KEYS: dict[str, Callable[[datetime], object]] = {
+    "hour": _hour_start,
+    "day": _day_key,
+    "week": _week_start,
+    "month": _month_start,
+}
+_STARTS: dict[str, Callable[[datetime], datetime]] = {
+    "hour": _hour_start,
+    "day": _day_start,
+    "week": _week_start,
+    "month": _month_start,
+}
+_ENDS: dict[str, Callable[[datetime], datetime]] = {
+    "hour": lambda start: start + timedelta(hours=1),
+    "day": lambda start: start + timedelta(days=1),
+    "week": lambda start: min(start + timedelta(days=7 - start.weekday()), _month_end(start)),
+    "month": _month_end,
+}
+
+
+def _check_window(window: str) -> str:
+    if window not in WINDOWS:
+        raise ValueError(f"Unknown aggregation window: {window}")
+    return window
+
+
+class AggregationWindows:
+    """
+    Time window in which records of one aggregation group are merged:
+    "hour", "day" (default), "week" or "month".
+
+    The window is chosen per transaction type (`by_type`) and can be
+    overridden per exchange and type (`by_exchange`). Weeks are ISO weeks,
+    split at month boundaries, so no window spans two months (or years).
+    """
+
+    def __init__(
+        self,
+        default: str = "day",
+        by_type: Optional[dict[str, str]] = None,
+        by_exchange: Optional[dict[str, dict[str, str]]] = None,
+    ):
+        self.default = _check_window(default)
+        self.by_type = {type_: _check_window(w) for type_, w in (by_type or {}).items()}
+        self.by_exchange = {
+            exchange: {type_: _check_window(w) for type_, w in windows.items()}
+            for exchange, windows in (by_exchange or {}).items()
+        }
+        self._windows: dict[tuple[str, str], str] = {}
+        self._daily = WINDOWS.index(self.coarsest()) <= WINDOWS.index("day")
+        if self.used() == {"day"}:
+            # Only daily windows (the default): skip the per-type lookup
+            self.key = _record_day
+
+    @classmethod
+    def from_config(cls, config) -> "AggregationWindows":
+        return cls(
+            config.get_aggregation_window(),
+            config.get_aggregation_windows(),
+            config.get_aggregation_exchange_windows(),
+        )
+
+    def window(self, exchange: str, type_: str) -> str:
+        try:
+            return self._windows[exchange, type_]
+        except KeyError:
+            pass
+
+        window = self.by_exchange.get(exchange, {}).get(type_)
+        if window is None:
+            window = self.by_type.get(type_, self.default)
+        self._windows[exchange, type_] = window
+        return window
+
+    def key(self, record: RawRecord):
+        """Identifies the window of a record within its (exchange, type)."""
+        return WINDOW_KEYS[self.window(record.exchange, record.type)](record.date)
+
+    def bounds(self, record: RawRecord) -> tuple[datetime, datetime]:
+        """Start and (exclusive) end of the window of a record."""
+        window = self.window(record.exchange, record.type)
+        start = _STARTS[window](record.date)
+        return start, _ENDS[window](start)
+
+    def used(self) -> set[str]:
+        """All configured windows."""
+        windows = {self.default, *self.by_type.values()}
+        for exchange_windows in self.by_exchange.values():
+            windows.update(exchange_windows.values())
+        return windows
+
+    def coarsest(self) -> str:
+        return max(self.used(), key=WINDOWS.index)
+
+    def period(self, record: RawRecord) -> str:
+        """
+        Calendar period that contains every window: the day of the record,
+        or its month if any window is longer than a day.
+        """
+        if self._daily:
+            return record.date.date().isoformat()
+        return f"{record.date.year:04d}-{record.date.month:02d}"
+
+    def signature(self) -> dict:
+        return {"default": self.default, "by_type": self.by_type, "by_exchange": self.by_exchange}
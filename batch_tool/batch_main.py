@@ -0,0 +1,44 @@
+"""
+Runs several aggregation/calculation jobs on one CoinTracking export, parsed once.
+
+Examples (from the project root):
+    python -m batch_tool.batch_main
+    python -m batch_tool.batch_main ./batch_tool/data/nightly.json --workers 4
+    python -m batch_tool.batch_main ./batch_tool/data/nightly.json --watch
+"""
+
+import argparse
+import sys
+
+from batch_tool.batch_runner import BatchRunner
+from batch_tool.watcher import ExportWatcher
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("batch_file", nargs="?", default="./batch_tool/data/config.json")
+    parser.add_argument(
+        "--workers", type=int, help="parallel jobs (0 = all CPU cores); overrides the file"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="keep running and process new exports of the import directory (see `watch`)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.watch:
+        try:
+            ExportWatcher.from_file(args.batch_file, args.workers).run_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    runner = BatchRunner.from_file(args.batch_file, args.workers)
+    results = runner.run()
+    print(runner.summary(results))
+    return 0 if all(result.ok for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
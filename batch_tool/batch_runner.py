@@ -0,0 +1,204 @@
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from typing import Any, Optional
+
+from aggregation_tool.aggregation_main import AggregationTool
+from calculation_tool.calc_main import CalculationTool
+from common.config import Config
+from common.data_importer import DataImporter
+from common.metrics import Metrics
+from common.models.records import RawRecord
+
+TOOLS = {"aggregation": AggregationTool, "calculation": CalculationTool}
+
+# Settings that determine how the import is parsed; they are shared by all jobs
+PARSE_SETTINGS = (
+    "import_file",
+    "data_format",
+    "date_format",
+    "decimal_separator",
+    "amount_mode",
+    "fixed_point_scale",
+)
+
+# Records parsed by the batch runner, inherited by (or sent once to) each worker process
+_SHARED_RECORDS: list[RawRecord] = []
+
+
+@dataclass
+class BatchJob:
+    name: str
+    tool: str
+    settings: dict[str, Any]
+
+
+@dataclass
+class JobResult:
+    name: str
+    tool: str
+    export_file: str
+    seconds: float
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+    error: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return not self.error
+
+
+def _init_worker(records: list[RawRecord]) -> None:
+    global _SHARED_RECORDS
+    _SHARED_RECORDS = records
+
+
+def _run_job(job: BatchJob) -> JobResult:
+    """
+    Runs one job on the shared records. Errors are reported in the result,
+    so one failing job does not stop the others.
+    """
+    config = Config.from_dict(job.settings)
+    result = JobResult(job.name, job.tool, str(config.get_export_file()), 0.0)
+    started = time.perf_counter()
+
+    try:
+        tool = TOOLS[job.tool](config, _SHARED_RECORDS)
+        if tool.metrics is None:
+            # Only collected for the summary, not written
+            tool.metrics = Metrics()
+        tool.run()
+    except Exception as error:
+        result.error = f"{type(error).__name__}: {error}"
+    else:
+        stages = tool.metrics.stages
+        if "filter" in stages:
+            result.rows_in = stages["filter"].rows_out
+        if "write" in stages:
+            result.rows_out = stages["write"].rows_in
+
+    result.seconds = round(time.perf_counter() - started, 3)
+    return result
+
+
+class BatchRunner:
+    """
+    Runs several aggregation/calculation jobs against one CoinTracking export.
+
+    The export is parsed once, without a filter; every job then applies its own
+    exchange/year/coin filter to the shared records and runs its tool with its
+    settings (the shared settings, overridden by the job's). With more than
+    one worker, the jobs run in a process pool; forked workers share the
+    parsed records instead of receiving a copy.
+    """
+
+    def __init__(self, settings: dict[str, Any], jobs: list[dict[str, Any]], workers: int = 1):
+        self.settings = dict(settings)
+        self.jobs = [self._create_job(index, job) for index, job in enumerate(jobs)]
+        self.workers = workers or os.cpu_count() or 1
+
+        names = [job.name for job in self.jobs]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate job names: {names}")
+
+    @classmethod
+    def from_file(cls, path: str, workers: Optional[int] = None) -> "BatchRunner":
+        """
+        Reads a batch file: `{"settings": {...}, "workers": 1, "jobs": [{...}, ...]}`.
+        `workers` overrides the value of the file.
+        """
+        with open(path, "r") as file:
+            batch = json.load(file)
+        if workers is None:
+            workers = batch.get("workers", 1)
+        return cls(batch.get("settings", {}), batch.get("jobs", []), workers)
+
+    def _create_job(self, index: int, job: dict[str, Any]) -> BatchJob:
+        job = dict(job)
+        name = job.pop("name", f"job{index + 1}")
+        tool = job.pop("tool", "aggregation")
+        if tool not in TOOLS:
+            raise ValueError(f"Unknown tool: {tool}")
+
+        for key in PARSE_SETTINGS:
+            if key in job and job[key] != self.settings.get(key):
+                raise ValueError(f"Job {name} overrides the shared setting {key}")
+
+        return BatchJob(name, tool, {**self.settings, **job})
+
+    def parse(self) -> tuple[list[RawRecord], str]:
+        """
+        Parses the import once, without a filter. Returns the records and the
+        amount mode they were parsed with: "decimal" if an amount does not fit
+        the fixed-point scale (`fixed_point_fallback`).
+        """
+        settings = {**self.settings, "ct_exchanges": [], "ct_year": ""}
+        importer = DataImporter(Config.from_dict(settings))
+        records = importer.load_with_fallback()
+        return records, importer.amount_mode
+
+    def set_import_file(self, import_file: str) -> None:
+        """Switches the shared and all job settings to another export (watch mode)."""
+        self.settings["import_file"] = import_file
+        for job in self.jobs:
+            job.settings["import_file"] = import_file
+
+    def run(
+        self,
+        records: Optional[list[RawRecord]] = None,
+        jobs: Optional[list[BatchJob]] = None,
+        amount_mode: Optional[str] = None,
+    ) -> list[JobResult]:
+        """
+        Runs the jobs (default: all) on the records (default: the parsed import);
+        the results are in job order. `amount_mode` is the one the records were
+        parsed with; it applies to this run only.
+        """
+        if records is None:
+            records, amount_mode = self.parse()
+        if jobs is None:
+            jobs = self.jobs
+        if amount_mode is not None:
+            jobs = [
+                replace(job, settings={**job.settings, "amount_mode": amount_mode})
+                for job in jobs
+            ]
+
+        if self.workers <= 1 or len(jobs) <= 1:
+            _init_worker(records)
+            try:
+                return [_run_job(job) for job in jobs]
+            finally:
+                _init_worker([])
+
+        # The records are passed to each worker once; with fork they are not even pickled
+        mp_context = None
+        if "fork" in multiprocessing.get_all_start_methods():
+            mp_context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(
+            max_workers=min(self.workers, len(jobs)),
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(records,),
+        ) as pool:
+            return list(pool.map(_run_job, jobs))
+
+    @staticmethod
+    def summary(results: list[JobResult]) -> str:
+        lines = [
+            f"{'Job':<25} {'Tool':<12} {'Rows in':>10} {'Rows out':>10} {'Seconds':>9}  Status"
+        ]
+        for result in results:
+            status = "ok" if result.ok else result.error
+            rows_in = "" if result.rows_in is None else result.rows_in
+            rows_out = "" if result.rows_out is None else result.rows_out
+            lines.append(
+                f"{result.name:<25} {result.tool:<12} {rows_in:>10} {rows_out:>10} "
+                f"{result.seconds:>9.3f}  {status}"
+            )
+        failed = sum(not result.ok for result in results)
+        lines.append(f"{len(results)} jobs, {failed} failed")
+        return "\n".join(lines)
@@ -0,0 +1,73 @@
+import pytest
+
+from aggregation_tool.aggregation_main import AggregationTool
+from batch_tool.batch_runner import BatchRunner
+from calculation_tool.calc_main import CalculationTool
+from common.config import Config
+from common.data_exporter import DataExporter
+from common.test_utils.random_records import make_random_records
+
+
+@pytest.fixture
+def settings(tmp_path):
+    import_file = tmp_path / "import.csv"
+    DataExporter().save_raw_data(import_file, make_random_records(2000, 21))
+    return {"import_file": str(import_file), "data_format": "CoinTracking"}
+
+
+def _jobs(tmp_path, prefix: str) -> list[dict]:
+    return [
+        {
+            "name": "kraken",
+            "tool": "aggregation",
+            "ct_exchanges": ["Kraken"],
+            "export_file": str(tmp_path / f"{prefix}-kraken.csv"),
+        },
+        {
+            "name": "2022",
+            "tool": "aggregation",
+            "ct_year": "2022",
+            "aggregation_window": "month",
+            "export_file": str(tmp_path / f"{prefix}-2022.csv"),
+        },
+        {
+            "name": "btc",
+            "tool": "calculation",
+            "coin": "BTC",
+            "export_file": str(tmp_path / f"{prefix}-btc.csv"),
+        },
+    ]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_jobs_match_single_runs(tmp_path, settings, workers):
+    results = BatchRunner(settings, _jobs(tmp_path, "batch"), workers).run()
+    assert [result.name for result in results] == ["kraken", "2022", "btc"]
+    assert all(result.ok for result in results)
+    assert all(result.rows_out for result in results)
+
+    for job, batch_job in zip(_jobs(tmp_path, "single"), _jobs(tmp_path, "batch")):
+        tool = AggregationTool if job.pop("tool") == "aggregation" else CalculationTool
+        tool(Config.from_dict({**settings, **job})).run()
+        with open(job["export_file"]) as single, open(batch_job["export_file"]) as batch:
+            assert single.read() == batch.read()
+
+
+def test_failed_job_is_reported(tmp_path, settings):
+    jobs = _jobs(tmp_path, "batch")
+    jobs[0]["aggregation_window"] = "year"
+
+    results = BatchRunner(settings, jobs).run()
+
+    assert not results[0].ok
+    assert "Unknown aggregation window: year" in results[0].error
+    assert results[1].ok and results[2].ok
+    assert "3 jobs, 1 failed" in BatchRunner.summary(results)
+
+
+def test_jobs_cannot_override_parse_settings(tmp_path, settings):
+    jobs = _jobs(tmp_path, "batch")
+    jobs[1]["import_file"] = "other.csv"
+
+    with pytest.raises(ValueError):
+        BatchRunner(settings, jobs)
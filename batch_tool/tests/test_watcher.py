@@ -0,0 +1,148 @@
+import os
+from dataclasses import replace
+
+from aggregation_tool.aggregation_main import AggregationTool
+from batch_tool.batch_runner import TOOLS, BatchRunner
+from batch_tool.watcher import ExportWatcher
+from common.config import Config
+from common.data_exporter import DataExporter
+from common.test_utils.random_records import make_random_records
+
+
+def _drop(path, records, mtime):
+    DataExporter().save_raw_data(path, records)
+    os.utime(path, (mtime, mtime))
+
+
+def _poll_settled(watcher: ExportWatcher):
+    assert watcher.poll() is None
+    return watcher.poll()
+
+
+def test_only_jobs_of_changed_partitions_run(tmp_path):
+    imports = tmp_path / "imports"
+    imports.mkdir()
+    jobs = [
+        {
+            "name": exchange,
+            "ct_exchanges": [exchange],
+            "export_file": str(tmp_path / f"{exchange}.csv"),
+        }
+        for exchange in ("Kraken", "Binance")
+    ]
+    runner = BatchRunner({"data_format": "CoinTracking"}, jobs)
+    watcher = ExportWatcher(runner, imports, "*.csv", interval=0, max_datasets=1)
+
+    records = make_random_records(2000, 31)
+    _drop(imports / "export-1.csv", records, 1_000_000)
+    results = _poll_settled(watcher)
+    assert [result.name for result in results] == ["Kraken", "Binance"]
+    assert watcher.poll() is None
+
+    # A new export that only changes Kraken records
+    changed = [
+        replace(r, buy_amount=r.buy_amount * 2) if r.exchange == "Kraken" else r for r in records
+    ]
+    _drop(imports / "export-2.csv", changed, 2_000_000)
+    results = _poll_settled(watcher)
+    assert [result.name for result in results] == ["Kraken"]
+    assert len(watcher.datasets) == 1
+
+    expected_file = tmp_path / "expected.csv"
+    AggregationTool(
+        Config.from_dict(
+            {
+                "import_file": str(imports / "export-2.csv"),
+                "data_format": "CoinTracking",
+                "ct_exchanges": ["Kraken"],
+                "export_file": str(expected_file),
+            }
+        )
+    ).run()
+    assert (tmp_path / "Kraken.csv").read_text() == expected_file.read_text()
+
+
+def test_decimal_fallback_applies_to_its_export_only(tmp_path):
+    imports = tmp_path / "imports"
+    imports.mkdir()
+    settings = {"data_format": "CoinTracking", "amount_mode": "fixed"}
+    export_file = tmp_path / "all.csv"
+    runner = BatchRunner(settings, [{"name": "all", "export_file": str(export_file)}])
+    watcher = ExportWatcher(runner, imports, "*.csv", interval=0)
+
+    # An amount beyond the fixed-point scale: parsed with Decimal amounts
+    records = make_random_records(500, 32)
+    _drop(imports / "export-1.csv", records, 1_000_000)
+    with open(imports / "export-1.csv", "a", encoding="utf-8") as f:
+        f.write('"Deposit","0.123456789012345","ADA","","","","","Kraken","","",'
+                '"2022-01-04 08:00:00","",""\n')
+    os.utime(imports / "export-1.csv", (1_000_000, 1_000_000))
+    assert all(result.ok for result in _poll_settled(watcher))
+    assert watcher.current.amount_mode == "decimal"
+
+    changed = [replace(r, buy_amount=r.buy_amount * 2) for r in records]
+    _drop(imports / "export-2.csv", changed, 2_000_000)
+    assert all(result.ok for result in _poll_settled(watcher))
+    assert watcher.current.amount_mode == "fixed"
+
+    expected_file = tmp_path / "expected.csv"
+    AggregationTool(
+        Config.from_dict(
+            {
+                **settings,
+                "import_file": str(imports / "export-2.csv"),
+                "export_file": str(expected_file),
+            }
+        )
+    ).run()
+    assert export_file.read_text() == expected_file.read_text()
+
+
+class _FailingTool(AggregationTool):
+    def run(self):
+        raise OSError("disk full")
+
+
+def test_bad_exports_are_skipped_and_failed_jobs_rerun(tmp_path, monkeypatch):
+    imports = tmp_path / "imports"
+    imports.mkdir()
+    jobs = [
+        {
+            "name": exchange,
+            "ct_exchanges": [exchange],
+            "export_file": str(tmp_path / f"{exchange}.csv"),
+        }
+        for exchange in ("Kraken", "Binance")
+    ]
+    runner = BatchRunner({"data_format": "CoinTracking"}, jobs)
+    watcher = ExportWatcher(runner, imports, "*.csv", interval=0, max_datasets=1)
+
+    # Both jobs fail and leave their (stale) export files in place
+    for job in jobs:
+        with open(job["export_file"], "w") as f:
+            f.write("stale")
+    records = make_random_records(2000, 33)
+    _drop(imports / "export-1.csv", records, 1_000_000)
+    monkeypatch.setitem(TOOLS, "aggregation", _FailingTool)
+    results = _poll_settled(watcher)
+    assert not any(result.ok for result in results)
+    monkeypatch.undo()
+
+    # A malformed export neither stops the watcher nor replaces the current export
+    bad_export = imports / "export-2.csv"
+    bad_export.write_text('"Type","Buy"\n"Trade","1"\n')
+    os.utime(bad_export, (2_000_000, 2_000_000))
+    assert _poll_settled(watcher) is None
+    assert watcher.poll() is None
+    assert watcher.current.path == imports / "export-1.csv"
+    assert runner.settings["import_file"] == str(imports / "export-1.csv")
+
+    # Only Kraken records changed, the failed Binance job is run again as well
+    changed = [
+        replace(r, buy_amount=r.buy_amount * 2) if r.exchange == "Kraken" else r for r in records
+    ]
+    _drop(imports / "export-3.csv", changed, 3_000_000)
+    results = _poll_settled(watcher)
+    assert [result.name for result in results] == ["Kraken", "Binance"]
+    assert all(result.ok for result in results)
+    assert not watcher.failed_jobs
@@ -0,0 +1,243 @@
+import hashlib
+import json
+import time
+from dataclasses import dataclass, fields
+from operator import attrgetter
+from pathlib import Path
+from typing import Any, Optional
+
+from batch_tool.batch_runner import BatchJob, BatchRunner, JobResult
+from common.models.records import RawRecord
+
+_values_of = attrgetter(*[f.name for f in fields(RawRecord)])
+
+# (exchange, year) partition of the held records
+Partition = tuple[str, int]
+
+
+@dataclass
+class Dataset:
+    """Parsed export held in memory."""
+
+    path: Path
+    stamp: tuple[int, int]  # (mtime_ns, size)
+    records: list[RawRecord]
+    digests: dict[Partition, str]
+    amount_mode: str  # used for parsing, see `BatchRunner.parse`
+
+
+def _stamp(path: Path) -> Optional[tuple[int, int]]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def partition_digests(records: list[RawRecord]) -> dict[Partition, str]:
+    """Digest of the records of every (exchange, year), in file order."""
+    digests = {}
+    for record in records:
+        key = (record.exchange, record.date.year)
+        digest = digests.get(key)
+        if digest is None:
+            digest = digests[key] = hashlib.blake2b(digest_size=16)
+        digest.update("\x1f".join(map(str, _values_of(record))).encode())
+        digest.update(b"\x1e")
+    return {key: digest.hexdigest() for key, digest in digests.items()}
+
+
+def changed_partitions(
+    previous: dict[Partition, str], current: dict[Partition, str]
+) -> set[Partition]:
+    """Partitions with new, edited or removed records."""
+    return {
+        key for key in previous.keys() | current.keys() if previous.get(key) != current.get(key)
+    }
+
+
+def job_affected(job: BatchJob, changed: set[Partition]) -> bool:
+    """
+    Whether the exchange/year filter of a job selects a changed partition.
+    The coin filter is not considered, so a job may be run without need.
+    """
+    exchanges = job.settings.get("ct_exchanges") or []
+    year = str(job.settings.get("ct_year") or "")
+    return any(
+        (not exchanges or exchange in exchanges) and (not year or str(record_year) == year)
+        for exchange, record_year in changed
+    )
+
+
+class ExportWatcher:
+    """
+    Long-running mode of the batch runner: polls a directory for new
+    CoinTracking exports and runs the jobs on the newest one.
+
+    A file is processed once its modification time and size are unchanged
+    for one poll interval (so exports are not read while they are still
+    being written). Its records are compared per (exchange, year) with the
+    previously processed export, and only the jobs whose filter selects a
+    changed partition are run again (as well as jobs whose export file is
+    missing and jobs that failed last time). An export that cannot be parsed
+    is reported and skipped until it changes; the previous export stays
+    current. Within a job, `incremental_state_file` / `balance_checkpoint_file`
+    limit the work further to the changed days or months.
+
+    The parsed exports are held in memory, so switching back to an unchanged
+    export (e.g. after the newest one was removed) needs no parse. At most `max_datasets` exports
+    and `max_records` records (0: no limit) are held; the least recently
+    used ones are evicted first, the current export is always kept.
+    """
+
+    def __init__(
+        self,
+        runner: BatchRunner,
+        directory: Path,
+        pattern: str = "*.csv*",
+        interval: float = 60.0,
+        max_datasets: int = 2,
+        max_records: int = 0,
+    ):
+        self.runner = runner
+        self.directory = Path(directory)
+        self.pattern = pattern
+        self.interval = interval
+        self.max_datasets = max(max_datasets, 1)
+        self.max_records = max_records
+        # Held exports, least recently used first
+        self.datasets: list[Dataset] = []
+        self.current: Optional[Dataset] = None
+        self._pending: Optional[tuple[Path, tuple[int, int]]] = None
+        # Export that could not be parsed, skipped until it changes
+        self._rejected: Optional[tuple[Path, tuple[int, int]]] = None
+        # Jobs that failed in the last run
+        self.failed_jobs: set[str] = set()
+
+    @classmethod
+    def from_file(cls, path: str, workers: Optional[int] = None) -> "ExportWatcher":
+        """
+        Reads a batch file with a `watch` section: `{"directory": ..., "pattern": "*.csv*",
+        "interval": 60, "max_datasets": 2, "max_records": 0}`.
+        The directory defaults to the one of the shared `import_file`.
+        """
+        with open(path, "r") as file:
+            watch: dict[str, Any] = json.load(file).get("watch", {})
+        runner = BatchRunner.from_file(path, workers)
+        import_file = Path(runner.settings.get("import_file", "."))
+        return cls(
+            runner,
+            Path(watch.get("directory") or import_file.parent),
+            watch.get("pattern", "*.csv*"),
+            float(watch.get("interval", 60)),
+            int(watch.get("max_datasets", 2)),
+            int(watch.get("max_records", 0)),
+        )
+
+    def newest_export(self) -> Optional[Path]:
+        # The output of the jobs may be written to the watched directory
+        outputs = {
+            Path(job.settings.get("export_file", "")).resolve() for job in self.runner.jobs
+        }
+        files = [
+            path
+            for path in self.directory.glob(self.pattern)
+            if path.is_file() and path.resolve() not in outputs
+        ]
+        if not files:
+            return None
+        return max(files, key=lambda path: (path.stat().st_mtime_ns, path.name))
+
+    def poll(self) -> Optional[list[JobResult]]:
+        """
+        Processes the newest export if it changed and has settled.
+        Returns the results of the jobs that were run, or None.
+        """
+        path = self.newest_export()
+        stamp = _stamp(path) if path is not None else None
+        if stamp is None:
+            return None
+
+        current = self.current
+        if current is not None and (path, stamp) == (current.path, current.stamp):
+            return None
+        if (path, stamp) == self._rejected:
+            return None
+        if self._pending != (path, stamp):
+            # Changed since the last poll: wait until it is unchanged for one interval
+            self._pending = (path, stamp)
+            return None
+
+        self._pending = None
+        return self.process(path, stamp)
+
+    def process(self, path: Path, stamp: tuple[int, int]) -> Optional[list[JobResult]]:
+        """
+        Runs the affected jobs on the export. Returns None if it cannot be parsed.
+        """
+        previous = self.current
+        try:
+            self.current = self._load(path, stamp)
+        except Exception as error:
+            # e.g. a malformed or truncated export; the daemon keeps running
+            print(f"{path.name}: cannot be parsed, skipped ({type(error).__name__}: {error})")
+            self._rejected = (path, stamp)
+            if previous is not None:
+                self.runner.set_import_file(str(previous.path))
+            return None
+
+        if previous is None:
+            jobs = self.runner.jobs
+        else:
+            changed = changed_partitions(previous.digests, self.current.digests)
+            jobs = [
+                job
+                for job in self.runner.jobs
+                if job_affected(job, changed)
+                or job.name in self.failed_jobs
+                or not Path(job.settings.get("export_file", "")).is_file()
+            ]
+
+        if not jobs:
+            return []
+        results = self.runner.run(self.current.records, jobs, self.current.amount_mode)
+        # Failed jobs are always selected, so only this run's failures remain
+        self.failed_jobs = {result.name for result in results if not result.ok}
+        return results
+
+    def _load(self, path: Path, stamp: tuple[int, int]) -> Dataset:
+        """Returns the held dataset of the export, or parses it."""
+        self.runner.set_import_file(str(path))
+
+        for dataset in self.datasets:
+            if (dataset.path, dataset.stamp) == (path, stamp):
+                self.datasets.remove(dataset)
+                break
+        else:
+            records, amount_mode = self.runner.parse()
+            dataset = Dataset(path, stamp, records, partition_digests(records), amount_mode)
+
+        self.datasets.append(dataset)
+        self._evict()
+        return dataset
+
+    def _evict(self) -> None:
+        def held_records() -> int:
+            return sum(len(dataset.records) for dataset in self.datasets)
+
+        while len(self.datasets) > 1 and (
+            len(self.datasets) > self.max_datasets
+            or (self.max_records and held_records() > self.max_records)
+        ):
+            self.datasets.pop(0)
+
+    def run_forever(self) -> None:
+        print(f"Watching {self.directory / self.pattern} every {self.interval:g} s")
+        while True:
+            results = self.poll()
+            if results is not None:
+                jobs = len(self.runner.jobs)
+                print(f"{self.current.path.name}: {len(results)} of {jobs} jobs run")
+                if results:
+                    print(self.runner.summary(results))
+            time.sleep(self.interval)
@@ -0,0 +1,82 @@
+"""
+Memory benchmark: bytes per parsed RawRecord, with the previous layout
+(dataclass with __dict__, a fresh string per field and row) versus the
+slotted RawRecord with interned text fields.
+
+Run from the project root:
+    python -m benchmarks.bench_memory --rows 1000000
+"""
+
+import argparse
+import sys
+import tempfile
+import tracemalloc
+from dataclasses import fields, make_dataclass
+from operator import attrgetter
+from pathlib import Path
+
+from benchmarks.export_generator import ExportSettings, write_export
+from common.models.records import RawRecord
+from common.utils.csv_helpers import iter_ct_csv
+from common.utils.row_parser import RowParser
+
+# RawRecord as it was before: frozen dataclass without slots
+LegacyRawRecord = make_dataclass(
+    "LegacyRawRecord", [(f.name, f.type) for f in fields(RawRecord)], frozen=True
+)
+
+
+class _NoSymbols(dict):
+    """Symbol table that interns nothing: every row keeps its own strings."""
+
+    def setdefault(self, key, default=None):
+        return default
+
+
+def load_legacy(path: Path) -> list:
+    parse = RowParser(symbols=_NoSymbols()).parse
+    values_of = attrgetter(*(f.name for f in fields(RawRecord)))
+    return [LegacyRawRecord(*values_of(parse(row))) for row in iter_ct_csv(str(path))]
+
+
+def load_compact(path: Path) -> list[RawRecord]:
+    parse = RowParser().parse
+    return [parse(row) for row in iter_ct_csv(str(path))]
+
+
+def measure(label: str, load, path: Path) -> float:
+    """Memory held by the loaded records (not the peak while reading), per record."""
+    tracemalloc.start()
+    records = load(path)
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    per_record = held / len(records)
+    # Size of the record object itself, including its __dict__ (if any)
+    instance = sys.getsizeof(records[0])
+    if hasattr(records[0], "__dict__"):
+        instance += sys.getsizeof(records[0].__dict__)
+    print(
+        f"  {label:<8} {held / 2**20:9.1f} MiB  {per_record:7.1f} bytes/record  "
+        f"(instance {instance} bytes)"
+    )
+    return per_record
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "export.csv"
+        write_export(path, ExportSettings(rows=args.rows))
+
+        print(f"{args.rows:,} rows")
+        before = measure("before", load_legacy, path)
+        after = measure("after", load_compact, path)
+        print(f"  saved    {before - after:9.1f} bytes/record ({1 - after / before:.0%})")
+
+
+if __name__ == "__main__":
+    main()
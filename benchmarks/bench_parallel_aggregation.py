@@ -0,0 +1,45 @@
+"""
+Scaling benchmark of the partition-parallel aggregation engine against the
+serial hash engine, for 1..N worker processes.
+
+Run from the project root:
+    python -m benchmarks.bench_parallel_aggregation --records 500000 --max-workers 8
+"""
+
+import argparse
+import os
+import time
+
+from aggregation_tool.aggregator import HashCoinTrackingAggregator
+from aggregation_tool.parallel_aggregator import ParallelCoinTrackingAggregator
+from common.test_utils.random_records import make_random_records
+
+
+def measure(label: str, aggregator, records: list) -> tuple[float, list]:
+    started = time.perf_counter()
+    result = aggregator.aggregate_lines(records)
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<12} {elapsed:8.3f} s  {len(records) / elapsed:12,.0f} records/s")
+    return elapsed, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=500_000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    records = make_random_records(args.records, 42)
+    print(f"{len(records):,} records, {os.cpu_count()} CPU cores")
+
+    serial, expected = measure("serial", HashCoinTrackingAggregator(), records)
+    for workers in range(1, args.max_workers + 1):
+        elapsed, result = measure(
+            f"{workers} workers", ParallelCoinTrackingAggregator(workers=workers), records
+        )
+        assert result == expected, "parallel result differs from the serial engine"
+        print(f"  {'speedup':<12} {serial / elapsed:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
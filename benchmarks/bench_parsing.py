@@ -0,0 +1,71 @@
+"""
+Parsing-throughput benchmark: generic row parsing (the former
+`DataImporter.parse_row`) versus the per-file compiled `RowParser`,
+for ISO and German formatted exports.
+
+Run from the project root:
+    python -m benchmarks.bench_parsing --rows 200000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.export_generator import ExportSettings, write_export
+from common.models.records import RawRecord
+from common.utils.csv_helpers import read_ct_csv
+from common.utils.helper import parse_date, to_decimal
+from common.utils.row_parser import RowParser
+
+
+def parse_row_generic(row: list[str]) -> RawRecord:
+    """Baseline: detects the number and date format of every single value."""
+    return RawRecord(
+        type=row[0],
+        buy_amount=to_decimal(row[1]),
+        buy_currency=row[2],
+        sell_amount=to_decimal(row[3]),
+        sell_currency=row[4],
+        fee_amount=to_decimal(row[5]),
+        fee_currency=row[6],
+        exchange=row[7],
+        group=row[8],
+        comment=row[9],
+        date=parse_date(row[10]),
+        lpn=row[11],
+        tx_id=row[12],
+    )
+
+
+def measure(label: str, parse, rows: list[list[str]]) -> float:
+    started = time.perf_counter()
+    for row in rows:
+        parse(row)
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<10} {elapsed:8.3f} s  {len(rows) / elapsed:12,.0f} rows/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, settings in (
+            ("ISO", ExportSettings(rows=args.rows)),
+            ("German", ExportSettings.german(rows=args.rows)),
+        ):
+            path = Path(tmp_dir) / f"export-{name}.csv"
+            write_export(path, settings)
+            rows = read_ct_csv(str(path))
+
+            print(f"{name} format, {len(rows):,} rows")
+            generic = measure("generic", parse_row_generic, rows)
+            compiled = measure("compiled", RowParser.for_file(rows[0]).parse, rows)
+            print(f"  speedup    {generic / compiled:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
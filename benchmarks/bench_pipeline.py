@@ -0,0 +1,186 @@
+"""
+Benchmark suite for all pipeline stages on a synthetic export.
+
+Times and memory-profiles `DataImporter.load_data`, the aggregation engines,
+`Calculator.track_balance` and `DataExporter`, and stores the results as JSON
+(by default `benchmarks/results/<commit>.json`) for comparisons across commits.
+
+Run from the project root:
+    python -m benchmarks.bench_pipeline --rows 1000000
+    python -m benchmarks.bench_pipeline --rows 1000000 --compare benchmarks/results/<old>.json
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+from aggregation_tool.aggregator import AggregatorFactory
+from benchmarks.export_generator import ExportSettings, write_export
+from calculation_tool.calculator import Calculator
+from common.config import Config
+from common.data_exporter import DataExporter
+from common.data_importer import DataImporter
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def current_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def measure(run: Callable[[], object], with_memory: bool) -> tuple[float, Optional[int], object]:
+    """
+    Runs `run` once for the time and, with `with_memory`, once more under
+    tracemalloc for the peak of allocated memory (tracemalloc slows down
+    allocations, so it is not active while timing).
+    """
+    started = time.perf_counter()
+    result = run()
+    seconds = time.perf_counter() - started
+
+    peak = None
+    if with_memory:
+        del result
+        tracemalloc.start()
+        result = run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return seconds, peak, result
+
+
+def run_suite(import_file: Path, tmp_dir: Path, coin: str, engines: list[str], with_memory: bool) -> dict:
+    config = Config.from_dict(
+        {
+            "import_file": str(import_file),
+            "data_format": "CoinTracking",
+            "coin": coin,
+        }
+    )
+    stages: dict[str, dict] = {}
+
+    def record(name: str, run: Callable[[], object], rows_in: Optional[int]):
+        seconds, peak, result = measure(run, with_memory)
+        rows_out = len(result) if isinstance(result, list) else rows_in
+        if rows_in is None:
+            rows_in = rows_out
+        stages[name] = {
+            "seconds": round(seconds, 4),
+            "rows_in": rows_in,
+            "rows_out": rows_out,
+            "rows_per_second": round(rows_in / seconds) if seconds else None,
+            "peak_bytes": peak,
+        }
+        peak_text = f"{peak / 2**20:9.1f} MiB" if peak is not None else ""
+        print(f"  {name:<22} {seconds:8.3f} s  {rows_in:>11,} -> {rows_out:<11,} {peak_text}")
+        return result
+
+    importer = DataImporter(config)
+    records = record("import", importer.load_data, None)
+
+    aggregated = None
+    for engine in engines:
+        aggregator = AggregatorFactory.get_aggregator("CoinTracking", engine, config)
+        # Engines may sort their input in place, so every run gets a fresh list
+        aggregated = record(
+            f"aggregate[{engine}]", lambda: aggregator.aggregate_lines(list(records)), len(records)
+        )
+
+    calculator = Calculator(config)
+    record("calculate", lambda: calculator.track_balance(list(records)), len(records))
+
+    exporter = DataExporter()
+    export_file = tmp_dir / "output.csv"
+    record("export[raw]", lambda: exporter.save_raw_data(export_file, records), len(records))
+    if aggregated is not None:
+        record(
+            "export[aggregated]",
+            lambda: exporter.save_raw_data(export_file, aggregated),
+            len(aggregated),
+        )
+
+    return stages
+
+
+def compare(result: dict, baseline_file: Path) -> None:
+    with open(baseline_file, "r") as f:
+        baseline = json.load(f)
+
+    print(f"Compared to {baseline['commit']} ({baseline_file}):")
+    for name, stage in result["stages"].items():
+        old = baseline["stages"].get(name)
+        if old is None or not old["seconds"]:
+            continue
+        ratio = stage["seconds"] / old["seconds"]
+        print(f"  {name:<22} {old['seconds']:8.3f} s -> {stage['seconds']:8.3f} s  ({ratio:5.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--german", action="store_true")
+    parser.add_argument("--coin", default="BTC")
+    parser.add_argument("--engines", default="sorted,hash", help="comma-separated aggregation engines")
+    parser.add_argument("--input", type=Path, help="benchmark an existing export instead")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc runs")
+    parser.add_argument("--output", type=Path, help="result file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", type=Path, help="result file to compare with")
+    args = parser.parse_args()
+
+    options = dict(rows=args.rows, seed=args.seed)
+    settings = ExportSettings.german(**options) if args.german else ExportSettings(**options)
+    commit = current_commit()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        import_file = args.input
+        if import_file is None:
+            import_file = tmp_dir / "export.csv"
+            write_export(import_file, settings)
+
+        print(f"Commit {commit}, {import_file}")
+        stages = run_suite(
+            import_file, tmp_dir, args.coin, args.engines.split(","), not args.no_memory
+        )
+
+    result = {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "input": str(args.input) if args.input else None,
+        "settings": None if args.input else {
+            "rows": settings.rows,
+            "seed": settings.seed,
+            "date_format": settings.date_format,
+            "decimal_separator": settings.decimal_separator,
+        },
+        "stages": stages,
+    }
+
+    output = args.output or RESULTS_DIR / f"{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        compare(result, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Deterministic generator of synthetic CoinTracking full exports.
+
+Run from the project root:
+    python -m benchmarks.export_generator export.csv --rows 1000000 --german
+"""
+
+import argparse
+import csv
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator
+
+from common.utils.row_parser import GERMAN_DATE_FORMAT, ISO_DATE_FORMAT
+
+HEADER = [
+    "Type", "Buy", "Cur.", "Sell", "Cur.", "Fee", "Cur.",
+    "Exchange", "Group", "Comment", "Date", "LPN", "Tx-ID",
+]
+
+# Start prices in EUR; prices follow a random walk
+_START_PRICES = {
+    "BTC": 30000.0, "ETH": 2000.0, "ADA": 1.2, "SOL2": 40.0, "XRP": 0.8,
+    "DFI": 2.5, "BNB": 300.0, "LUNA2": 3.0,
+}
+
+
+@dataclass(frozen=True)
+class ExportSettings:
+    rows: int = 100_000
+    seed: int = 42
+    exchanges: tuple[str, ...] = ("Kraken", "Binance", "Bitpanda")
+    coins: tuple[str, ...] = ("BTC", "ETH", "ADA", "SOL2", "XRP")
+    quote_currencies: tuple[str, ...] = ("EUR", "USDT")
+    # Average number of bot rows per day
+    bot_trades_per_day: int = 200
+    # Share of margin fee / profit / loss rows among the bot rows
+    margin_share: float = 0.15
+    date_format: str = ISO_DATE_FORMAT
+    decimal_separator: str = "."
+    start: datetime = datetime(2020, 1, 1)
+
+    @classmethod
+    def german(cls, **kwargs) -> "ExportSettings":
+        return cls(date_format=GERMAN_DATE_FORMAT, decimal_separator=",", **kwargs)
+
+
+class _ExportGenerator:
+    def __init__(self, settings: ExportSettings):
+        self.settings = settings
+        self.rng = random.Random(settings.seed)
+        self.prices = {coin: _START_PRICES.get(coin, 10.0) for coin in settings.coins}
+        self.tx_number = 0
+
+    def amount(self, value: float) -> str:
+        text = f"{value:.8f}"
+        if self.settings.decimal_separator != ".":
+            text = text.replace(".", self.settings.decimal_separator)
+        return text
+
+    def row(self, type_, buy, buy_cur, sell, sell_cur, fee, fee_cur, exchange, group, date):
+        self.tx_number += 1
+        return [
+            type_, buy, buy_cur, sell, sell_cur, fee, fee_cur, exchange, group,
+            "", date.strftime(self.settings.date_format), "", f"Tx-{self.tx_number}",
+        ]
+
+    def deposit(self, exchange: str, date: datetime) -> list[str]:
+        eur = self.rng.choice((500, 1000, 2500, 5000))
+        return self.row(
+            "Deposit", self.amount(eur), "EUR", "", "", "", "", exchange, "", date
+        )
+
+    def bot_row(self, exchange: str, date: datetime) -> list[str]:
+        rng = self.rng
+        coin = rng.choice(self.settings.coins)
+        quote = rng.choice(self.settings.quote_currencies)
+        price = self.prices[coin]
+        value = rng.uniform(5, 250)
+        volume = value / price
+        fee = value * 0.0016
+
+        if rng.random() < self.settings.margin_share:
+            kind = rng.random()
+            if kind < 0.6:
+                fee_cur = "KFEE" if exchange == "Kraken" else quote
+                group = "Kraken Rollover" if exchange == "Kraken" else "Bot"
+                return self.row(
+                    "Margin Fee", "", "", self.amount(fee), fee_cur,
+                    self.amount(0), fee_cur, exchange, group, date,
+                )
+            if kind < 0.85:
+                return self.row(
+                    "Margin Profit", self.amount(value * 0.02), quote, "", "",
+                    "", "", exchange, "Bot", date,
+                )
+            return self.row(
+                "Margin Loss", "", "", self.amount(value * 0.02), quote,
+                "", "", exchange, "Bot", date,
+            )
+
+        if rng.random() < 0.5:
+            return self.row(
+                "Trade", self.amount(volume), coin, self.amount(value), quote,
+                self.amount(fee), quote, exchange, "Bot", date,
+            )
+        return self.row(
+            "Trade", self.amount(value), quote, self.amount(volume), coin,
+            self.amount(fee), quote, exchange, "Bot", date,
+        )
+
+    def iter_rows(self) -> Iterator[list[str]]:
+        settings = self.settings
+        rng = self.rng
+        produced = 0
+        day = settings.start
+
+        while produced < settings.rows:
+            for coin in self.prices:
+                self.prices[coin] *= 1 + rng.gauss(0, 0.03)
+
+            per_day = settings.bot_trades_per_day
+            count = rng.randint(per_day // 2, per_day + per_day // 2) if per_day else 0
+            seconds = sorted(rng.randrange(60, 86400) for _ in range(count))
+
+            if day.weekday() == 0:
+                # Weekly deposits, before the trades of the day
+                for exchange in settings.exchanges:
+                    if produced >= settings.rows:
+                        return
+                    yield self.deposit(exchange, day + timedelta(seconds=30))
+                    produced += 1
+
+            for second in seconds:
+                if produced >= settings.rows:
+                    return
+                exchange = rng.choice(settings.exchanges)
+                yield self.bot_row(exchange, day + timedelta(seconds=second))
+                produced += 1
+
+            day += timedelta(days=1)
+
+
+def iter_export_rows(settings: ExportSettings) -> Iterator[list[str]]:
+    """
+    Data rows of a synthetic export, in date order. The same settings
+    (including the seed) always produce the same rows.
+    """
+    return _ExportGenerator(settings).iter_rows()
+
+
+def write_export(path: Path, settings: ExportSettings) -> None:
+    """Writes a synthetic export; rows are streamed, so any row count fits in memory."""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(HEADER)
+        writer.writerows(iter_export_rows(settings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("path")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--exchanges", default="Kraken,Binance,Bitpanda")
+    parser.add_argument("--coins", default="BTC,ETH,ADA,SOL2,XRP")
+    parser.add_argument("--bot-trades-per-day", type=int, default=200)
+    parser.add_argument("--margin-share", type=float, default=0.15)
+    parser.add_argument("--german", action="store_true", help="dd.mm.yyyy dates, comma decimals")
+    args = parser.parse_args()
+
+    options = dict(
+        rows=args.rows,
+        seed=args.seed,
+        exchanges=tuple(args.exchanges.split(",")),
+        coins=tuple(args.coins.split(",")),
+        bot_trades_per_day=args.bot_trades_per_day,
+        margin_share=args.margin_share,
+    )
+    settings = ExportSettings.german(**options) if args.german else ExportSettings(**options)
+    write_export(Path(args.path), settings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from decimal import Decimal
+from operator import attrgetter
+from typing import Iterable, Optional
+
+from calculation_tool.calculator import Calculator
+from common.models.records import RawRecord
+from common.utils.external_sort import external_sort
+
+# A record together with the balance after it
+BalanceEntry = tuple[RawRecord, Decimal]
+
+
+@dataclass
+class BalanceAnomaly:
+    """
+    An interval in which the balance of a coin was negative.
+    `exchange` is None for the balance over all exchanges.
+    """
+
+    coin: str
+    exchange: Optional[str]
+    crossing: BalanceEntry
+    minimum: Decimal
+    minimum_date: datetime
+    end: Optional[datetime] = None  # None: still negative at the end of the data
+    before: list[BalanceEntry] = field(default_factory=list)
+    after: list[BalanceEntry] = field(default_factory=list)
+
+    @property
+    def start(self) -> datetime:
+        return self.crossing[0].date
+
+    def duration(self, last_date: datetime) -> timedelta:
+        """Time spent below zero; open intervals last until `last_date`."""
+        return (self.end or last_date) - self.start
+
+
+class _Scope:
+    __slots__ = ("balance", "recent", "open", "collecting")
+
+    def __init__(self, window: int):
+        self.balance = 0
+        self.recent: deque[BalanceEntry] = deque(maxlen=window)
+        self.open: Optional[BalanceAnomaly] = None
+        self.collecting: list[BalanceAnomaly] = []
+
+
+class AnomalyScanner(Calculator):
+    """
+    Negative-balance scan over all coins in a single pass.
+
+    Records are processed in date order. For every coin, a running balance
+    is kept per exchange and over all exchanges. Per exchange, the balances
+    equal the exchange balances of the matrix mode. Only the intervals in
+    which a balance drops below zero are reported: the crossing record, the
+    minimum, the end of the interval and `window` records before and after
+    the crossing.
+    """
+
+    def __init__(self, config, window: int = 3):
+        super().__init__(config)
+        self.window = window
+        self.last_date: Optional[datetime] = None
+
+    def _sorted_by_date(self, records: Iterable[RawRecord]) -> Iterable[RawRecord]:
+        max_records_in_memory = self.config.get_max_records_in_memory()
+        if max_records_in_memory:
+            return external_sort(records, attrgetter("date"), max_records_in_memory)
+
+        if not isinstance(records, list):
+            records = list(records)
+        records.sort(key=attrgetter("date"))
+        return records
+
+    def scan(self, records: Iterable[RawRecord]) -> list[BalanceAnomaly]:
+        scopes: dict[tuple[str, Optional[str]], _Scope] = {}
+        anomalies: list[BalanceAnomaly] = []
+
+        for record in self._sorted_by_date(records):
+            self.last_date = record.date
+
+            for coin, delta in self.coin_deltas(record):
+                for key in ((coin, record.exchange), (coin, None)):
+                    scope = scopes.get(key)
+                    if scope is None:
+                        scope = scopes[key] = _Scope(self.window)
+                    anomaly = self._update(scope, key, record, delta)
+                    if anomaly is not None:
+                        anomalies.append(anomaly)
+
+        anomalies.sort(key=lambda a: (a.start, a.coin, a.exchange is None, a.exchange or ""))
+        return anomalies
+
+    def _update(
+        self, scope: _Scope, key: tuple, record: RawRecord, delta
+    ) -> Optional[BalanceAnomaly]:
+        """
+        Applies one balance change; returns a new anomaly at a negative crossing.
+        """
+        scope.balance += delta
+        entry = (record, scope.balance)
+
+        for anomaly in scope.collecting:
+            anomaly.after.append(entry)
+        scope.collecting = [a for a in scope.collecting if len(a.after) < self.window]
+
+        crossed = None
+        if scope.balance < 0:
+            if scope.open is None:
+                crossed = BalanceAnomaly(
+                    coin=key[0],
+                    exchange=key[1],
+                    crossing=entry,
+                    minimum=scope.balance,
+                    minimum_date=record.date,
+                    before=list(scope.recent),
+                )
+                scope.open = crossed
+                if self.window:
+                    scope.collecting.append(crossed)
+            elif scope.balance < scope.open.minimum:
+                scope.open.minimum = scope.balance
+                scope.open.minimum_date = record.date
+        elif scope.open is not None:
+            scope.open.end = record.date
+            scope.open = None
+
+        scope.recent.append(entry)
+        return crossed
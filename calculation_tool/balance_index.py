@@ -0,0 +1,164 @@
+import json
+import os
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Iterable, Optional
+
+from common.models.records import MatrixRecord, TargetRecord
+from common.utils.fixed_point import fixed_to_decimal
+
+# Bump when the file format changes
+INDEX_VERSION = 1
+
+
+class BalanceIndex:
+    """
+    Point-in-time index of the balances written by the Calculator.
+
+    For every (coin, exchange) pair the index holds the timestamps and the
+    balance on that exchange after each record, sorted by time. Lookups are
+    binary searches: the balance at a time is the balance after the last
+    record at or before it (0 before the first record).
+
+    Single-coin output only carries the running balance over all exchanges;
+    the exchange balance is derived from the balance changes of consecutive
+    rows, which are in calculation order (exchange, date). Matrix output
+    carries the exchange balance directly.
+
+    A loaded index parses the timestamps and balances of a pair only when it
+    is first queried, so a single lookup does not parse the whole file.
+    """
+
+    def __init__(self, series: Optional[dict[tuple[str, str], tuple[list, list]]] = None):
+        # (coin, exchange) -> (sorted timestamps, balances)
+        self.series = series or {}
+        # Loaded pairs whose timestamps and balances are still strings
+        self._unparsed: set[tuple[str, str]] = set()
+
+    def _series(self, coin: str, exchange: str) -> tuple[list, list]:
+        key = (coin, exchange)
+        if key in self._unparsed:
+            dates, balances = self.series[key]
+            self.series[key] = (
+                [datetime.fromisoformat(date) for date in dates],
+                [Decimal(balance) for balance in balances],
+            )
+            self._unparsed.discard(key)
+        return self.series.get(key, ([], []))
+
+    @classmethod
+    def from_records(
+        cls, records: Iterable[TargetRecord], fixed_point_scale: Optional[int] = None
+    ) -> "BalanceIndex":
+        """
+        Builds the index from Calculator output in calculation order,
+        e.g. `Calculator.iter_balance` or `DataImporter.iter_target_csv_file`.
+        """
+        series: dict[tuple[str, str], tuple[list, list]] = {}
+        last_balance: dict[str, Decimal] = {}
+        exchange_balance: dict[tuple[str, str], Decimal] = {}
+
+        for record in records:
+            coin = record.balance_currency
+            balance = record.balance
+            if fixed_point_scale is not None:
+                balance = fixed_to_decimal(balance, fixed_point_scale)
+
+            key = (coin, record.exchange)
+            if isinstance(record, MatrixRecord):
+                local = record.exchange_balance
+                if fixed_point_scale is not None:
+                    local = fixed_to_decimal(local, fixed_point_scale)
+            else:
+                delta = balance - last_balance.get(coin, 0)
+                local = exchange_balance.get(key, 0) + delta
+            last_balance[coin] = balance
+            exchange_balance[key] = local
+
+            dates, balances = series.setdefault(key, ([], []))
+            if dates and record.date < dates[-1]:
+                raise ValueError(
+                    f"Records of {coin} on {record.exchange} are not sorted by date"
+                )
+            dates.append(record.date)
+            balances.append(Decimal(local))
+
+        return cls(series)
+
+    def coins(self) -> list[str]:
+        return sorted({coin for coin, _ in self.series})
+
+    def exchanges(self, coin: str) -> list[str]:
+        return sorted(exchange for c, exchange in self.series if c == coin)
+
+    def balance_at(self, coin: str, exchange: str, when: datetime) -> Decimal:
+        """
+        Balance of `coin` on `exchange` after all records at or before `when`.
+        """
+        dates, balances = self._series(coin, exchange)
+        position = bisect_right(dates, when)
+        if position == 0:
+            return Decimal(0)
+        return balances[position - 1]
+
+    def total_at(self, coin: str, when: datetime) -> Decimal:
+        """
+        Balance of `coin` over all exchanges at `when`.
+        """
+        return sum(
+            (self.balance_at(coin, exchange, when) for exchange in self.exchanges(coin)),
+            Decimal(0),
+        )
+
+    def history(
+        self,
+        coin: str,
+        exchange: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> list[tuple[datetime, Decimal]]:
+        """
+        (timestamp, balance) of all records with start <= timestamp <= end.
+        """
+        dates, balances = self._series(coin, exchange)
+        first = 0 if start is None else bisect_left(dates, start)
+        last = len(dates) if end is None else bisect_right(dates, end)
+        return list(zip(dates[first:last], balances[first:last]))
+
+    def save(self, path: Path) -> None:
+        series = []
+        for coin, exchange in sorted(self.series):
+            dates, balances = self._series(coin, exchange)
+            series.append(
+                {
+                    "coin": coin,
+                    "exchange": exchange,
+                    "dates": [date.isoformat(sep=" ") for date in dates],
+                    "balances": [str(balance) for balance in balances],
+                }
+            )
+        data = {"version": INDEX_VERSION, "series": series}
+        path = Path(path)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "BalanceIndex":
+        with open(path, "r") as f:
+            data = json.load(f)
+
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported balance index version: {data.get('version')}")
+
+        index = cls(
+            {
+                (entry["coin"], entry["exchange"]): (entry["dates"], entry["balances"])
+                for entry in data["series"]
+            }
+        )
+        index._unparsed = set(index.series)
+        return index
@@ -0,0 +1,81 @@
+"""
+Builds and queries a point-in-time balance index of the calculation output.
+
+Examples (from the project root):
+    python -m calculation_tool.balance_index_main build ./calculation_tool/data/export.csv balances.idx
+    python -m calculation_tool.balance_index_main at balances.idx ADA "2022-05-09 04:01" --exchange Kraken
+    python -m calculation_tool.balance_index_main at balances.idx ADA "2022-05-09 04:01"
+    python -m calculation_tool.balance_index_main range balances.idx ADA Kraken --from 2022-05-01 --to 2022-05-31
+"""
+
+import argparse
+from datetime import datetime
+
+from calculation_tool.balance_index import BalanceIndex
+from common.data_importer import DataImporter
+from common.utils.helper import parse_date
+
+
+def parse_when(text: str) -> datetime:
+    """ISO timestamps (also without seconds or time) and the CoinTracking formats."""
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return parse_date(text)
+
+
+def build(args) -> None:
+    index = BalanceIndex.from_records(DataImporter.iter_target_csv_file(args.target_file))
+    index.save(args.index_file)
+    print(f"Indexed {len(index.series)} coin/exchange pairs into {args.index_file}")
+
+
+def at(args) -> None:
+    index = BalanceIndex.load(args.index_file)
+    when = parse_when(args.when)
+    if args.exchange is None:
+        print(index.total_at(args.coin, when))
+    else:
+        print(index.balance_at(args.coin, args.exchange, when))
+
+
+def history(args) -> None:
+    index = BalanceIndex.load(args.index_file)
+    start = parse_when(args.start) if args.start else None
+    end = parse_when(args.end) if args.end else None
+    for date, balance in index.history(args.coin, args.exchange, start, end):
+        print(f"{date}\t{balance}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = commands.add_parser("build", help="index a target CSV file")
+    build_parser.add_argument("target_file")
+    build_parser.add_argument("index_file")
+    build_parser.set_defaults(run=build)
+
+    at_parser = commands.add_parser(
+        "at", help="balance at a point in time (all exchanges if none is given)"
+    )
+    at_parser.add_argument("index_file")
+    at_parser.add_argument("coin")
+    at_parser.add_argument("when")
+    at_parser.add_argument("--exchange")
+    at_parser.set_defaults(run=at)
+
+    range_parser = commands.add_parser("range", help="balance history of a coin on an exchange")
+    range_parser.add_argument("index_file")
+    range_parser.add_argument("coin")
+    range_parser.add_argument("exchange")
+    range_parser.add_argument("--from", dest="start")
+    range_parser.add_argument("--to", dest="end")
+    range_parser.set_defaults(run=history)
+
+    args = parser.parse_args(argv)
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
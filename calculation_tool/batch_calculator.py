@@ -0,0 +1,58 @@
+from typing import Iterable, Iterator
+
+from calculation_tool.calculator import Calculator
+from common.models.record_batch import RecordBatch, np
+from common.models.records import RawRecord, TargetRecord
+
+
+class BatchCalculator(Calculator):
+    """
+    Vectorized variant of `Calculator.track_balance` on top of a RecordBatch.
+
+    The balance deltas of all records are computed with masked column
+    operations and accumulated with a single `np.cumsum`.
+    Amounts that do not fit the int64 fixed-point representation fall back
+    to the Decimal implementation.
+    """
+
+    def iter_balance(self, records: Iterable[RawRecord]) -> Iterator[TargetRecord]:
+        if self.config.get_max_records_in_memory():
+            return super().iter_balance(records)
+
+        if not isinstance(records, list):
+            records = list(records)
+
+        try:
+            batch = RecordBatch.from_records(
+                records, self.config.get_fixed_point_scale()
+            )
+        except ValueError:
+            return super().iter_balance(records)
+
+        return self._iter_batch_balance(records, batch)
+
+    def _iter_batch_balance(
+        self, records: list[RawRecord], batch: RecordBatch
+    ) -> Iterator[TargetRecord]:
+        coin = self.config.get_coin()
+        coin_code = batch.currencies.code_of(coin)
+        if not records or coin_code < 0:
+            return
+
+        # lexsort: last key is the primary key, same order as sort_records_for_calculation
+        order = np.lexsort((batch.date, batch.exchange))
+
+        delta = np.where(batch.buy_currency == coin_code, batch.buy_amount, 0)
+        delta -= np.where(batch.sell_currency == coin_code, batch.sell_amount, 0)
+        if self.include_fees:
+            delta -= np.where(batch.fee_currency == coin_code, batch.fee_amount, 0)
+
+        delta = delta[order]
+        # If the coin is not involved at all, the record is skipped
+        involved = delta != 0
+        balances = np.cumsum(delta[involved])
+
+        for index, balance in zip(order[involved].tolist(), balances.tolist()):
+            yield self.to_target_record(
+                records[index], batch.to_amount(balance), coin
+            )
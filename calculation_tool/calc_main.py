@@ -1,21 +1,143 @@
+from pathlib import Path
+from typing import Optional
+
+from calculation_tool.anomaly_scanner import AnomalyScanner
 from calculation_tool.calculator import Calculator
+from calculation_tool.checkpoints import CheckpointedCalculation
+from common import metrics
 from common.config import Config
 from common.data_exporter import DataExporter
 from common.data_importer import DataImporter
+from common.metrics import Metrics
+from common.models.records import RawRecord
 
 
 class CalculationTool:
-    def __init__(self):
-        self.config = Config("./calculation_tool/data/config.json")
-        self.importer = DataImporter(self.config, check_coin=True)
-        self.calculator = Calculator(self.config)
-        self.exporter = DataExporter()
+    def __init__(
+        self, config: Optional[Config] = None, records: Optional[list[RawRecord]] = None
+    ):
+        """
+        `config` defaults to `./calculation_tool/data/config.json`.
+        `records` are already parsed, unfiltered import records (see batch_tool);
+        the import file is then not read.
+        """
+        self.config = config or Config("./calculation_tool/data/config.json")
+        self.mode = self.config.get_calculation_mode()
+        self.importer = DataImporter(
+            self.config, check_coin=self.mode == "single", records=records
+        )
+        self.calculator = self._create_calculator()
+        self.exporter = DataExporter(
+            self.importer.get_fixed_point_scale(), self.config.get_export_format()
+        )
+        self.metrics = Metrics.from_config(self.config)
+        self.checkpoints = None
+        if self.mode == "single" and self.config.get_balance_checkpoint_file():
+            # The previous export is read back as (compressed) CSV
+            if self.config.get_export_format() not in ("csv", "csv.gz", "csv.xz"):
+                raise ValueError('balance_checkpoint_file requires a CSV export_format')
+            self.checkpoints = CheckpointedCalculation(
+                self.config.get_balance_checkpoint_file(), self.calculator, self.importer
+            )
+
+    def _create_calculator(self) -> Calculator:
+        engine = self.config.get_calculation_engine()
+        if engine == "python":
+            return Calculator(self.config)
+        if engine == "batch":
+            # Imported lazily: the batch engine depends on the optional NumPy package
+            from calculation_tool.batch_calculator import BatchCalculator
+
+            return BatchCalculator(self.config)
+        raise ValueError(f"Unknown calculation engine: {engine}")
 
     def run(self):
-        records = self.importer.load_data()
-        target_records = self.calculator.track_balance(records)
+        self.importer.with_fallback(self._run, self._use_decimal_amounts)
+
+    def _use_decimal_amounts(self):
+        self.exporter = DataExporter(export_format=self.config.get_export_format())
+        self.metrics = Metrics.from_config(self.config)
+
+    def _run(self):
+        with metrics.collect(self.metrics):
+            self._run_mode()
+        if self.metrics is not None:
+            self.metrics.write(self.config.get_metrics_output())
+
+    def _run_mode(self):
+        records = metrics.counted("calculate", self.importer.iter_data())
         path = self.config.get_export_file()
-        self.exporter.save_target_data(path, target_records)
+
+        if self.mode == "single" and self.checkpoints is not None:
+            with metrics.stage("calculate"):
+                target_records = self.checkpoints.track_balance(records, path)
+            metrics.add_rows("calculate", rows_out=len(target_records))
+            with metrics.stage("write"):
+                self.exporter.save_target_data(path, target_records)
+                self.checkpoints.save(path)
+            metrics.add_rows("write", rows_in=len(target_records))
+        elif self.mode == "single":
+            # Lazy: records are calculated while they are written
+            target_records = metrics.iter_stage(
+                "calculate", self.calculator.iter_balance(records)
+            )
+            with metrics.stage("write"):
+                self.exporter.save_target_data(
+                    path, metrics.counted("write", target_records)
+                )
+        elif self.mode == "matrix":
+            self._run_matrix(records, path)
+        elif self.mode == "scan":
+            self._run_scan(records, path)
+        else:
+            raise ValueError(f"Unknown calculation mode: {self.mode}")
+
+    def _run_matrix(self, records, path: Path):
+        """
+        Tracks all coins in one pass and writes either one combined file
+        or one file per coin (`<export_file>-<COIN>.csv`).
+        """
+        output = self.config.get_matrix_output()
+
+        if output == "combined":
+            matrix_records = metrics.iter_stage(
+                "calculate", self.calculator.iter_balance_matrix(records)
+            )
+            with metrics.stage("write"):
+                self.exporter.save_matrix_data(path, metrics.counted("write", matrix_records))
+        elif output == "per_coin":
+            with metrics.stage("calculate"):
+                per_coin = self.calculator.track_balance_matrix(records)
+            metrics.add_rows("calculate", rows_out=sum(map(len, per_coin.values())))
+            for coin, coin_records in per_coin.items():
+                coin_path = path.with_name(f"{path.stem}-{coin}{path.suffix}")
+                with metrics.stage("write"):
+                    self.exporter.save_matrix_data(coin_path, metrics.counted("write", coin_records))
+        else:
+            raise ValueError(f"Unknown matrix output: {output}")
+
+    def _run_scan(self, records, path: Path):
+        """
+        Reports only the negative-balance intervals of all coins,
+        as JSON next to the export file (`<export_file>.json`).
+        """
+        scanner = AnomalyScanner(self.config, self.config.get_scan_window())
+        with metrics.stage("calculate"):
+            anomalies = scanner.scan(records)
+        metrics.add_rows("calculate", rows_out=len(anomalies))
+
+        report_path = path.with_suffix(".json")
+        with metrics.stage("write"):
+            self.exporter.save_anomaly_report(report_path, anomalies, scanner.last_date)
+        metrics.add_rows("write", rows_in=len(anomalies))
+
+        for anomaly in anomalies:
+            scope = anomaly.exchange or "all exchanges"
+            print(
+                f"{anomaly.coin} ({scope}): negative from {anomaly.start} "
+                f"for {anomaly.duration(scanner.last_date)}"
+            )
+        print(f"{len(anomalies)} negative balance intervals written to {report_path}")
 
 
 if __name__ == "__main__":
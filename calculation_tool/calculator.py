@@ -2,68 +2,167 @@
 # Purpose of the Calculator: Business logic (domain layer)
 
 from decimal import Decimal
+from typing import Iterable, Iterator
 
 from common.config import ConfigProtocol
-from common.models.records import RawRecord, TargetRecord
-from common.utils.helper import sort_records_for_calculation
+from common.models.records import MatrixRecord, RawRecord, TargetRecord
+from common.utils.helper import (
+    iter_sorted_for_calculation,
+    sort_records_for_calculation,
+)
 
 
 class Calculator:
     def __init__(self, config: ConfigProtocol):
         self.config = config
+        self.include_fees = config.get_include_fees()
 
-    def track_balance(self, records: list[RawRecord]) -> list[TargetRecord]:
+    def track_balance(self, records: Iterable[RawRecord]) -> list[TargetRecord]:
         """
         Track the balance of the configured coin over time.
+        Any iterable (e.g. the streaming output of `DataImporter.iter_data`) is accepted.
         """
+        return list(self.iter_balance(records))
 
+    def sorted_for_calculation(self, records: Iterable[RawRecord]) -> Iterable[RawRecord]:
+        """
+        Brings records into calculation order.
+        With a memory budget (`max_records_in_memory`) the input is sorted externally.
+        """
+        max_records_in_memory = self.config.get_max_records_in_memory()
+        if max_records_in_memory:
+            return iter_sorted_for_calculation(records, max_records_in_memory)
+
+        if not isinstance(records, list):
+            records = list(records)
         sort_records_for_calculation(records)
+        return records
 
-        coin = self.config.get_coin()
-        balance = Decimal("0")
-        result: list[TargetRecord] = []
+    def balance_delta(self, record: RawRecord, coin: str) -> Decimal:
+        """
+        Balance change of `coin` caused by a single record.
+        int 0 keeps the amount type: Decimal, or int in fixed-point mode.
+        """
+        delta = 0
 
-        for record in records:
-            delta = Decimal("0")
+        # Buy side
+        if record.buy_currency == coin:
+            delta += record.buy_amount
+
+        # Sell side
+        if record.sell_currency == coin:
+            delta -= record.sell_amount
+
+        # Fee side (optional)
+        if self.include_fees and record.fee_currency == coin:
+            delta -= record.fee_amount
+
+        return delta
+
+    def coin_deltas(self, record: RawRecord) -> Iterator[tuple[str, Decimal]]:
+        """
+        Non-zero balance changes of all coins touched by a single record.
+        """
+        coins = (record.buy_currency, record.sell_currency)
+        if self.include_fees:
+            coins += (record.fee_currency,)
 
-            # Buy side
-            if record.buy_currency == coin:
-                delta += record.buy_amount
+        # dict.fromkeys keeps the order and drops duplicates / empty currencies
+        for coin in dict.fromkeys(c for c in coins if c):
+            delta = self.balance_delta(record, coin)
+            if delta != 0:
+                yield coin, delta
 
-            # Sell side
-            if record.sell_currency == coin:
-                delta -= record.sell_amount
+    def iter_balance(self, records: Iterable[RawRecord]) -> Iterator[TargetRecord]:
+        """
+        Lazily yields the TargetRecords of `track_balance`.
+        With a memory budget (`max_records_in_memory`) neither input nor output
+        is held in memory as a whole.
+        """
+        coin = self.config.get_coin()
+        balance = 0
 
-            # Fee side
-            # if record.fee_currency == coin:
-            #     delta -= record.fee_amount
+        for record in self.sorted_for_calculation(records):
+            delta = self.balance_delta(record, coin)
 
             # If the coin is not involved at all, skip this record
-            if delta == Decimal("0"):
+            if delta == 0:
                 continue
 
             balance += delta
 
-            result.append(
-                TargetRecord(
-                    type=record.type,
-                    buy_amount=record.buy_amount,
-                    buy_currency=record.buy_currency,
-                    sell_amount=record.sell_amount,
-                    sell_currency=record.sell_currency,
-                    fee_amount=record.fee_amount,
-                    fee_currency=record.fee_currency,
-                    exchange=record.exchange,
-                    group=record.group,
-                    comment=record.comment,
-                    date=record.date,
-                    balance=balance,
-                    balance_currency=coin,
+            yield self.to_target_record(record, balance, coin)
+
+    def iter_balance_matrix(
+        self, records: Iterable[RawRecord]
+    ) -> Iterator[MatrixRecord]:
+        """
+        Tracks every coin in a single pass over the records.
+
+        For each (coin, exchange) pair a running balance is kept next to the
+        global balance of the coin. A record touching several coins yields one
+        MatrixRecord per coin. Per coin, the output equals `track_balance`
+        run for that coin.
+        """
+        balances: dict[str, Decimal] = {}
+        exchange_balances: dict[tuple[str, str], Decimal] = {}
+
+        for record in self.sorted_for_calculation(records):
+            for coin, delta in self.coin_deltas(record):
+                balance = balances.get(coin, 0) + delta
+                balances[coin] = balance
+
+                pair = (coin, record.exchange)
+                exchange_balance = exchange_balances.get(pair, 0) + delta
+                exchange_balances[pair] = exchange_balance
+
+                yield self.to_target_record(
+                    record,
+                    balance,
+                    coin,
+                    record_cls=MatrixRecord,
+                    exchange_balance=exchange_balance,
                 )
-            )
 
+    def track_balance_matrix(
+        self, records: Iterable[RawRecord]
+    ) -> dict[str, list[MatrixRecord]]:
+        """
+        Runs `iter_balance_matrix` and splits the result per coin.
+        """
+        result: dict[str, list[MatrixRecord]] = {}
+        for record in self.iter_balance_matrix(records):
+            result.setdefault(record.balance_currency, []).append(record)
         return result
 
+    @staticmethod
+    def to_target_record(
+        record: RawRecord,
+        balance: Decimal,
+        coin: str,
+        record_cls: type[TargetRecord] = TargetRecord,
+        **extra_fields,
+    ) -> TargetRecord:
+        """
+        Output record of `record` with the `balance` of `coin` after it.
+        """
+        return record_cls(
+            type=record.type,
+            buy_amount=record.buy_amount,
+            buy_currency=record.buy_currency,
+            sell_amount=record.sell_amount,
+            sell_currency=record.sell_currency,
+            fee_amount=record.fee_amount,
+            fee_currency=record.fee_currency,
+            exchange=record.exchange,
+            group=record.group,
+            comment=record.comment,
+            date=record.date,
+            balance=balance,
+            balance_currency=coin,
+            **extra_fields,
+        )
+
 
 # Die Methode brauche ich vermutlich nicht mehr. Das war ein erster Ansatz, der mit DataFrame gearbeitet hat.
 # def calculate_balance(self, df_in: pd.DataFrame) -> pd.DataFrame:
@@ -0,0 +1,229 @@
+import hashlib
+import json
+import os
+from dataclasses import fields, replace
+from datetime import datetime
+from decimal import Decimal
+from operator import attrgetter
+from pathlib import Path
+from typing import Iterable, Optional
+
+from calculation_tool.calculator import Calculator
+from common.data_importer import DataImporter
+from common.models.records import RawRecord, TargetRecord
+from common.utils.fixed_point import decimal_to_fixed, fixed_to_decimal
+
+# Bump when the state format or the balance rules change
+STATE_VERSION = 1
+
+_values_of = attrgetter(*[f.name for f in fields(RawRecord)])
+
+
+def _month(date: datetime) -> str:
+    return f"{date.year:04d}-{date.month:02d}"
+
+
+def _month_end(month: str) -> datetime:
+    """First instant after `month`."""
+    year, number = map(int, month.split("-"))
+    if number == 12:
+        return datetime(year + 1, 1, 1)
+    return datetime(year, number + 1, 1)
+
+
+def _file_fingerprint(path: Path) -> Optional[dict]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class CheckpointedCalculation:
+    """
+    Balance tracking that resumes from month-end checkpoints.
+
+    Records are tracked per exchange in date order (see
+    `sort_records_for_calculation`), so the balance of a record is the sum
+    of all earlier exchanges (the offset) plus the local balance on its own
+    exchange. The state file keeps, per exchange and month, a digest of the
+    records involving the coin and the local balance at the end of the month.
+
+    On the next run each exchange resumes after the last month of an
+    unchanged prefix: a changed or new month invalidates all later
+    checkpoints. Only the records after that point are sorted and tracked.
+    The rows before it are taken from the previous export, with their
+    balance shifted by the change of the exchange offset. The result is
+    identical to `Calculator.iter_balance`, as long as balances fit the 10
+    decimal places of the export.
+    """
+
+    def __init__(self, state_file: Path, calculator: Calculator, importer: DataImporter):
+        self.state_file = Path(state_file)
+        self.calculator = calculator
+        self.importer = importer
+        self._pending_state: Optional[dict] = None
+
+    def _to_amount(self, value: str):
+        scale = self.importer.get_fixed_point_scale()
+        if scale is None:
+            return Decimal(value)
+        return decimal_to_fixed(Decimal(value), scale)
+
+    def _to_decimal(self, value) -> Decimal:
+        scale = self.importer.get_fixed_point_scale()
+        if scale is None:
+            return value
+        return fixed_to_decimal(value, scale)
+
+    def _signature(self, export_file: Path) -> dict:
+        config = self.calculator.config
+        return {
+            "version": STATE_VERSION,
+            "export_file": str(Path(export_file).resolve()),
+            "coin": config.get_coin(),
+            "include_fees": self.calculator.include_fees,
+            "data_format": self.importer.data_format,
+            "ct_exchanges": sorted(self.importer.ct_exchanges or []),
+            "ct_year": str(self.importer.ct_year or ""),
+        }
+
+    def _load_state(self) -> dict:
+        try:
+            with open(self.state_file, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _previous_exchanges(self, export_file: Path) -> dict:
+        """
+        Checkpoints of the previous run per exchange, empty if a full run is needed.
+        """
+        state = self._load_state()
+        if state.get("signature") != self._signature(export_file):
+            return {}
+        if state.get("export") != _file_fingerprint(Path(export_file)):
+            return {}
+        return state.get("exchanges", {})
+
+    @staticmethod
+    def _resume_month(digests: dict[str, str], previous: dict) -> Optional[str]:
+        """
+        Last month of the unchanged prefix, or None if the first month changed.
+        """
+        months = sorted(digests.keys() | previous.keys())
+        resume = None
+        for month in months:
+            if month not in digests or previous.get(month, {}).get("digest") != digests[month]:
+                break
+            resume = month
+        return resume
+
+    def track_balance(
+        self, records: Iterable[RawRecord], export_file: Path
+    ) -> list[TargetRecord]:
+        coin = self.calculator.config.get_coin()
+        balance_delta = self.calculator.balance_delta
+
+        # Month digests per exchange, over the records that involve the coin
+        involved: list[RawRecord] = []
+        digests: dict[str, dict] = {}
+        for record in records:
+            if balance_delta(record, coin) == 0:
+                continue
+            involved.append(record)
+            months = digests.setdefault(record.exchange, {})
+            month = _month(record.date)
+            digest = months.get(month)
+            if digest is None:
+                digest = months[month] = hashlib.blake2b(digest_size=16)
+            digest.update("\x1f".join(map(str, _values_of(record))).encode())
+            digest.update(b"\x1e")
+
+        exchanges = {
+            exchange: {month: digest.hexdigest() for month, digest in months.items()}
+            for exchange, months in digests.items()
+        }
+
+        previous = self._previous_exchanges(export_file)
+        resume: dict[str, datetime] = {}
+        state: dict[str, dict] = {}
+        for exchange, months in exchanges.items():
+            previous_months = previous.get(exchange, {}).get("months", {})
+            month = self._resume_month(months, previous_months)
+            state[exchange] = {"months": {}}
+            if month is not None:
+                resume[exchange] = _month_end(month)
+                state[exchange]["months"] = {
+                    m: checkpoint for m, checkpoint in previous_months.items() if m <= month
+                }
+
+        # Rows before the resume points, from the previous export
+        head: dict[str, list[TargetRecord]] = {}
+        if resume:
+            for row in DataImporter.iter_target_csv_file(str(export_file)):
+                boundary = resume.get(row.exchange)
+                if boundary is not None and row.date < boundary:
+                    head.setdefault(row.exchange, []).append(row)
+
+        # Local balances of the tail, starting at the checkpoints
+        tail = [
+            record
+            for record in involved
+            if record.exchange not in resume or record.date >= resume[record.exchange]
+        ]
+        local: dict[str, object] = {}
+        for exchange in exchanges:
+            months = state[exchange]["months"]
+            local[exchange] = self._to_amount(months[max(months)]["balance"]) if months else 0
+
+        tracked: dict[str, list[tuple[RawRecord, object]]] = {}
+        for record in self.calculator.sorted_for_calculation(tail):
+            exchange = record.exchange
+            balance = local[exchange] + balance_delta(record, coin)
+            local[exchange] = balance
+            tracked.setdefault(exchange, []).append((record, balance))
+            state[exchange]["months"][_month(record.date)] = {
+                "digest": exchanges[exchange][_month(record.date)],
+                "balance": str(self._to_decimal(balance)),
+            }
+
+        result: list[TargetRecord] = []
+        offset = 0
+        for exchange in sorted(exchanges):
+            if exchange in head:
+                old_offset = self._to_amount(previous[exchange]["offset"])
+                shift = self._to_decimal(offset - old_offset)
+                result.extend(
+                    replace(row, balance=row.balance + shift) for row in head[exchange]
+                )
+            result.extend(
+                self.calculator.to_target_record(record, offset + balance, coin)
+                for record, balance in tracked.get(exchange, [])
+            )
+            state[exchange]["offset"] = str(self._to_decimal(offset))
+            offset += local[exchange]
+
+        print(
+            f"Checkpointed calculation: {len(tail)} of {len(involved)} records tracked."
+        )
+        self._pending_state = state
+        return result
+
+    def save(self, export_file: Path) -> None:
+        """
+        Persists the checkpoints of the last `track_balance` call, after the export was written.
+        """
+        if self._pending_state is None:
+            return
+
+        state = {
+            "signature": self._signature(export_file),
+            "export": _file_fingerprint(Path(export_file)),
+            "exchanges": self._pending_state,
+        }
+        tmp_path = self.state_file.with_name(f"{self.state_file.name}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_file)
+        self._pending_state = None
@@ -0,0 +1,40 @@
+"""
+Serves balance queries over the calculation tool's import as a local JSON HTTP service.
+
+Examples (from the project root):
+    python -m calculation_tool.query_main --port 8765
+    curl "http://127.0.0.1:8765/balance?coin=ADA&exchange=Kraken&at=2022-05-09%2004:01"
+    curl "http://127.0.0.1:8765/history?coin=ADA&exchange=Kraken&from=2022-05-01&to=2022-05-31"
+    curl "http://127.0.0.1:8765/flows?coin=ADA&from=2022-05-01&to=2022-05-31"
+    curl "http://127.0.0.1:8765/anomalies?coin=ADA"
+"""
+
+import argparse
+
+from calculation_tool.query_service import QueryService, create_server
+from common.config import Config
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--config", default="./calculation_tool/data/config.json")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    service = QueryService(Config(args.config))
+    # Loaded up front, so the first query is answered from the warm state
+    service.query("/coins", {})
+
+    server = create_server(service, args.host, args.port)
+    print(f"Serving balance queries on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
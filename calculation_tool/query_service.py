@@ -0,0 +1,266 @@
+import json
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlparse
+
+from calculation_tool.anomaly_scanner import AnomalyScanner
+from calculation_tool.balance_index import BalanceIndex
+from calculation_tool.balance_index_main import parse_when
+from calculation_tool.calculator import Calculator
+from common.data_exporter import DataExporter
+from common.data_importer import DataImporter
+from common.models.records import RawRecord
+from common.utils.fixed_point import fixed_to_decimal
+
+# (coin, exchange) -> day -> [inflow, outflow]
+DailyFlows = dict[tuple[str, str], dict[date, list[Decimal]]]
+
+
+class ImportUnavailable(Exception):
+    """Raised when the import file cannot be read or parsed."""
+
+
+def _stamp(path: Path) -> Optional[tuple[int, int]]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class BalanceState:
+    """
+    In-memory state of one import: the running balances of every coin per
+    exchange (`BalanceIndex`, built from the matrix calculation), the daily
+    in- and outflows per coin and exchange, and the negative-balance intervals.
+    """
+
+    def __init__(self, config, records: list[RawRecord], fixed_point_scale: Optional[int]):
+        calculator = Calculator(config)
+        self.index = BalanceIndex.from_records(
+            calculator.iter_balance_matrix(list(records)), fixed_point_scale
+        )
+        self.flows = self._daily_flows(calculator, records, fixed_point_scale)
+
+        # Amounts are answered as in the exports, independent of the amount mode
+        self.exporter = DataExporter(fixed_point_scale)
+
+        scanner = AnomalyScanner(config, config.get_scan_window())
+        anomalies = scanner.scan(list(records))
+        self.anomalies = self.exporter.anomaly_report(anomalies, scanner.last_date)
+
+    @staticmethod
+    def _daily_flows(
+        calculator: Calculator, records: list[RawRecord], fixed_point_scale: Optional[int]
+    ) -> DailyFlows:
+        flows: DailyFlows = {}
+        for record in records:
+            for coin, delta in calculator.coin_deltas(record):
+                if fixed_point_scale is not None:
+                    delta = fixed_to_decimal(delta, fixed_point_scale)
+
+                days = flows.setdefault((coin, record.exchange), {})
+                day = days.setdefault(record.date.date(), [Decimal(0), Decimal(0)])
+                if delta > 0:
+                    day[0] += delta
+                else:
+                    day[1] -= delta
+        return flows
+
+
+class QueryService:
+    """
+    Answers balance queries from the in-memory `BalanceState` of the import file.
+
+    Answers are cached (LRU, `query_cache_size` entries). The import file is
+    checked (mtime and size) on every query; when it changed, the state is
+    rebuilt and the cache is cleared.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.import_file = Path(config.get_import_file())
+        self.cache_size = config.get_query_cache_size()
+        self.cache: OrderedDict[tuple, Any] = OrderedDict()
+        self.state: Optional[BalanceState] = None
+        self._stamp: Optional[tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    def load(self) -> BalanceState:
+        """Parses the import (filtered by the config) and builds the state."""
+        importer = DataImporter(self.config)
+        records = importer.load_with_fallback()
+        return BalanceState(self.config, records, importer.get_fixed_point_scale())
+
+    def _current_state(self) -> BalanceState:
+        stamp = _stamp(self.import_file)
+        with self._lock:
+            if self.state is None or stamp != self._stamp:
+                try:
+                    self.state = self.load()
+                except Exception as error:
+                    # Not the caller's fault: kept apart from the ValueErrors of the parameters
+                    raise ImportUnavailable(
+                        f"Cannot load {self.import_file.name}: {type(error).__name__}: {error}"
+                    ) from error
+                self._stamp = stamp
+                self.cache.clear()
+            return self.state
+
+    def query(self, endpoint: str, params: dict[str, str]) -> Any:
+        """
+        Answer of an endpoint (see `ENDPOINTS`) as JSON-ready data.
+        Raises ValueError for invalid parameters and ImportUnavailable if the
+        import cannot be loaded.
+        """
+        handler = self.ENDPOINTS[endpoint]
+        state = self._current_state()
+
+        key = (endpoint, tuple(sorted(params.items())))
+        with self._lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                return self.cache[key]
+
+        answer = handler(state, params)
+
+        with self._lock:
+            # Only cache answers of the current state
+            if state is self.state and self.cache_size > 0:
+                self.cache[key] = answer
+                if len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+        return answer
+
+    @staticmethod
+    def _coins(state: BalanceState, params: dict[str, str]) -> dict[str, list[str]]:
+        return {coin: state.index.exchanges(coin) for coin in state.index.coins()}
+
+    @staticmethod
+    def _balance(state: BalanceState, params: dict[str, str]) -> dict:
+        coin = _required(params, "coin")
+        when = parse_when(_required(params, "at"))
+        exchange = params.get("exchange")
+        if exchange:
+            balance = state.index.balance_at(coin, exchange, when)
+        else:
+            balance = state.index.total_at(coin, when)
+        return {
+            "coin": coin,
+            "exchange": exchange,
+            "at": str(when),
+            "balance": state.exporter.format_value(balance),
+        }
+
+    @staticmethod
+    def _history(state: BalanceState, params: dict[str, str]) -> list[dict]:
+        coin = _required(params, "coin")
+        exchange = _required(params, "exchange")
+        start, end = _period(params)
+        return [
+            {"date": str(when), "balance": state.exporter.format_value(balance)}
+            for when, balance in state.index.history(coin, exchange, start, end)
+        ]
+
+    @staticmethod
+    def _flows(state: BalanceState, params: dict[str, str]) -> list[dict]:
+        """Daily in- and outflows of a coin, on one exchange or summed over all."""
+        coin = _required(params, "coin")
+        exchange = params.get("exchange")
+        start, end = _period(params)
+
+        days: dict[date, list[Decimal]] = {}
+        for (flow_coin, flow_exchange), flows in state.flows.items():
+            if flow_coin != coin or (exchange and flow_exchange != exchange):
+                continue
+            for day, (inflow, outflow) in flows.items():
+                total = days.setdefault(day, [Decimal(0), Decimal(0)])
+                total[0] += inflow
+                total[1] += outflow
+
+        format_value = state.exporter.format_value
+        return [
+            {
+                "date": day.isoformat(),
+                "in": format_value(inflow),
+                "out": format_value(outflow),
+                "net": format_value(inflow - outflow),
+            }
+            for day, (inflow, outflow) in sorted(days.items())
+            if (start is None or day >= start.date()) and (end is None or day <= end.date())
+        ]
+
+    @staticmethod
+    def _anomalies(state: BalanceState, params: dict[str, str]) -> list[dict]:
+        """Negative-balance intervals; `exchange=all` selects the intervals over all exchanges."""
+        coin = params.get("coin")
+        exchange = params.get("exchange")
+        return [
+            anomaly
+            for anomaly in state.anomalies
+            if (not coin or anomaly["coin"] == coin)
+            and (
+                not exchange
+                or anomaly["exchange"] == (None if exchange == "all" else exchange)
+            )
+        ]
+
+    ENDPOINTS = {
+        "/coins": _coins,
+        "/balance": _balance,
+        "/history": _history,
+        "/flows": _flows,
+        "/anomalies": _anomalies,
+    }
+
+
+def _required(params: dict[str, str], name: str) -> str:
+    value = params.get(name)
+    if not value:
+        raise ValueError(f"Missing parameter: {name}")
+    return value
+
+
+def _period(params: dict[str, str]) -> tuple[Optional[datetime], Optional[datetime]]:
+    start = params.get("from")
+    end = params.get("to")
+    return (parse_when(start) if start else None, parse_when(end) if end else None)
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    service: QueryService
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        if url.path not in self.service.ENDPOINTS:
+            self._send(404, {"error": f"Unknown query: {url.path}"})
+            return
+        try:
+            self._send(200, self.service.query(url.path, params))
+        except ImportUnavailable as error:
+            # e.g. the import file is missing or incomplete while a new export is copied
+            self._send(503, {"error": str(error)})
+        except ValueError as error:
+            self._send(400, {"error": str(error)})
+        except Exception as error:
+            self._send(500, {"error": f"{type(error).__name__}: {error}"})
+
+    def _send(self, status: int, data: Any) -> None:
+        body = json.dumps(data, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def create_server(service: QueryService, host: str = "127.0.0.1", port: int = 8765):
+    """A threading HTTP server answering the queries of `service` (port 0: any free port)."""
+    handler = type("BoundQueryHandler", (QueryHandler,), {"service": service})
+    return ThreadingHTTPServer((host, port), handler)
@@ -0,0 +1,79 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from calculation_tool.anomaly_scanner import AnomalyScanner
+from calculation_tool.calculator import Calculator
+from common.data_exporter import DataExporter
+from common.models.records import RawRecord
+from common.test_utils.random_records import make_random_records
+from tests.mocks.mock_config import MockConfig
+
+
+def trade(day: int, buy: str, buy_currency: str, sell: str, sell_currency: str, exchange: str):
+    return RawRecord(
+        type="Trade",
+        buy_amount=Decimal(buy),
+        buy_currency=buy_currency,
+        sell_amount=Decimal(sell),
+        sell_currency=sell_currency,
+        fee_amount=Decimal("0"),
+        fee_currency="",
+        exchange=exchange,
+        group="",
+        comment="",
+        date=datetime(2022, 5, day, 12, 0, 0),
+        lpn="",
+        tx_id=f"Tx-{day}-{exchange}",
+    )
+
+
+def test_scan_reports_negative_intervals(tmp_path):
+    records = [
+        trade(1, "2", "ADA", "1", "EUR", "Kraken"),
+        trade(2, "1", "EUR", "3", "ADA", "Kraken"),  # Kraken -1, total -1
+        trade(3, "5", "ADA", "1", "EUR", "Binance"),  # total 4
+        trade(4, "1", "EUR", "1", "ADA", "Kraken"),  # Kraken -2, total 3
+        trade(6, "4", "ADA", "1", "EUR", "Kraken"),  # Kraken 2
+    ]
+    scanner = AnomalyScanner(MockConfig(), window=1)
+    anomalies = scanner.scan(list(reversed(records)))
+
+    by_scope = {(a.coin, a.exchange): a for a in anomalies}
+    assert {key for key in by_scope if key[0] == "ADA"} == {("ADA", "Kraken"), ("ADA", None)}
+
+    kraken = by_scope[("ADA", "Kraken")]
+    assert kraken.start == datetime(2022, 5, 2, 12)
+    assert kraken.end == datetime(2022, 5, 6, 12)
+    assert kraken.minimum == Decimal("-2")
+    assert kraken.minimum_date == datetime(2022, 5, 4, 12)
+    assert [r.tx_id for r, _ in kraken.before] == ["Tx-1-Kraken"]
+    assert [r.tx_id for r, _ in kraken.after] == ["Tx-4-Kraken"]
+
+    total = by_scope[("ADA", None)]
+    assert total.end == datetime(2022, 5, 3, 12)
+    assert by_scope[("EUR", "Binance")].end is None
+
+    path = tmp_path / "report.json"
+    DataExporter().save_anomaly_report(path, anomalies, scanner.last_date)
+    report = {(entry["coin"], entry["exchange"]): entry for entry in json.loads(path.read_text())}
+    assert report[("ADA", "Kraken")]["minimum"] == "-2"
+    assert report[("EUR", "Binance")]["end"] is None
+    assert report[("EUR", "Binance")]["duration"] == "3 days, 0:00:00"
+
+
+def test_scan_matches_matrix_exchange_balances():
+    records = make_random_records(1500, 10)
+    anomalies = AnomalyScanner(MockConfig(include_fees=True)).scan(list(records))
+
+    # Negative crossings per (coin, exchange) from the matrix mode
+    expected = set()
+    previous: dict = {}
+    for record in Calculator(MockConfig(include_fees=True)).iter_balance_matrix(list(records)):
+        key = (record.balance_currency, record.exchange)
+        if record.exchange_balance < 0 <= previous.get(key, 0):
+            expected.add((*key, record.date))
+        previous[key] = record.exchange_balance
+
+    found = {(a.coin, a.exchange, a.start) for a in anomalies if a.exchange is not None}
+    assert found == expected
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from calculation_tool.balance_index import BalanceIndex
+from calculation_tool.balance_index_main import main
+from calculation_tool.calculator import Calculator
+from common.test_utils.random_records import make_random_records
+from tests.mocks.mock_config import MockConfig
+
+
+def brute_force_balance(records, coin, exchange, when):
+    balance = Decimal(0)
+    for record in records:
+        if record.exchange != exchange or record.date > when:
+            continue
+        if record.buy_currency == coin:
+            balance += record.buy_amount
+        if record.sell_currency == coin:
+            balance -= record.sell_amount
+    return balance
+
+
+def test_balance_index_answers_point_in_time_queries(tmp_path):
+    records = make_random_records(1500, 9)
+    target_records = Calculator(MockConfig(coin="BTC")).track_balance(list(records))
+    matrix_records = Calculator(MockConfig()).iter_balance_matrix(list(records))
+
+    path = tmp_path / "balances.idx"
+    BalanceIndex.from_records(target_records).save(path)
+    index = BalanceIndex.load(path)
+    matrix_index = BalanceIndex.from_records(matrix_records)
+
+    start = datetime(2021, 12, 29)
+    for step in range(0, 6 * 24, 5):
+        when = start + timedelta(hours=step)
+        for exchange in ("Kraken", "Binance"):
+            expected = brute_force_balance(records, "BTC", exchange, when)
+            assert index.balance_at("BTC", exchange, when) == expected
+            assert matrix_index.balance_at("BTC", exchange, when) == expected
+
+        assert index.total_at("BTC", when) == sum(
+            brute_force_balance(records, "BTC", exchange, when)
+            for exchange in ("Kraken", "Binance")
+        )
+
+    # Pairs are parsed on their first query; saving keeps the other ones intact
+    loaded = BalanceIndex.load(path)
+    assert loaded.balance_at("BTC", "Kraken", when) == index.balance_at("BTC", "Kraken", when)
+    assert loaded._unparsed == {("BTC", "Binance")}
+    loaded.save(tmp_path / "copy.idx")
+    assert BalanceIndex.load(tmp_path / "copy.idx").history("BTC", "Binance") == index.history(
+        "BTC", "Binance"
+    )
+
+    day = datetime(2021, 12, 31)
+    history = index.history("BTC", "Kraken", day, day + timedelta(days=1))
+    assert history
+    assert all(day <= date <= day + timedelta(days=1) for date, _ in history)
+    assert history[-1][1] == index.balance_at("BTC", "Kraken", day + timedelta(days=1))
+
+
+def test_at_command_takes_the_exchange_as_option(tmp_path, capsys):
+    records = make_random_records(500, 10)
+    path = tmp_path / "balances.idx"
+    index = BalanceIndex.from_records(Calculator(MockConfig(coin="BTC")).track_balance(records))
+    index.save(path)
+    when = datetime(2022, 1, 1, 12)
+
+    main(["at", str(path), "BTC", "2022-01-01 12:00", "--exchange", "Kraken"])
+    main(["at", str(path), "BTC", "2022-01-01 12:00"])
+
+    assert capsys.readouterr().out.split() == [
+        str(index.balance_at("BTC", "Kraken", when)),
+        str(index.total_at("BTC", when)),
+    ]
@@ -20,6 +20,8 @@ import pytest
 
 from calculation_tool.calculator import Calculator
 from common.data_importer import DataImporter
+from common.test_utils.random_records import make_random_records
+from common.test_utils.record_assertions import assert_records_equal
 from common.test_utils.run_tool_test import run_csv_based_tool_test
 from common.utils.helper import sort_target_records
 from tests.mocks.mock_config import MockConfig
@@ -29,14 +31,14 @@ from tests.mocks.mock_config import MockConfig
     "input_file, expected_file, config_params",
     [
         (
-            "./calculation_tool/data/test-ADA-1.csv",
-            "./calculation_tool/data/test-ADA-1-exp.csv",
+            "./calculation_tool/examples/test-ADA-1.csv",
+            "./calculation_tool/examples/test-ADA-1-exp.csv",
             {"coin": "ADA"},
         ),
         # Example for another test case with different settings:
         # (
-        #     "./calculation_tool/data/test-BTC-1.csv",
-        #     "./calculation_tool/data/test-BTC-1-exp.csv",
+        #     "./calculation_tool/examples/test-BTC-1.csv",
+        #     "./calculation_tool/examples/test-BTC-1-exp.csv",
         #     {"coin": "BTC", "decimal_separator": ","}
         # ),
     ],
@@ -63,3 +65,59 @@ def test_calculator_csv(input_file, expected_file, config_params):
         load_expected=DataImporter.parse_target_csv_file,
         sort_result=sort_target_records,
     )
+
+
+def test_memory_budget_matches_in_memory_calculation():
+    records = make_random_records(2000, 5)
+
+    expected = Calculator(MockConfig(coin="BTC")).track_balance(list(records))
+    result = Calculator(
+        MockConfig(coin="BTC", max_records_in_memory=128)
+    ).track_balance(iter(records))
+
+    assert len(result) == len(expected)
+    for i, (res, exp) in enumerate(zip(result, expected)):
+        assert_records_equal(res, exp, i)
+
+
+@pytest.mark.parametrize("include_fees", [False, True])
+def test_balance_matrix_matches_single_coin_runs(include_fees):
+    records = make_random_records(1500, 6)
+    config = MockConfig(include_fees=include_fees)
+
+    per_coin = Calculator(config).track_balance_matrix(iter(records))
+
+    assert set(per_coin) == {"BTC", "EUR", "ADA", "USDT", "KFEE"}
+    for coin, matrix_records in per_coin.items():
+        coin_records = [
+            r
+            for r in records
+            if coin in (r.buy_currency, r.sell_currency, r.fee_currency)
+        ]
+        expected = Calculator(
+            MockConfig(coin=coin, include_fees=include_fees)
+        ).track_balance(coin_records)
+
+        assert len(matrix_records) == len(expected)
+        for i, (res, exp) in enumerate(zip(matrix_records, expected)):
+            assert_records_equal(exp, res, i)
+
+        # The exchange balances add up to the global balance per coin
+        last_per_exchange = {r.exchange: r.exchange_balance for r in matrix_records}
+        assert sum(last_per_exchange.values()) == matrix_records[-1].balance
+
+
+@pytest.mark.parametrize("include_fees", [False, True])
+def test_batch_calculator_matches_calculator(include_fees):
+    pytest.importorskip("numpy")
+    from calculation_tool.batch_calculator import BatchCalculator
+
+    records = make_random_records(2000, 7)
+    config = MockConfig(coin="EUR", include_fees=include_fees)
+
+    expected = Calculator(config).track_balance(list(records))
+    result = BatchCalculator(config).track_balance(iter(records))
+
+    assert len(result) == len(expected)
+    for i, (res, exp) in enumerate(zip(result, expected)):
+        assert_records_equal(res, exp, i)
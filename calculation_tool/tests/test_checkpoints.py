@@ -0,0 +1,70 @@
+from dataclasses import replace
+from datetime import timedelta
+
+from calculation_tool.calculator import Calculator
+from calculation_tool.checkpoints import CheckpointedCalculation
+from common.data_exporter import DataExporter
+from common.data_importer import DataImporter
+from common.test_utils.random_records import make_random_records
+from tests.mocks.mock_config import MockConfig
+
+
+class CountingCalculator(Calculator):
+    def __init__(self, config):
+        super().__init__(config)
+        self.tracked = []
+
+    def sorted_for_calculation(self, records):
+        self.tracked = list(super().sorted_for_calculation(records))
+        return self.tracked
+
+
+def run_checkpointed(records, export_file, state_file):
+    config = MockConfig(coin="BTC", include_fees=True)
+    calculator = CountingCalculator(config)
+    checkpoints = CheckpointedCalculation(state_file, calculator, DataImporter(config))
+    result = checkpoints.track_balance(iter(records), export_file)
+    DataExporter().save_target_data(export_file, result)
+    checkpoints.save(export_file)
+    return calculator.tracked
+
+
+def assert_matches_full_run(records, export_file, tmp_path):
+    full_file = tmp_path / "full.csv"
+    config = MockConfig(coin="BTC", include_fees=True)
+    # track_balance sorts a list argument in place, so pass a copy
+    expected = Calculator(config).track_balance(list(records))
+    DataExporter().save_target_data(full_file, expected)
+    assert export_file.read_text() == full_file.read_text()
+
+
+def test_checkpointed_runs_match_full_runs(tmp_path):
+    export_file = tmp_path / "export.csv"
+    state_file = tmp_path / "state.json"
+    records = make_random_records(2000, 8)
+
+    run_checkpointed(records, export_file, state_file)
+    assert_matches_full_run(records, export_file, tmp_path)
+
+    # Changes in January: all exchanges resume after December
+    january = next(
+        i for i, r in enumerate(records) if r.date.month == 1 and r.buy_currency == "BTC"
+    )
+    records[january] = replace(records[january], buy_amount=records[january].buy_amount + 1)
+    new = replace(records[january], date=records[january].date + timedelta(days=1), tx_id="Tx-new")
+    records.append(new)
+
+    tracked = run_checkpointed(records, export_file, state_file)
+    assert tracked and all(r.date.month == 1 for r in tracked)
+    assert_matches_full_run(records, export_file, tmp_path)
+
+    # A change before the checkpoint: that exchange is tracked from its first month
+    december = next(
+        i for i, r in enumerate(records) if r.date.month == 12 and r.sell_currency == "BTC"
+    )
+    records[december] = replace(records[december], sell_amount=records[december].sell_amount * 2)
+
+    tracked = run_checkpointed(records, export_file, state_file)
+    assert {r.exchange for r in tracked} == {records[december].exchange}
+    assert any(r.date.month == 12 for r in tracked)
+    assert_matches_full_run(records, export_file, tmp_path)
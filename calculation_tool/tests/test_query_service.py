@@ -0,0 +1,133 @@
+import json
+import os
+import threading
+from dataclasses import replace
+from datetime import datetime
+from decimal import Decimal
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from calculation_tool.balance_index import BalanceIndex
+from calculation_tool.calculator import Calculator
+from calculation_tool.query_service import QueryService, create_server
+from common.data_exporter import DataExporter
+from common.test_utils.random_records import make_random_records
+from tests.mocks.mock_config import MockConfig
+
+END = datetime(2030, 1, 1)
+
+
+@pytest.fixture
+def import_file(tmp_path):
+    path = tmp_path / "import.csv"
+    DataExporter().save_raw_data(path, make_random_records(1000, 41))
+    return path
+
+
+@pytest.fixture
+def server(import_file):
+    server = create_server(QueryService(MockConfig(import_file=str(import_file))), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _get(server, query: str):
+    with urlopen(f"http://127.0.0.1:{server.server_port}{query}") as response:
+        return json.load(response)
+
+
+def test_answers_match_balance_index(server, import_file):
+    records = make_random_records(1000, 41)
+    index = BalanceIndex.from_records(Calculator(MockConfig()).iter_balance_matrix(records))
+
+    coins = _get(server, "/coins")
+    assert coins == {coin: index.exchanges(coin) for coin in index.coins()}
+
+    coin = index.coins()[0]
+    exchange = index.exchanges(coin)[0]
+    when = "2022-01-01 12:00"
+    answer = _get(server, f"/balance?coin={coin}&exchange={exchange}&at={when.replace(' ', '%20')}")
+    assert Decimal(answer["balance"]) == index.balance_at(coin, exchange, datetime(2022, 1, 1, 12))
+
+    history = _get(server, f"/history?coin={coin}&exchange={exchange}&from=2022-01-01")
+    assert [Decimal(entry["balance"]) for entry in history] == [
+        balance for _, balance in index.history(coin, exchange, datetime(2022, 1, 1))
+    ]
+
+    flows = _get(server, f"/flows?coin={coin}")
+    assert sum(Decimal(day["net"]) for day in flows) == index.total_at(coin, END)
+
+    with pytest.raises(HTTPError) as error:
+        _get(server, "/balance?coin=BTC")
+    assert error.value.code == 400
+    with pytest.raises(HTTPError) as error:
+        _get(server, "/unknown")
+    assert error.value.code == 404
+
+
+def test_answers_are_the_same_in_both_amount_modes(import_file):
+    queries = [
+        ("/balance", {"coin": "BTC", "at": "2022-01-01 12:00"}),
+        ("/balance", {"coin": "BTC", "exchange": "Kraken", "at": "2030-01-01"}),
+        ("/history", {"coin": "ADA", "exchange": "Binance"}),
+        ("/flows", {"coin": "BTC"}),
+        ("/anomalies", {}),
+    ]
+    decimal = QueryService(MockConfig(import_file=str(import_file)))
+    fixed = QueryService(MockConfig(import_file=str(import_file), amount_mode="fixed"))
+
+    for query in queries:
+        assert fixed.query(*query) == decimal.query(*query)
+
+
+def test_cache_is_invalidated_when_the_import_changes(server, import_file):
+    service = server.RequestHandlerClass.service
+    query = "/balance?coin=BTC&exchange=Kraken&at=2030-01-01"
+
+    before = _get(server, query)
+    assert _get(server, query) == before
+    assert len(service.cache) == 1
+
+    records = [
+        replace(r, buy_amount=r.buy_amount * 2) for r in make_random_records(1000, 41)
+    ]
+    DataExporter().save_raw_data(import_file, records)
+    mtime = import_file.stat().st_mtime + 10
+    os.utime(import_file, (mtime, mtime))
+
+    after = _get(server, query)
+    assert after != before
+    assert len(service.cache) == 1
+
+
+@pytest.mark.parametrize(
+    "row",
+    [
+        # beyond the fixed-point scale, without Decimal fallback
+        '"Deposit","0.123456789012345","ADA","","","","","Kraken","","","2022-01-04 08:00:00","",""\n',
+        '"Trade","1"\n',  # truncated
+    ],
+)
+def test_import_errors_are_answered_with_503(tmp_path, row):
+    import_file = tmp_path / "import.csv"
+    DataExporter().save_raw_data(import_file, make_random_records(100, 42))
+    with open(import_file, "a", encoding="utf-8") as f:
+        f.write(row)
+    config = MockConfig(
+        import_file=str(import_file), amount_mode="fixed", fixed_point_fallback="error"
+    )
+    server = create_server(QueryService(config), port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with pytest.raises(HTTPError) as error:
+            _get(server, "/balance?coin=BTC&at=2030-01-01")
+        assert error.value.code == 503
+        assert "Cannot load import.csv" in json.load(error.value)["error"]
+    finally:
+        server.shutdown()
+        server.server_close()
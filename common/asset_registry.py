@@ -0,0 +1,79 @@
+from typing import Optional
+
+# Built-in asset classes; the `asset_classes` setting extends or replaces them
+DEFAULT_ASSET_CLASSES: dict[str, tuple[str, ...]] = {
+    "crypto": (
+        "BTC", "ETH", "ADA", "SOL2", "LUNA2", "LUNA3", "DFI", "BNB", "XRP", "KFEE",
+    ),
+    "stablecoin": ("USDC", "USDT", "BUSD"),
+    "fiat": ("EUR", "USD"),
+}
+
+# Trade classification (see `AssetRegistry.classify_trade`)
+COIN_BUY = "buy"
+COIN_SELL = "sell"
+
+# Classes a coin is bought with or sold for
+_COUNTER_CLASSES = frozenset({"fiat", "stablecoin"})
+
+
+class AssetRegistry:
+    """
+    Maps currencies to asset classes ("crypto", "stablecoin", "fiat" or
+    user-defined classes) and classifies trades by their currency pair.
+
+    A currency that is not listed belongs to `default_class` ("" = unclassified).
+    The classification of every (buy, sell) pair is computed once and memoized,
+    so classifying a trade is a single dict lookup.
+    """
+
+    def __init__(
+        self,
+        asset_classes: Optional[dict[str, list[str]]] = None,
+        default_class: str = "",
+    ):
+        asset_classes = asset_classes or {}
+        # Configured classes replace the built-in class of the same name and
+        # are added last, so a currency they list is never claimed by another built-in class
+        classes = [
+            (name, currencies)
+            for name, currencies in DEFAULT_ASSET_CLASSES.items()
+            if name not in asset_classes
+        ]
+        classes += asset_classes.items()
+
+        self.default_class = default_class
+        self.classes: dict[str, str] = {}
+        for name, currencies in classes:
+            for currency in currencies:
+                self.classes[currency] = name
+        self._trades: dict[tuple[str, str], Optional[str]] = {}
+
+    @classmethod
+    def from_config(cls, config) -> "AssetRegistry":
+        return cls(config.get_asset_classes(), config.get_default_asset_class())
+
+    def asset_class(self, currency: str) -> str:
+        return self.classes.get(currency, self.default_class)
+
+    def classify_trade(self, buy_currency: str, sell_currency: str) -> Optional[str]:
+        """
+        COIN_BUY if crypto is bought with fiat or a stablecoin,
+        COIN_SELL if crypto is sold for fiat or a stablecoin, otherwise None.
+        """
+        pair = (buy_currency, sell_currency)
+        try:
+            return self._trades[pair]
+        except KeyError:
+            pass
+
+        buy_class = self.asset_class(buy_currency)
+        sell_class = self.asset_class(sell_currency)
+        kind = None
+        if buy_class == "crypto" and sell_class in _COUNTER_CLASSES:
+            kind = COIN_BUY
+        elif sell_class == "crypto" and buy_class in _COUNTER_CLASSES:
+            kind = COIN_SELL
+
+        self._trades[pair] = kind
+        return kind
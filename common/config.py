@@ -1,4 +1,5 @@
 import json
+import os
 import sys
 from pathlib import Path
 from typing import Any, Protocol
@@ -9,6 +10,9 @@ class ConfigProtocol(Protocol):
     def get_decimal_separator(self) -> str: ...
     def get_date_format(self) -> str: ...
     def get_ct_exchanges(self) -> list[str]: ...
+    def get_max_records_in_memory(self) -> int: ...
+    def get_include_fees(self) -> bool: ...
+    def get_fixed_point_scale(self) -> int: ...
 
 
 class Config:
@@ -16,6 +20,15 @@ class Config:
         self.config_data: dict[str, Any]
         self.config_data = self._load_config(config_file)
 
+    @classmethod
+    def from_dict(cls, config_data: dict[str, Any]) -> "Config":
+        """
+        Creates a Config from already loaded settings instead of a file.
+        """
+        config = cls.__new__(cls)
+        config.config_data = dict(config_data)
+        return config
+
     def _load_config(self, config_file):
         try:
             with open(config_file, "r") as file:
@@ -33,6 +46,52 @@ class Config:
     def get_data_format(self) -> str:
         return self.config_data.get("data_format", "")
 
+    def get_aggregation_engine(self) -> str:
+        """
+        Aggregation engine: "hash" (single pass, default), "sorted",
+        "batch" (vectorized, requires NumPy) or "parallel" (process pool).
+        """
+        return self.config_data.get("aggregation_engine", "hash")
+
+    def get_aggregation_window(self) -> str:
+        """
+        Default aggregation window: "hour", "day" (default), "week" or "month".
+        """
+        return self.config_data.get("aggregation_window", "day")
+
+    def get_aggregation_windows(self) -> dict[str, str]:
+        """
+        Aggregation window per transaction type, e.g. {"Margin Fee": "month"}.
+        """
+        value = self.config_data.get("aggregation_windows")
+        return value if isinstance(value, dict) else {}
+
+    def get_aggregation_exchange_windows(self) -> dict[str, dict[str, str]]:
+        """
+        Aggregation window per exchange and transaction type,
+        e.g. {"Kraken": {"Margin Fee": "week"}}. Overrides `aggregation_windows`.
+        """
+        value = self.config_data.get("aggregation_exchange_windows")
+        return value if isinstance(value, dict) else {}
+
+    def get_max_rows(self) -> int:
+        """
+        Row budget of the aggregated export. With a value > 0 the aggregation
+        windows are coarsened per (exchange, type) until the output fits.
+        0 (default) uses the configured windows as they are.
+        """
+        return int(self.config_data.get("max_rows") or 0)
+
+    def get_aggregation_workers(self) -> int:
+        """
+        Number of processes used by the "parallel" aggregation engine.
+        0 (default) uses all CPU cores.
+        """
+        workers = int(self.config_data.get("aggregation_workers", 0))
+        if workers == 0:
+            return os.cpu_count() or 1
+        return workers
+
     def get_ct_exchanges(self) -> list[str]:
         value = self.config_data.get("ct_exchanges")
 
@@ -47,6 +106,63 @@ class Config:
     def get_ct_year(self):
         return self.config_data.get("ct_year")
 
+    def get_max_records_in_memory(self) -> int:
+        """
+        Memory budget for sorting, in records.
+        0 (default) sorts in memory, otherwise chunks are spilled to temporary files.
+        """
+        return int(self.config_data.get("max_records_in_memory") or 0)
+
+    def get_incremental_state_file(self) -> str:
+        """
+        State file of the incremental aggregation. Empty (default) aggregates
+        the whole import file on every run.
+        """
+        return self.config_data.get("incremental_state_file", "")
+
+    def get_background_decompression(self) -> bool:
+        """
+        Decompress compressed import files (.gz, .bz2, .xz) in a background
+        thread, overlapping with parsing.
+        """
+        return bool(self.config_data.get("background_decompression", False))
+
+    def get_parse_cache_dir(self) -> str:
+        """
+        Directory of the persistent parse cache. Empty (default) disables the cache.
+        """
+        return self.config_data.get("parse_cache_dir", "")
+
+    def get_parse_cache_max_mb(self) -> int:
+        """
+        Size limit of the parse cache directory in MB (default: 1024).
+        """
+        return int(self.config_data.get("parse_cache_max_mb", 1024))
+
+    def get_parse_workers(self) -> int:
+        """
+        Number of processes used to parse the import file.
+        1 (default) parses serially, 0 uses all CPU cores.
+        """
+        workers = int(self.config_data.get("parse_workers", 1))
+        if workers == 0:
+            return os.cpu_count() or 1
+        return workers
+
+    def get_asset_classes(self) -> dict[str, list[str]]:
+        """
+        Asset classes by name, e.g. {"crypto": ["BTC", "DOGE"], "meme": ["PEPE"]}.
+        Listed classes replace the built-in "crypto", "stablecoin" and "fiat" lists.
+        """
+        value = self.config_data.get("asset_classes")
+        return value if isinstance(value, dict) else {}
+
+    def get_default_asset_class(self) -> str:
+        """
+        Asset class of currencies that are not listed. Empty (default): unclassified.
+        """
+        return self.config_data.get("default_asset_class", "")
+
     def get_export_file(self) -> Path:
         """
         Returns the export file path as a Path object.
@@ -54,17 +170,128 @@ class Config:
         path_str = self.config_data.get("export_file", "")
         return Path(path_str)
 
+    def get_export_format(self) -> str:
+        """
+        Output format: "csv" (default), "csv.gz", "csv.xz", "jsonl" or "binary".
+        """
+        return self.config_data.get("export_format", "csv")
+
     def get_coin(self) -> str:
         coin = self.config_data.get("coin")
         if coin is None:
             raise ValueError("Config value 'coin' is required")
         return coin
 
-    def get_decimal_separator(self):
-        return self.config_data.get("decimal_separator", ".")
+    def get_decimal_separator(self) -> str:
+        """
+        Decimal separator of the import file ("." or ",").
+        Empty (default): detected per file.
+        """
+        return self.config_data.get("decimal_separator", "")
+
+    def get_date_format(self) -> str:
+        """
+        strptime format of the Date column.
+        Empty (default): detected per file.
+        """
+        return self.config_data.get("date_format", "")
+
+    def get_include_fees(self) -> bool:
+        """
+        Whether fee legs reduce the tracked balance (default: False).
+        """
+        return bool(self.config_data.get("include_fees", False))
+
+    def get_calculation_engine(self) -> str:
+        """
+        Calculation engine: "python" (default) or "batch" (vectorized, requires NumPy).
+        """
+        return self.config_data.get("calculation_engine", "python")
+
+    def get_fixed_point_scale(self) -> int:
+        """
+        Number of decimal places of fixed-point amounts (default: 10).
+        """
+        return int(self.config_data.get("fixed_point_scale", 10))
+
+    def get_amount_mode(self) -> str:
+        """
+        Amount representation: "decimal" (default) or "fixed" (scaled ints).
+        """
+        return self.config_data.get("amount_mode", "decimal")
+
+    def get_fixed_point_fallback(self) -> str:
+        """
+        Reaction to amounts exceeding the fixed-point scale:
+        "decimal" (rerun with Decimal amounts, default) or "error".
+        """
+        return self.config_data.get("fixed_point_fallback", "decimal")
+
+    def get_balance_checkpoint_file(self) -> str:
+        """
+        State file with month-end balance checkpoints (single calculation mode).
+        Empty (default) tracks the whole history on every run.
+        """
+        return self.config_data.get("balance_checkpoint_file", "")
+
+    def get_calculation_mode(self) -> str:
+        """
+        Calculation mode: "single" (configured coin, default),
+        "matrix" (all coins and exchanges in one pass) or
+        "scan" (negative-balance intervals of all coins).
+        """
+        return self.config_data.get("calculation_mode", "single")
+
+    def get_scan_window(self) -> int:
+        """
+        Scan mode: number of records reported before and after a negative crossing.
+        """
+        return int(self.config_data.get("scan_window", 3))
 
-    def get_date_format(self):
-        return self.config_data.get("date_format", "%Y-%m-%d %H:%M:%S")
+    def get_matrix_output(self) -> str:
+        """
+        Output of the matrix mode: "combined" (one file, default) or "per_coin".
+        """
+        return self.config_data.get("matrix_output", "combined")
+
+    def get_query_cache_size(self) -> int:
+        """
+        Number of answers the query service keeps in its LRU cache (0: no cache).
+        """
+        return int(self.config_data.get("query_cache_size", 256))
+
+    def get_metrics_output(self) -> str:
+        """
+        Destination of the per-stage run metrics: "stderr" or a JSON file path.
+        Empty (default) disables the metrics.
+        """
+        return self.config_data.get("metrics_output", "")
+
+    def get_metrics_trace_memory(self) -> bool:
+        """
+        Whether the metrics include peak memory via tracemalloc (default: False).
+        """
+        return bool(self.config_data.get("metrics_trace_memory", False))
+
+    def get_profile_stages(self) -> list[str]:
+        """
+        Stages run under cProfile (e.g. ["parse", "aggregate"]). Empty (default): none.
+        """
+        value = self.config_data.get("profile_stages")
+
+        if isinstance(value, list):
+            return value
+
+        if isinstance(value, str) and value:  # Return string as list
+            return [value]
+
+        return []
+
+    def get_profile_dir(self) -> str:
+        """
+        Directory of the `<stage>.pstats` files of the profiled stages (default: ".").
+        """
+        return self.config_data.get("profile_dir", ".")
 
     # def get_aggregate_trades(self):
     #     return self.config_data.get("aggregate_trades")
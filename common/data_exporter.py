@@ -1,34 +1,61 @@
-import csv
-from dataclasses import astuple
+import json
+from datetime import datetime
 from decimal import Decimal
 from pathlib import Path
-from typing import Sequence
+from typing import TYPE_CHECKING, Iterable, Optional
 
-from common.models.records import RawRecord, TargetRecord
+from common.models.records import MatrixRecord, RawRecord, TargetRecord
+from common.record_writers import RowFormatter, get_record_writer
+from common.utils.fixed_point import format_fixed
+
+if TYPE_CHECKING:
+    from calculation_tool.anomaly_scanner import BalanceAnomaly
 
 
 class DataExporter:
-    def _save(self, path: Path, header: list[str], data: Sequence) -> None:
-        """Internal helper to handle the actual file I/O."""
-        with open(path, "w", newline="", encoding="utf-8-sig") as f:
-            writer = csv.writer(f, quoting=csv.QUOTE_ALL)
-            writer.writerow(header)
-            for record in data:
-                # Konvertiere den Record in ein Tuple und formatiere jedes Element
-                row = [self._format_value(v) for v in astuple(record)]
-                writer.writerow(row)
+    def __init__(self, fixed_point_scale: Optional[int] = None, export_format: str = "csv"):
+        """
+        `fixed_point_scale` is set when amounts are fixed-point ints.<br>
+        `export_format` selects the writer, see `common.record_writers.RECORD_WRITERS`.
+        """
+        self.fixed_point_scale = fixed_point_scale
+        self.export_format = export_format
+        self.writer = get_record_writer(export_format)
+        self._formatters: dict[type, RowFormatter] = {}
+
+    def _format_amount(self, value) -> str:
+        if value.__class__ is int and self.fixed_point_scale is not None:
+            return format_fixed(value, self.fixed_point_scale)
+        return self._format_decimal(value)
 
-    def _format_value(self, value):
-        """Helper to decide how to format each field."""
+    def _save(self, path: Path, header: list[str], data: Iterable, record_cls: type) -> None:
+        """
+        Internal helper to handle the actual file I/O.
+        `data` is consumed lazily, so generators are written without building a list.
+        """
+        formatter = self._formatters.get(record_cls)
+        if formatter is None:
+            formatter = self._formatters[record_cls] = RowFormatter(
+                record_cls, self._format_amount
+            )
+        self.writer.write(path, header, data, formatter)
+
+    def format_value(self, value) -> str:
+        """
+        Formats a field value as in the exports: amounts (Decimal, or int in
+        fixed-point mode) with up to 10 decimal places, None as "".
+        """
         if isinstance(value, Decimal):
             return self._format_decimal(value)
+        if isinstance(value, int) and self.fixed_point_scale is not None:
+            return format_fixed(value, self.fixed_point_scale)
         if value is None:
             return ""
         # Datetime Objekte oder andere Typen werden standardmäßig zu Strings
         return str(value)
 
 
-    def save_raw_data(self, path: Path, records: Sequence[RawRecord]) -> None:
+    def save_raw_data(self, path: Path, records: Iterable[RawRecord]) -> None:
         header = [
             "Type",
             "Buy",
@@ -44,9 +71,9 @@ class DataExporter:
             "LPN",
             "Tx-ID",
         ]
-        self._save(path, header, records)
+        self._save(path, header, records, RawRecord)
 
-    def save_target_data(self, path: Path, records: Sequence[TargetRecord]) -> None:
+    def save_target_data(self, path: Path, records: Iterable[TargetRecord]) -> None:
         header = [
             "Type",
             "Buy",
@@ -62,7 +89,74 @@ class DataExporter:
             "Balance",
             "BCur",
         ]
-        self._save(path, header, records)
+        self._save(path, header, records, TargetRecord)
+
+    def save_matrix_data(self, path: Path, records: Iterable[MatrixRecord]) -> None:
+        header = [
+            "Type",
+            "Buy",
+            "Cur.",
+            "Sell",
+            "Cur.",
+            "Fee",
+            "Cur.",
+            "Exchange",
+            "Group",
+            "Comment",
+            "Date",
+            "Balance",
+            "BCur",
+            "Exchange Balance",
+        ]
+        self._save(path, header, records, MatrixRecord)
+
+    def _format_entry(self, entry: tuple[RawRecord, Decimal]) -> dict:
+        record, balance = entry
+        return {
+            "date": str(record.date),
+            "type": record.type,
+            "buy": self.format_value(record.buy_amount),
+            "buy_currency": record.buy_currency,
+            "sell": self.format_value(record.sell_amount),
+            "sell_currency": record.sell_currency,
+            "fee": self.format_value(record.fee_amount),
+            "fee_currency": record.fee_currency,
+            "exchange": record.exchange,
+            "comment": record.comment,
+            "tx_id": record.tx_id,
+            "balance": self.format_value(balance),
+        }
+
+    def save_anomaly_report(
+        self, path: Path, anomalies: Iterable["BalanceAnomaly"], last_date: Optional[datetime]
+    ) -> None:
+        """
+        Writes the negative-balance intervals of the scan mode as JSON.
+        Open intervals (`end` is null) last until `last_date`, the date of the last record.
+        """
+        report = self.anomaly_report(anomalies, last_date)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    def anomaly_report(
+        self, anomalies: Iterable["BalanceAnomaly"], last_date: Optional[datetime]
+    ) -> list[dict]:
+        """JSON-ready form of the negative-balance intervals (see `save_anomaly_report`)."""
+        return [
+            {
+                "coin": anomaly.coin,
+                "exchange": anomaly.exchange,
+                "start": str(anomaly.start),
+                "end": str(anomaly.end) if anomaly.end else None,
+                "duration": str(anomaly.duration(last_date)),
+                "minimum": self.format_value(anomaly.minimum),
+                "minimum_date": str(anomaly.minimum_date),
+                "crossing": self._format_entry(anomaly.crossing),
+                "before": [self._format_entry(entry) for entry in anomaly.before],
+                "after": [self._format_entry(entry) for entry in anomaly.after],
+            }
+            for anomaly in anomalies
+        ]
 
     @staticmethod
     def _format_decimal(value):
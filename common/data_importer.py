@@ -1,88 +1,264 @@
-from typing import Any, Dict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, TypeVar
 
+from common import metrics
 from common.models.records import RawRecord, TargetRecord
-from common.utils.csv_helpers import read_ct_csv
+from common.utils.csv_helpers import is_compressed, iter_ct_csv
+from common.utils.fixed_point import FixedPointError
 from common.utils.helper import (
     parse_date,
     sort_target_records,
     to_decimal,
 )
+from common.utils.parallel_parser import iter_csv_file_parallel
+from common.utils.parse_cache import ParseCache
+from common.utils.row_parser import RowParser
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class RecordFilter:
+    """
+    Exchange/year/coin filter applied to RawRecords.<br>
+    Empty values ("" or []) disable the corresponding filter.
+    """
+
+    exchanges: list[str] = field(default_factory=list)
+    year: str = ""
+    coin: str = ""
+
+    def matches(self, record: RawRecord) -> bool:
+        # Exchange filter
+        if self.exchanges and record.exchange not in self.exchanges:
+            return False
+
+        # Year filter
+        if self.year and str(record.date.year) != self.year:
+            return False
+
+        # Coin filter
+        if self.coin:
+            if self.coin not in (
+                record.buy_currency,
+                record.sell_currency,
+                record.fee_currency,
+            ):
+                return False
+
+        return True
+
+    def apply(self, records: Iterable[RawRecord]) -> Iterator[RawRecord]:
+        """Lazily yields the records that pass the filter."""
+        for r in records:
+            if self.matches(r):
+                yield r
 
 
 class DataImporter:
-    def __init__(self, config: Dict[str, Any], check_coin=False):
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        check_coin=False,
+        records: Optional[list[RawRecord]] = None,
+    ):
         self.file_name = config.get_import_file()
         self.data_format = config.get_data_format()
         self.ct_exchanges = config.get_ct_exchanges()
         self.ct_year = config.get_ct_year()
         self.check_coin = check_coin
-        self.coin = config.get_coin()
+        self.coin = config.get_coin() if check_coin else ""
+        # Empty values are detected per file
+        self.date_format = config.get_date_format()
+        self.decimal_separator = config.get_decimal_separator()
+        self.amount_mode = config.get_amount_mode()
+        self.fixed_point_scale = config.get_fixed_point_scale()
+        self.fixed_point_fallback = config.get_fixed_point_fallback()
+        self.parse_cache = self._create_parse_cache(config)
+        self.parse_workers = config.get_parse_workers()
+        self.background_decompression = config.get_background_decompression()
+        # Symbol table shared by all files parsed by this importer
+        self.symbols: dict[str, str] = {}
+        # Already parsed, unfiltered records (shared by batch jobs); the file is not read
+        self.records = records
+
+    @staticmethod
+    def _create_parse_cache(config) -> Optional[ParseCache]:
+        cache_dir = config.get_parse_cache_dir()
+        if not cache_dir:
+            return None
+        return ParseCache(Path(cache_dir), config.get_parse_cache_max_mb() * 1024 * 1024)
+
+    def get_filter(self) -> RecordFilter:
+        return RecordFilter(
+            exchanges=self.ct_exchanges,
+            year=self.ct_year or "",
+            coin=self.coin if self.check_coin else "",
+        )
+
+    def iter_data(self) -> Iterator[RawRecord]:
+        """
+        Stream filtered RawRecords from CSV input.<br>
+        Rows are parsed and filtered one at a time, so only the records
+        kept by the consumer stay in memory.
+        """
+        options = (
+            self.date_format,
+            self.decimal_separator,
+            self.get_fixed_point_scale(),
+        )
+        record_filter = self.get_filter()
+
+        if self.records is not None:
+            return metrics.iter_stage("filter", record_filter.apply(self.records))
+
+        if self.parse_cache is not None:
+            records = metrics.iter_stage("cache", self._iter_cached(options))
+            return metrics.iter_stage("filter", record_filter.apply(records), "cache")
+
+        if self._parse_in_parallel():
+            # The filter is applied in the worker processes
+            return metrics.iter_stage(
+                "parse",
+                iter_csv_file_parallel(
+                    self.file_name, self.parse_workers, *options, record_filter=record_filter
+                ),
+            )
+
+        records = self._iter_serial(options)
+        return metrics.iter_stage("filter", record_filter.apply(records), "parse")
+
+    def _parse_in_parallel(self) -> bool:
+        """Compressed files cannot be split into byte ranges and are parsed serially."""
+        return self.parse_workers > 1 and not is_compressed(self.file_name)
+
+    def _iter_serial(self, options: tuple) -> Iterator[RawRecord]:
+        rows = metrics.iter_stage(
+            "read", iter_ct_csv(self.file_name, self.background_decompression)
+        )
+        return metrics.iter_stage(
+            "parse", self.parse_rows(rows, *options, symbols=self.symbols), "read"
+        )
+
+    def _iter_parsed(self, options: tuple) -> Iterator[RawRecord]:
+        """Unfiltered records, parsed serially or in parallel."""
+        if self._parse_in_parallel():
+            return iter_csv_file_parallel(self.file_name, self.parse_workers, *options)
+        return self._iter_serial(options)
+
+    def _iter_cached(self, options: tuple) -> Iterator[RawRecord]:
+        """
+        Serves the unfiltered records from the parse cache, so a changed filter
+        does not require parsing again. On a miss the file is parsed completely
+        and stored; the records are held in memory until the entry is written.
+        """
+        path = Path(self.file_name)
+        records = self.parse_cache.load(path, options)
+        if records is None:
+            records = list(self._iter_parsed(options))
+            self.parse_cache.store(path, options, records)
+        yield from records
+
+    def get_fixed_point_scale(self) -> Optional[int]:
+        """Scale of fixed-point amounts, or None in Decimal mode."""
+        if self.amount_mode == "fixed":
+            return self.fixed_point_scale
+        if self.amount_mode == "decimal":
+            return None
+        raise ValueError(f"Unknown amount mode: {self.amount_mode}")
 
     def load_data(self) -> list[RawRecord]:
         """
         Load and filter RawRecords from CSV input.<br>
         Empty config values ("" or []) disable the corresponding filter.
         """
-        all_records = self.parse_csv_file(self.file_name)
-        filtered_records: list[RawRecord] = []
+        return list(self.iter_data())
 
-        exchanges = self.ct_exchanges  # list[str]
+    def with_fallback(
+        self, run: Callable[[], T], on_fallback: Optional[Callable[[], None]] = None
+    ) -> T:
+        """
+        Calls `run`, which reads the import through this importer. If an amount
+        does not fit the fixed-point scale and `fixed_point_fallback` is "decimal",
+        switches to Decimal amounts, calls `on_fallback` and then `run` again.
+        """
+        try:
+            return run()
+        except FixedPointError as error:
+            if self.fixed_point_fallback != "decimal":
+                raise
+            print(f"Warning: {error}. Falling back to Decimal amounts.")
+            self.amount_mode = "decimal"
+            if on_fallback is not None:
+                on_fallback()
+            return run()
 
-        for r in all_records:
-            # Exchange filter
-            if exchanges and r.exchange not in exchanges:
-                continue
+    def load_with_fallback(self) -> list[RawRecord]:
+        """`load_data`, with the Decimal fallback of `with_fallback`."""
+        return self.with_fallback(self.load_data)
 
-            # Year filter
-            if self.ct_year and str(r.date.year) != self.ct_year:
-                continue
+    @staticmethod
+    def iter_csv_file(
+        path: str,
+        date_format: str = "",
+        decimal_separator: str = "",
+        fixed_point_scale: Optional[int] = None,
+        background_decompression: bool = False,
+    ) -> Iterator[RawRecord]:
+        """
+        Lazily reads a CoinTracking CSV file (plain or gzip/bz2/lzma compressed)
+        and yields RawRecord objects.<br>
+        The date and number format are taken from the arguments or detected
+        once from the first row, and a parser specialized for them is used.<br>
+        With a `fixed_point_scale`, amounts are scaled ints instead of Decimals.
+        """
+        return DataImporter.parse_rows(
+            iter_ct_csv(path, background_decompression),
+            date_format,
+            decimal_separator,
+            fixed_point_scale,
+        )
 
-            # Coin filter
-            if self.check_coin:
-                if self.coin not in (r.buy_currency, r.sell_currency, r.fee_currency):
-                    continue
+    @staticmethod
+    def parse_rows(
+        rows: Iterable[list[str]],
+        date_format: str = "",
+        decimal_separator: str = "",
+        fixed_point_scale: Optional[int] = None,
+        symbols: Optional[dict[str, str]] = None,
+    ) -> Iterator[RawRecord]:
+        """
+        Lazily parses CoinTracking CSV data rows into RawRecord objects.
+        Text fields are interned through `symbols` (see `RowParser`).
+        """
+        rows = iter(rows)
+        first_row = next(rows, None)
+        if first_row is None:
+            return
 
-            filtered_records.append(r)
+        parse = RowParser.for_file(
+            first_row, date_format, decimal_separator, fixed_point_scale, symbols
+        ).parse
 
-        return filtered_records
+        yield parse(first_row)
+        for row in rows:
+            yield parse(row)
 
     @staticmethod
     def parse_csv_file(path: str) -> list[RawRecord]:
         """
         Reads a CoinTracking CSV file and converts it into a list of RawRecord objects.
         """
-        rows = read_ct_csv(path)
-
-        records = [
-            RawRecord(
-                type=row[0],
-                buy_amount=to_decimal(row[1]),
-                buy_currency=row[2],
-                sell_amount=to_decimal(row[3]),
-                sell_currency=row[4],
-                fee_amount=to_decimal(row[5]),
-                fee_currency=row[6],
-                exchange=row[7],
-                group=row[8],
-                comment=row[9],
-                date=parse_date(row[10]),
-                lpn=row[11],
-                tx_id=row[12],
-            )
-            for row in rows
-        ]
-        return records
+        return list(DataImporter.iter_csv_file(path))
 
     @staticmethod
-    def parse_target_csv_file(path: str) -> list[TargetRecord]:
-        rows = read_ct_csv(path)
-
-        records = []
-        for row in rows:
-            if not row:
-                continue
-
-            record = TargetRecord(
+    def iter_target_csv_file(path: str) -> Iterator[TargetRecord]:
+        """
+        Lazily reads a target CSV file (output of the calculation tool) in file order.
+        """
+        for row in iter_ct_csv(path):
+            yield TargetRecord(
                 type=row[0],
                 buy_amount=to_decimal(row[1]),
                 buy_currency=row[2],
@@ -97,7 +273,10 @@ class DataImporter:
                 balance=to_decimal(row[11]),  # Neu im Target
                 balance_currency=row[12],  # Neu im Target
             )
-            records.append(record)
+
+    @staticmethod
+    def parse_target_csv_file(path: str) -> list[TargetRecord]:
+        records = list(DataImporter.iter_target_csv_file(path))
 
         # Sortierung wie gewünscht
         sort_target_records(records)
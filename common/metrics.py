@@ -0,0 +1,267 @@
+import cProfile
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+# Collector of the running tool; the hooks below are no-ops while it is None
+_active: Optional["Metrics"] = None
+
+
+class _Stage:
+    __slots__ = (
+        "name", "wall", "cpu", "rows_in", "rows_out", "input_stage", "peak_bytes", "profiler",
+    )
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.rows_in: Optional[int] = None
+        self.rows_out: Optional[int] = None
+        self.input_stage: Optional[str] = None
+        self.peak_bytes: Optional[int] = None
+        self.profiler: Optional[cProfile.Profile] = None
+
+
+class Metrics:
+    """
+    Per-stage metrics of a tool run: wall and CPU time, rows in and out,
+    optionally peak memory (tracemalloc) and cProfile dumps of selected stages.
+
+    Stages nest and interleave (the pipeline is lazy: writing pulls records
+    through calculation, filtering, parsing and reading). Time is always
+    charged to the innermost running stage, so the stage times are
+    exclusive and add up to the instrumented run time.
+    """
+
+    def __init__(
+        self,
+        trace_memory: bool = False,
+        profile_stages: Iterable[str] = (),
+        profile_dir: Path = Path("."),
+    ):
+        self.trace_memory = trace_memory
+        self.profile_stages = set(profile_stages)
+        self.profile_dir = Path(profile_dir)
+        self.stages: dict[str, _Stage] = {}
+        self.values: dict[str, Any] = {}
+        self._stack: list[_Stage] = []
+        self._last_wall = 0.0
+        self._last_cpu = 0.0
+        self._started = 0.0
+        self._wall = 0.0
+        self._profiling: Optional[_Stage] = None
+        self._peak_bytes = 0
+
+    @classmethod
+    def from_config(cls, config) -> Optional["Metrics"]:
+        """None if neither metrics output nor profiling is configured."""
+        if not config.get_metrics_output() and not config.get_profile_stages():
+            return None
+        return cls(
+            trace_memory=config.get_metrics_trace_memory(),
+            profile_stages=config.get_profile_stages(),
+            profile_dir=Path(config.get_profile_dir()),
+        )
+
+    def _stage(self, name: str) -> _Stage:
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = _Stage(name)
+        return stage
+
+    def _switch(self) -> None:
+        """Charges the time since the last switch to the innermost running stage."""
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        if self._stack:
+            top = self._stack[-1]
+            top.wall += wall - self._last_wall
+            top.cpu += cpu - self._last_cpu
+        self._last_wall = wall
+        self._last_cpu = cpu
+
+    def _enter(self, stage: _Stage) -> None:
+        self._switch()
+        self._stack.append(stage)
+        if stage.name in self.profile_stages and self._profiling is None:
+            # Only one profiler can run; an enclosing profiled stage includes this one
+            if stage.profiler is None:
+                stage.profiler = cProfile.Profile()
+            self._profiling = stage
+            stage.profiler.enable()
+
+    def _exit(self, stage: _Stage) -> None:
+        if self._profiling is stage:
+            stage.profiler.disable()
+            self._profiling = None
+        self._switch()
+        self._stack.pop()
+
+    def _observe_memory(self, stage: Optional[_Stage] = None) -> None:
+        """
+        Propagates the tracemalloc peak since the last reset to the running
+        stages, then resets it, so that every stage gets its own peak.
+        """
+        peak = tracemalloc.get_traced_memory()[1]
+        self._peak_bytes = max(self._peak_bytes, peak)
+        for running in (*self._stack, stage):
+            if running is not None and running.peak_bytes is not None:
+                running.peak_bytes = max(running.peak_bytes, peak)
+        tracemalloc.reset_peak()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Times a stage that runs eagerly inside the `with` block."""
+        stage = self._stage(name)
+        if self.trace_memory:
+            self._observe_memory()
+            stage.peak_bytes = stage.peak_bytes or 0
+        self._enter(stage)
+        try:
+            yield stage
+        finally:
+            self._exit(stage)
+            if self.trace_memory:
+                self._observe_memory(stage)
+
+    def iter_stage(
+        self, name: str, iterable: Iterable, input_stage: Optional[str] = None
+    ) -> Iterator:
+        """
+        Wraps a lazy stage: the time spent producing each item is charged to
+        the stage, and the items are counted as its rows out.
+        `input_stage` names the stage whose rows out are this stage's rows in.
+        """
+        # Registered eagerly, so the report lists the stages in pipeline order
+        stage = self._stage(name)
+        stage.input_stage = input_stage
+        stage.rows_out = stage.rows_out or 0
+        return self._iter(stage, iter(iterable))
+
+    def _iter(self, stage: _Stage, iterator: Iterator) -> Iterator:
+        while True:
+            self._enter(stage)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self._exit(stage)
+            stage.rows_out += 1
+            yield item
+
+    def counted(self, name: str, iterable: Iterable) -> Iterator:
+        """Counts the items of `iterable` as rows in of the stage consuming it."""
+        stage = self._stage(name)
+        stage.rows_in = stage.rows_in or 0
+        for item in iterable:
+            stage.rows_in += 1
+            yield item
+
+    def start(self) -> None:
+        if self.trace_memory:
+            tracemalloc.start()
+        self._started = time.perf_counter()
+        self._last_wall = self._started
+        self._last_cpu = time.process_time()
+
+    def stop(self) -> None:
+        self._wall += time.perf_counter() - self._started
+        if self.trace_memory:
+            self._observe_memory()
+            tracemalloc.stop()
+
+    def report(self) -> dict:
+        stages = {}
+        for stage in self.stages.values():
+            rows_in = stage.rows_in
+            if rows_in is None and stage.input_stage in self.stages:
+                rows_in = self.stages[stage.input_stage].rows_out
+            entry = {
+                "wall_seconds": round(stage.wall, 6),
+                "cpu_seconds": round(stage.cpu, 6),
+                "rows_in": rows_in,
+                "rows_out": stage.rows_out,
+            }
+            if stage.peak_bytes is not None:
+                entry["peak_bytes"] = stage.peak_bytes
+            stages[stage.name] = entry
+
+        report = {"wall_seconds": round(self._wall, 6), "stages": stages, **self.values}
+        if self.trace_memory:
+            report["peak_bytes"] = self._peak_bytes
+        return report
+
+    def write(self, output: str) -> None:
+        """
+        Writes the report as JSON to `output` ("stderr" or a file path; empty: nowhere)
+        and dumps the profiles of the profiled stages as `<profile_dir>/<stage>.pstats`.
+        """
+        for stage in self.stages.values():
+            if stage.profiler is not None:
+                self.profile_dir.mkdir(parents=True, exist_ok=True)
+                stage.profiler.dump_stats(self.profile_dir / f"{stage.name}.pstats")
+
+        if not output:
+            return
+        text = json.dumps(self.report(), indent=2)
+        if output == "stderr":
+            print(text, file=sys.stderr)
+        else:
+            Path(output).write_text(text + "\n")
+
+
+@contextmanager
+def collect(metrics: Optional[Metrics]):
+    """Makes `metrics` the collector of the hooks below while the block runs."""
+    global _active
+    if metrics is None:
+        yield None
+        return
+
+    previous = _active
+    _active = metrics
+    metrics.start()
+    try:
+        yield metrics
+    finally:
+        metrics.stop()
+        _active = previous
+
+
+def stage(name: str):
+    """Context manager timing a stage; does nothing without an active collector."""
+    if _active is None:
+        return nullcontext()
+    return _active.stage(name)
+
+
+def iter_stage(name: str, iterable: Iterable, input_stage: Optional[str] = None) -> Iterable:
+    """Wraps a lazy stage; returns `iterable` unchanged without an active collector."""
+    if _active is None:
+        return iterable
+    return _active.iter_stage(name, iterable, input_stage)
+
+
+def counted(name: str, iterable: Iterable) -> Iterable:
+    """Counts rows in of a stage; returns `iterable` unchanged without an active collector."""
+    if _active is None:
+        return iterable
+    return _active.counted(name, iterable)
+
+
+def add_rows(name: str, rows_in: Optional[int] = None, rows_out: Optional[int] = None) -> None:
+    """Adds to the rows in and out of a stage (stages may run several times)."""
+    if _active is None:
+        return
+    stage_metrics = _active._stage(name)
+    if rows_in is not None:
+        stage_metrics.rows_in = (stage_metrics.rows_in or 0) + rows_in
+    if rows_out is not None:
+        stage_metrics.rows_out = (stage_metrics.rows_out or 0) + rows_out
+
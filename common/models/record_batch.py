@@ -0,0 +1,210 @@
+"""
+Columnar representation of RawRecords / TargetRecords backed by NumPy arrays.
+
+NumPy is an optional dependency: it is only imported when a RecordBatch is built.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Optional, Sequence
+
+from common.models.records import RawRecord, TargetRecord
+from common.utils.fixed_point import decimal_to_fixed, fixed_to_decimal
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+# Sums and running totals of up to three amount columns must stay within int64
+_COLUMN_LIMIT = 2**61
+
+
+def require_numpy() -> None:
+    if np is None:
+        raise ImportError("The batch engine requires NumPy (pip install numpy)")
+
+
+def to_fixed(value: Any, scale: int) -> int:
+    """
+    Scaled integer of an amount. Amounts of the fixed-point mode are ints
+    at the same scale already.
+    """
+    if isinstance(value, int):
+        return value
+    return decimal_to_fixed(value, scale)
+
+
+class Dictionary:
+    """
+    Dictionary encoding of a string column.
+    Codes follow the sort order of the strings, so sorting by code
+    equals sorting by value.
+    """
+
+    def __init__(self, values: Sequence[str]):
+        self.values: list[str] = sorted(set(values))
+        self.codes: dict[str, int] = {v: i for i, v in enumerate(self.values)}
+
+    def encode(self, column: Sequence[str]) -> "np.ndarray":
+        codes = self.codes
+        return np.fromiter((codes[v] for v in column), dtype=np.int32, count=len(column))
+
+    def code_of(self, value: str) -> int:
+        """Code of `value`, or -1 if it does not occur in the batch."""
+        return self.codes.get(value, -1)
+
+
+@dataclass
+class RecordBatch:
+    """
+    Columnar batch of records.
+
+    - Amounts are int64 fixed-point values scaled by 10**scale.
+    - Type, currencies, exchange, group and comment are dictionary-encoded
+      int32 codes. Buy, sell and fee currency share one dictionary.
+    - Dates are datetime64[us].
+    - Either `lpn`/`tx_id` (RawRecord) or `balance`/`balance_currency`
+      (TargetRecord) is set.
+    - `fixed_point` is set if the source records hold fixed-point int amounts.
+    """
+
+    scale: int
+    type: "np.ndarray"
+    buy_amount: "np.ndarray"
+    buy_currency: "np.ndarray"
+    sell_amount: "np.ndarray"
+    sell_currency: "np.ndarray"
+    fee_amount: "np.ndarray"
+    fee_currency: "np.ndarray"
+    exchange: "np.ndarray"
+    group: "np.ndarray"
+    comment: "np.ndarray"
+    date: "np.ndarray"
+    types: Dictionary
+    currencies: Dictionary
+    exchanges: Dictionary
+    groups: Dictionary
+    comments: Dictionary
+    lpn: Optional[list[str]] = None
+    tx_id: Optional[list[str]] = None
+    balance: Optional["np.ndarray"] = None
+    balance_currency: Optional["np.ndarray"] = None
+    fixed_point: bool = False
+
+    def __len__(self) -> int:
+        return len(self.date)
+
+    @classmethod
+    def from_records(cls, records: Sequence[Any], scale: int = 10) -> "RecordBatch":
+        """
+        Builds a batch from RawRecords or TargetRecords.
+        Raises ValueError if an amount does not fit the fixed-point representation.
+        """
+        require_numpy()
+
+        def amounts(name: str) -> "np.ndarray":
+            values = [to_fixed(getattr(r, name), scale) for r in records]
+            if sum(map(abs, values)) >= _COLUMN_LIMIT:
+                raise ValueError(f"Column '{name}' exceeds the int64 fixed-point range")
+            return np.array(values, dtype=np.int64)
+
+        def strings(name: str) -> list[str]:
+            return [getattr(r, name) for r in records]
+
+        buy_cur = strings("buy_currency")
+        sell_cur = strings("sell_currency")
+        fee_cur = strings("fee_currency")
+        is_target = bool(records) and isinstance(records[0], TargetRecord)
+        balance_cur = strings("balance_currency") if is_target else []
+
+        types = Dictionary(strings("type"))
+        currencies = Dictionary(buy_cur + sell_cur + fee_cur + balance_cur)
+        exchanges = Dictionary(strings("exchange"))
+        groups = Dictionary(strings("group"))
+        comments = Dictionary(strings("comment"))
+
+        batch = cls(
+            scale=scale,
+            type=types.encode(strings("type")),
+            buy_amount=amounts("buy_amount"),
+            buy_currency=currencies.encode(buy_cur),
+            sell_amount=amounts("sell_amount"),
+            sell_currency=currencies.encode(sell_cur),
+            fee_amount=amounts("fee_amount"),
+            fee_currency=currencies.encode(fee_cur),
+            exchange=exchanges.encode(strings("exchange")),
+            group=groups.encode(strings("group")),
+            comment=comments.encode(strings("comment")),
+            date=np.fromiter(
+                ((r.date - _EPOCH) // _MICROSECOND for r in records),
+                dtype=np.int64,
+                count=len(records),
+            ).view("datetime64[us]"),
+            types=types,
+            currencies=currencies,
+            exchanges=exchanges,
+            groups=groups,
+            comments=comments,
+        )
+
+        batch.fixed_point = bool(records) and isinstance(records[0].buy_amount, int)
+
+        if is_target:
+            batch.balance = amounts("balance")
+            batch.balance_currency = currencies.encode(balance_cur)
+        else:
+            batch.lpn = strings("lpn")
+            batch.tx_id = strings("tx_id")
+
+        return batch
+
+    def _common_fields(self, i: int) -> dict[str, Any]:
+        return dict(
+            type=self.types.values[self.type[i]],
+            buy_amount=self.to_amount(self.buy_amount[i]),
+            buy_currency=self.currencies.values[self.buy_currency[i]],
+            sell_amount=self.to_amount(self.sell_amount[i]),
+            sell_currency=self.currencies.values[self.sell_currency[i]],
+            fee_amount=self.to_amount(self.fee_amount[i]),
+            fee_currency=self.currencies.values[self.fee_currency[i]],
+            exchange=self.exchanges.values[self.exchange[i]],
+            group=self.groups.values[self.group[i]],
+            comment=self.comments.values[self.comment[i]],
+            date=self.date[i].item(),
+        )
+
+    def to_raw_records(self) -> list[RawRecord]:
+        lpn = self.lpn or [""] * len(self)
+        tx_id = self.tx_id or [""] * len(self)
+        return [
+            RawRecord(**self._common_fields(i), lpn=lpn[i], tx_id=tx_id[i])
+            for i in range(len(self))
+        ]
+
+    def to_target_records(self) -> list[TargetRecord]:
+        if self.balance is None or self.balance_currency is None:
+            raise ValueError("RecordBatch holds no balance columns")
+        return [
+            TargetRecord(
+                **self._common_fields(i),
+                balance=self.to_amount(self.balance[i]),
+                balance_currency=self.currencies.values[self.balance_currency[i]],
+            )
+            for i in range(len(self))
+        ]
+
+    def to_amount(self, value: int) -> Any:
+        """
+        Converts a scaled column value back into the amount type of the source
+        records: a Decimal, or the fixed-point int itself in fixed-point mode.
+        """
+        if self.fixed_point:
+            return int(value)
+        return fixed_to_decimal(value, self.scale)
+
+    def day(self) -> "np.ndarray":
+        return self.date.astype("datetime64[D]")
@@ -1,9 +1,25 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from datetime import datetime
 from decimal import Decimal
+from operator import attrgetter
 
+# Field getters per record class, for pickling
+_values_of: dict[type, attrgetter] = {}
 
-@dataclass(frozen=True)
+
+def _reduce_record(record) -> tuple:
+    """
+    Slotted dataclasses pickle their state field by field; rebuilding a record
+    from its field tuple is faster (external sort, parse workers, parallel engine).
+    """
+    cls = record.__class__
+    values_of = _values_of.get(cls)
+    if values_of is None:
+        values_of = _values_of[cls] = attrgetter(*(f.name for f in fields(cls)))
+    return cls, values_of(record)
+
+
+@dataclass(frozen=True, slots=True)
 class RawRecord:
     type: str
     buy_amount: Decimal
@@ -37,6 +53,9 @@ class RawRecord:
             tx_id=row.get("Tx-ID") or "",
         )
 
+    def __reduce__(self):
+        return _reduce_record(self)
+
     def __repr__(self) -> str:
         # Feste Breiten für die Spalten sorgen für das Tabellen-Layout
         date_str = self.date.strftime("%Y-%m-%d %H:%M") if self.date else "N/A"
@@ -48,7 +67,7 @@ class RawRecord:
         )
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class TargetRecord:
     type: str
     buy_amount: Decimal
@@ -63,3 +82,17 @@ class TargetRecord:
     date: datetime
     balance: Decimal
     balance_currency: str
+
+    def __reduce__(self):
+        return _reduce_record(self)
+
+
+@dataclass(frozen=True, slots=True)
+class MatrixRecord(TargetRecord):
+    """
+    TargetRecord of the balance matrix: additionally carries the running
+    balance of the coin on the record's exchange.
+    """
+
+    exchange_balance: Decimal
+
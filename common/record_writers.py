@@ -0,0 +1,215 @@
+import csv
+import gzip
+import json
+import lzma
+from dataclasses import fields
+from datetime import datetime
+from decimal import Decimal
+from operator import attrgetter
+from pathlib import Path
+from typing import IO, Callable, Iterable, Iterator
+
+# Binary format: magic, header (JSON), then the fields of every record
+BINARY_MAGIC = b"CTREC\x01"
+# Binary format: str fields that are not dictionary encoded (nearly unique per record)
+_UNIQUE_FIELDS = {"lpn", "tx_id"}
+
+
+class RowFormatter:
+    """
+    Formats records of one dataclass into lists of strings.
+
+    The formatter of every field is chosen once from the field type, so
+    records are read with a single attrgetter instead of `astuple` (which
+    deep-copies) and no per-value type dispatch is needed.
+    """
+
+    def __init__(self, record_cls: type, format_amount: Callable[[object], str]):
+        record_fields = fields(record_cls)
+        self.names = [f.name for f in record_fields]
+        self.values_of = attrgetter(*self.names)
+        self.formatters = [self._formatter(f.type, format_amount) for f in record_fields]
+
+    @staticmethod
+    def _formatter(field_type, format_amount: Callable[[object], str]) -> Callable:
+        if field_type is Decimal:
+            return format_amount
+        if field_type is datetime:
+            return str
+        return _format_text
+
+    def format(self, record) -> list[str]:
+        return [
+            format_value(value)
+            for format_value, value in zip(self.formatters, self.values_of(record))
+        ]
+
+
+def _format_text(value) -> str:
+    if value is None:
+        return ""
+    return value if value.__class__ is str else str(value)
+
+
+class CsvRecordWriter:
+    """Fully quoted CSV, like the CoinTracking import format."""
+
+    @staticmethod
+    def _open(path: Path) -> IO:
+        return open(path, "w", newline="", encoding="utf-8-sig")
+
+    def write(
+        self, path: Path, header: list[str], records: Iterable, formatter: RowFormatter
+    ) -> None:
+        with self._open(path) as f:
+            writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+            writer.writerow(header)
+            writer.writerows(map(formatter.format, records))
+
+
+class GzipCsvRecordWriter(CsvRecordWriter):
+    @staticmethod
+    def _open(path: Path) -> IO:
+        return gzip.open(path, "wt", newline="", encoding="utf-8-sig")
+
+
+class XzCsvRecordWriter(CsvRecordWriter):
+    @staticmethod
+    def _open(path: Path) -> IO:
+        return lzma.open(path, "wt", newline="", encoding="utf-8-sig")
+
+
+class JsonLinesRecordWriter:
+    """One JSON object per record, keyed by field name. Amounts are strings."""
+
+    def write(
+        self, path: Path, header: list[str], records: Iterable, formatter: RowFormatter
+    ) -> None:
+        names = formatter.names
+        with open(path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(dict(zip(names, formatter.format(record))), ensure_ascii=False))
+                f.write("\n")
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, position: int) -> tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+class BinaryRecordWriter:
+    """
+    Compact binary format for downstream tools.
+
+    Layout: `BINARY_MAGIC`, a varint-length JSON header with the field
+    names, the CSV header and the dictionary-encoded fields, then the
+    fields of every record in order. Plain fields are written as varint
+    length plus UTF-8 bytes. Dictionary fields (currencies, exchanges,
+    types, ...) are written as a varint code: 0 introduces a new value
+    (followed by length and bytes), n > 0 repeats the n-th value of that field.
+    Values are the same strings as in the CSV output.
+    """
+
+    _FLUSH_SIZE = 1024 * 1024
+
+    def write(
+        self, path: Path, header: list[str], records: Iterable, formatter: RowFormatter
+    ) -> None:
+        dictionary_fields = [
+            name not in _UNIQUE_FIELDS and format_value is _format_text
+            for name, format_value in zip(formatter.names, formatter.formatters)
+        ]
+        tables: list[dict[str, int]] = [{} for _ in formatter.names]
+
+        meta = json.dumps(
+            {"fields": formatter.names, "header": header, "dictionary": dictionary_fields}
+        ).encode()
+        out = bytearray(BINARY_MAGIC)
+        _write_varint(out, len(meta))
+        out += meta
+
+        with open(path, "wb") as f:
+            for record in records:
+                for value, is_dictionary, table in zip(
+                    formatter.format(record), dictionary_fields, tables
+                ):
+                    if is_dictionary:
+                        code = table.get(value)
+                        if code is not None:
+                            _write_varint(out, code)
+                            continue
+                        table[value] = len(table) + 1
+                        out.append(0)
+                    encoded = value.encode()
+                    _write_varint(out, len(encoded))
+                    out += encoded
+
+                if len(out) >= self._FLUSH_SIZE:
+                    f.write(out)
+                    out.clear()
+            f.write(out)
+
+
+def iter_binary_records(path: Path) -> Iterator[dict[str, str]]:
+    """
+    Reads a file of `BinaryRecordWriter`; yields one dict (field name -> string) per record.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+
+    if not data.startswith(BINARY_MAGIC):
+        raise ValueError(f"Not a binary record file: {path}")
+
+    length, position = _read_varint(data, len(BINARY_MAGIC))
+    meta = json.loads(data[position : position + length])
+    position += length
+
+    names = meta["fields"]
+    dictionary_fields = meta["dictionary"]
+    tables: list[list[str]] = [[] for _ in names]
+
+    while position < len(data):
+        values = []
+        for is_dictionary, table in zip(dictionary_fields, tables):
+            if is_dictionary:
+                code, position = _read_varint(data, position)
+                if code:
+                    values.append(table[code - 1])
+                    continue
+            length, position = _read_varint(data, position)
+            value = data[position : position + length].decode()
+            position += length
+            if is_dictionary:
+                table.append(value)
+            values.append(value)
+        yield dict(zip(names, values))
+
+
+RECORD_WRITERS = {
+    "csv": CsvRecordWriter,
+    "csv.gz": GzipCsvRecordWriter,
+    "csv.xz": XzCsvRecordWriter,
+    "jsonl": JsonLinesRecordWriter,
+    "binary": BinaryRecordWriter,
+}
+
+
+def get_record_writer(export_format: str):
+    writer_cls = RECORD_WRITERS.get(export_format)
+    if writer_cls is None:
+        raise ValueError(f"Unknown export format: {export_format}")
+    return writer_cls()
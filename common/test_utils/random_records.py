@@ -0,0 +1,39 @@
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from common.models.records import RawRecord
+
+
+def make_random_records(count: int, seed: int) -> list[RawRecord]:
+    """
+    Random bot-like records with few distinct keys, so that many lines share
+    a daily group. Comments are mixed in to produce interleaved runs.
+    """
+    rng = random.Random(seed)
+    start = datetime(2021, 12, 30)
+    pairs = [("BTC", "EUR"), ("EUR", "BTC"), ("ADA", "USDT"), ("", "KFEE")]
+    types = ["Trade", "Margin Fee", "Margin Profit", "Deposit"]
+    records = []
+
+    for i in range(count):
+        buy, sell = rng.choice(pairs)
+        records.append(
+            RawRecord(
+                type=rng.choice(types),
+                buy_amount=Decimal(rng.randint(0, 500)) / 100,
+                buy_currency=buy,
+                sell_amount=Decimal(rng.randint(0, 500)) / 1000,
+                sell_currency=sell,
+                fee_amount=Decimal(rng.randint(0, 9)) / 10**8,
+                fee_currency=sell,
+                exchange=rng.choice(["Kraken", "Binance"]),
+                group=rng.choice(["", "Bot"]),
+                comment=rng.choice(["", "", "", "manual"]),
+                date=start + timedelta(minutes=rng.randint(0, 4 * 24 * 60) // 7 * 7),
+                lpn="",
+                tx_id=f"Tx-{i}",
+            )
+        )
+
+    return records
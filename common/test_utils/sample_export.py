@@ -0,0 +1,21 @@
+CSV_HEADER = (
+    '"Type","Buy","Cur.","Sell","Cur.","Fee","Cur.","Exchange","Group",'
+    '"Comment","Date","LPN","Tx-ID"\n'
+)
+CSV_ROWS = [
+    '"Trade","0.2","BTC","400","EUR","0.20","EUR","Kraken","Kraken Ledger","","2021-12-27 02:40:00","","Ledger-1"\n',
+    '"Trade","10","ADA","5","EUR","","","Binance","","","2021-12-28 10:00:00","","Ledger-2"\n',
+    '"Deposit","1","ADA","","","","","Kraken","","","2022-01-03 08:00:00","","Ledger-3"\n',
+    "\n",
+    '"Margin Fee","","","0.4","KFEE","0","KFEE","Kraken","Kraken Rollover","","2021-12-15 19:22:59","","Ledger-4"\n',
+]
+
+
+def write_export(tmp_path) -> str:
+    """
+    Writes a small CoinTracking export (four records and an empty line)
+    into `tmp_path` and returns its path.
+    """
+    path = tmp_path / "export.csv"
+    path.write_text(CSV_HEADER + "".join(CSV_ROWS), encoding="utf-8")
+    return str(path)
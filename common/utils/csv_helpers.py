@@ -1,16 +1,144 @@
+import bz2
 import csv
+import gzip
+import io
+import lzma
+import queue
+import threading
 from pathlib import Path
+from typing import IO, Callable, Iterator, Optional
 
+# Magic bytes of the supported compression formats
+_MAGIC_OPENERS: tuple[tuple[bytes, Callable], ...] = (
+    (b"\x1f\x8b", gzip.open),
+    (b"BZh", bz2.open),
+    (b"\xfd7zXZ\x00", lzma.open),
+)
+# Extensions, for formats without reliable magic bytes (legacy .lzma)
+_SUFFIX_OPENERS: dict[str, Callable] = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+    ".lzma": lzma.open,
+}
+# Block size of the background decompression
+_BLOCK_SIZE = 1024 * 1024
+# Decompressed blocks buffered ahead of the parser
+_QUEUE_BLOCKS = 8
 
-def read_ct_csv(path: str) -> list[list[str]]:
-    rows: list[list[str]] = []
 
-    with open(Path(path), newline="", encoding="utf-8-sig") as f:
+def _compression_opener(path: Path) -> Optional[Callable]:
+    """
+    Opener of a compressed file (by magic bytes, then by extension), or None for plain files.
+    """
+    with open(path, "rb") as f:
+        head = f.read(6)
+    for magic, opener in _MAGIC_OPENERS:
+        if head.startswith(magic):
+            return opener
+    return _SUFFIX_OPENERS.get(path.suffix.lower())
+
+
+def is_compressed(path: str) -> bool:
+    return _compression_opener(Path(path)) is not None
+
+
+class _BackgroundReader(io.RawIOBase):
+    """
+    Binary stream fed by a thread that reads (and thereby decompresses) `source`.
+    zlib, bz2 and lzma release the GIL, so decompression overlaps with parsing.
+    """
+
+    def __init__(self, source: IO[bytes]):
+        self._source = source
+        self._blocks: queue.Queue = queue.Queue(maxsize=_QUEUE_BLOCKS)
+        self._buffer = b""
+        self._position = 0
+        # Error of the producer thread, raised again on every later read
+        self._error: Optional[BaseException] = None
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._produce, daemon=True)
+        self._thread.start()
+
+    def _produce(self) -> None:
+        try:
+            while not self._stopped.is_set():
+                block = self._source.read(_BLOCK_SIZE)
+                self._put(block)
+                if not block:
+                    break
+        except BaseException as error:  # re-raised in the reading thread
+            self._put(error)
+
+    def _put(self, item) -> None:
+        while not self._stopped.is_set():
+            try:
+                self._blocks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._error is not None:
+            # The producer has exited, nothing will be queued anymore
+            raise self._error
+        if self._position >= len(self._buffer):
+            block = self._blocks.get()
+            if isinstance(block, BaseException):
+                self._error = block
+                raise block
+            if not block:
+                self._blocks.put(block)  # keep signalling the end
+                return 0
+            self._buffer = block
+            self._position = 0
+
+        size = min(len(buffer), len(self._buffer) - self._position)
+        buffer[:size] = self._buffer[self._position : self._position + size]
+        self._position += size
+        return size
+
+    def close(self) -> None:
+        if not self.closed:
+            self._stopped.set()
+            self._thread.join()
+            self._source.close()
+        super().close()
+
+
+def open_ct_csv(path: str, background_decompression: bool = False) -> IO[str]:
+    """
+    Opens a CoinTracking CSV file for reading, also gzip, bz2 or lzma
+    compressed. With `background_decompression`, compressed input is
+    decompressed in a separate thread.
+    """
+    path = Path(path)
+    opener = _compression_opener(path)
+    if opener is None:
+        return open(path, newline="", encoding="utf-8-sig")
+
+    source = opener(path, "rb")
+    if background_decompression:
+        source = io.BufferedReader(_BackgroundReader(source), buffer_size=_BLOCK_SIZE)
+    return io.TextIOWrapper(source, newline="", encoding="utf-8-sig")
+
+
+def iter_ct_csv(path: str, background_decompression: bool = False) -> Iterator[list[str]]:
+    """
+    Lazily yields the data rows of a CoinTracking CSV file (plain or compressed).
+    The header row and empty lines are skipped.
+    """
+    with open_ct_csv(path, background_decompression) as f:
         reader = csv.reader(f)
-        next(reader)  # skip header
+        next(reader, None)  # skip header
 
         for row in reader:
             if row:
-                rows.append(row)
+                yield row
 
-    return rows
+
+def read_ct_csv(path: str) -> list[list[str]]:
+    return list(iter_ct_csv(path))
@@ -0,0 +1,73 @@
+import heapq
+import pickle
+import tempfile
+from typing import IO, Callable, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Records are pickled in blocks to keep the per-record overhead low
+_SPILL_BLOCK_SIZE = 1000
+
+
+def _write_spill(chunk: list, tmp_dir: Optional[str]) -> IO[bytes]:
+    spill = tempfile.TemporaryFile(dir=tmp_dir)
+    for start in range(0, len(chunk), _SPILL_BLOCK_SIZE):
+        pickle.dump(
+            chunk[start : start + _SPILL_BLOCK_SIZE],
+            spill,
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+    spill.seek(0)
+    return spill
+
+
+def _read_spill(spill: IO[bytes]) -> Iterator:
+    while True:
+        try:
+            block = pickle.load(spill)
+        except EOFError:
+            return
+        yield from block
+
+
+def external_sort(
+    records: Iterable[T],
+    key: Callable[[T], object],
+    max_records_in_memory: int,
+    tmp_dir: Optional[str] = None,
+) -> Iterator[T]:
+    """
+    Sorts records with bounded memory.
+
+    Records are collected in chunks of `max_records_in_memory`, each chunk is
+    sorted and spilled to a temporary file, and the spill files are k-way merged.
+    Like `list.sort` the result is stable: records with equal keys keep their
+    input order. If the input fits into one chunk, nothing is written to disk.
+    """
+    if max_records_in_memory <= 0:
+        raise ValueError("max_records_in_memory must be positive")
+
+    spills: list[IO[bytes]] = []
+    chunk: list[T] = []
+
+    try:
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= max_records_in_memory:
+                chunk.sort(key=key)
+                spills.append(_write_spill(chunk, tmp_dir))
+                chunk = []
+
+        chunk.sort(key=key)
+
+        if not spills:
+            yield from chunk
+            return
+
+        # heapq.merge prefers earlier iterables on equal keys, which keeps it stable
+        sources = [_read_spill(spill) for spill in spills]
+        sources.append(iter(chunk))
+        yield from heapq.merge(*sources, key=key)
+    finally:
+        for spill in spills:
+            spill.close()
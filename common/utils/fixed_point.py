@@ -0,0 +1,82 @@
+from decimal import Decimal, InvalidOperation
+
+# Decimal places written by DataExporter._format_decimal
+EXPORT_DECIMAL_PLACES = 10
+
+
+class FixedPointError(ValueError):
+    """Raised when an amount cannot be represented exactly at the fixed-point scale."""
+
+
+def decimal_to_fixed(value: Decimal, scale: int) -> int:
+    """
+    Converts a Decimal into an integer scaled by 10**scale.
+    Raises FixedPointError if the value has more decimal places than the scale.
+    """
+    scaled = value.scaleb(scale)
+    if not scaled.is_finite() or scaled != scaled.to_integral_value():
+        raise FixedPointError(f"Amount {value} exceeds the fixed-point scale of {scale}")
+    return int(scaled)
+
+
+def fixed_to_decimal(value: int, scale: int) -> Decimal:
+    return Decimal(int(value)).scaleb(-scale)
+
+
+def parse_fixed(value: str, scale: int, decimal_separator: str = ".") -> int:
+    """
+    Parses an amount string straight into an integer scaled by 10**scale,
+    without creating a Decimal. Empty values are 0.
+    Unusual notations (exponents, whitespace) are parsed through Decimal.
+    Raises FixedPointError if the value has more decimal places than the scale.
+    """
+    if not value:
+        return 0
+
+    if decimal_separator != ".":
+        value = value.replace(decimal_separator, ".")
+
+    int_part, _, fraction = value.partition(".")
+    if len(fraction) > scale:
+        if fraction[scale:].strip("0"):
+            raise FixedPointError(
+                f"Amount {value} exceeds the fixed-point scale of {scale}"
+            )
+        fraction = fraction[:scale]
+
+    try:
+        return int(int_part + fraction.ljust(scale, "0"))
+    except ValueError:
+        pass
+
+    try:
+        number = Decimal(value.strip() or "0")
+    except InvalidOperation:
+        raise FixedPointError(f"Invalid amount: {value}") from None
+    return decimal_to_fixed(number, scale)
+
+
+def format_fixed(value: int, scale: int) -> str:
+    """
+    Formats a fixed-point integer like `DataExporter._format_decimal` formats
+    the equivalent Decimal (10 decimal places, trailing zeros stripped).
+    """
+    sign = "-" if value < 0 else ""
+    value = abs(value)
+
+    if scale > EXPORT_DECIMAL_PLACES:
+        # Round half to even to 10 places, like the Decimal formatting does
+        value, remainder = divmod(value, 10 ** (scale - EXPORT_DECIMAL_PLACES))
+        half = 5 * 10 ** (scale - EXPORT_DECIMAL_PLACES - 1)
+        if remainder > half or (remainder == half and value % 2):
+            value += 1
+        scale = EXPORT_DECIMAL_PLACES
+
+    if scale == 0:
+        return f"{sign}{value}"
+
+    int_part, fraction = divmod(value, 10**scale)
+    fraction_str = str(fraction).rjust(scale, "0").rstrip("0")
+    if not fraction_str:
+        return f"{sign}{int_part}"
+    return f"{sign}{int_part}.{fraction_str}"
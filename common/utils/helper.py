@@ -1,7 +1,10 @@
 from datetime import datetime
 from decimal import Decimal
+from typing import Iterable, Iterator
 
+from common import metrics
 from common.models.records import RawRecord, TargetRecord
+from common.utils.external_sort import external_sort
 
 COINTRACKING_DATE_FORMATS = (
     "%Y-%m-%d %H:%M:%S",  # International / ISO
@@ -52,26 +55,52 @@ def to_decimal(value: str) -> Decimal:
     return Decimal(value.replace(",", "."))
 
 
+def aggregation_sort_key(r: RawRecord) -> tuple:
+    return (
+        r.exchange,
+        r.group,
+        r.type,
+        r.buy_currency,
+        r.sell_currency,
+        r.fee_currency,
+        r.date,
+    )
+
+
+def calculation_sort_key(r: RawRecord) -> tuple:
+    return (
+        r.exchange,
+        r.date,
+    )
+
+
 def sort_records_for_aggregation(records: list[RawRecord]) -> None:
     """Sort logic specific to the Aggregation Tool."""
-    records.sort(
-        key=lambda r: (
-            r.exchange,
-            r.group,
-            r.type,
-            r.buy_currency,
-            r.sell_currency,
-            r.fee_currency,
-            r.date,
-        )
-    )
+    with metrics.stage("sort"):
+        records.sort(key=aggregation_sort_key)
+    metrics.add_rows("sort", len(records), len(records))
 
 
 def sort_records_for_calculation(records: list[RawRecord]) -> None:
     """Sort logic specific to the Calculation Tool."""
-    records.sort(
-        key=lambda r: (
-            r.exchange,
-            r.date,
-        )
+    with metrics.stage("sort"):
+        records.sort(key=calculation_sort_key)
+    metrics.add_rows("sort", len(records), len(records))
+
+
+def iter_sorted_for_aggregation(
+    records: Iterable[RawRecord], max_records_in_memory: int
+) -> Iterator[RawRecord]:
+    """Bounded-memory variant of `sort_records_for_aggregation`."""
+    return metrics.iter_stage(
+        "sort", external_sort(records, aggregation_sort_key, max_records_in_memory)
+    )
+
+
+def iter_sorted_for_calculation(
+    records: Iterable[RawRecord], max_records_in_memory: int
+) -> Iterator[RawRecord]:
+    """Bounded-memory variant of `sort_records_for_calculation`."""
+    return metrics.iter_stage(
+        "sort", external_sort(records, calculation_sort_key, max_records_in_memory)
     )
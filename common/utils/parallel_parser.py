@@ -0,0 +1,144 @@
+import csv
+import io
+import mmap
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Optional
+
+from common.models.records import RawRecord
+from common.utils.csv_helpers import iter_ct_csv
+from common.utils.row_parser import RowParser
+
+if TYPE_CHECKING:
+    from common.data_importer import RecordFilter
+
+# Block size used to count quotes without copying the whole file
+_SCAN_BLOCK_SIZE = 16 * 1024 * 1024
+# Chunks per worker, so that uneven chunks still keep all workers busy
+_CHUNKS_PER_WORKER = 4
+# Chunks per worker submitted ahead of the consumer; bounds the parsed records held
+_IN_FLIGHT_PER_WORKER = 2
+
+
+def _count_quotes(data: mmap.mmap, start: int, end: int) -> int:
+    count = 0
+    for block_start in range(start, end, _SCAN_BLOCK_SIZE):
+        block_end = min(block_start + _SCAN_BLOCK_SIZE, end)
+        count += data[block_start:block_end].count(b'"')
+    return count
+
+
+def find_row_boundaries(path: str, chunk_count: int) -> list[tuple[int, int]]:
+    """
+    Splits the data rows of a CSV file into up to `chunk_count` byte ranges.
+
+    Ranges only start after a newline that lies outside a quoted field: a
+    newline is a row boundary if the number of quotes before it is even
+    (escaped quotes "" do not change the parity). The header row is excluded.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            size = len(data)
+            scanned = 0
+            quotes = 0
+
+            def next_row_start(target: int) -> int:
+                nonlocal scanned, quotes
+                search = max(target, scanned)
+                while True:
+                    newline = data.find(b"\n", search)
+                    if newline < 0:
+                        return size
+                    quotes += _count_quotes(data, scanned, newline)
+                    scanned = newline
+                    if quotes % 2 == 0:
+                        return newline + 1
+                    search = newline + 1
+
+            data_start = next_row_start(0)
+            step = max((size - data_start) // chunk_count, 1)
+
+            starts = [data_start]
+            for k in range(1, chunk_count):
+                start = next_row_start(data_start + k * step)
+                if start >= size:
+                    break
+                if start > starts[-1]:
+                    starts.append(start)
+
+    ends = starts[1:] + [size]
+    return [(start, end) for start, end in zip(starts, ends) if start < end]
+
+
+def _parse_chunk(
+    path: str,
+    start: int,
+    end: int,
+    parser: RowParser,
+    record_filter: Optional["RecordFilter"],
+) -> list[RawRecord]:
+    """
+    Worker: parses the rows of one byte range and applies the filter.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+
+    parse = parser.parse
+    records = []
+    for row in csv.reader(io.StringIO(text, newline="")):
+        if not row:
+            continue
+        record = parse(row)
+        if record_filter is None or record_filter.matches(record):
+            records.append(record)
+    return records
+
+
+def iter_csv_file_parallel(
+    path: str,
+    workers: int,
+    date_format: str = "",
+    decimal_separator: str = "",
+    fixed_point_scale: Optional[int] = None,
+    record_filter: Optional["RecordFilter"] = None,
+) -> Iterator[RawRecord]:
+    """
+    Parses a CoinTracking CSV file in a process pool.
+
+    The file is split into byte ranges on safe row boundaries, each range is
+    parsed (and filtered) in a worker, and the results are yielded in file
+    order. The result equals the serial `DataImporter.iter_csv_file`.
+    Only `workers * 2` chunks are in flight at a time, so a slow consumer does
+    not let parsed chunks pile up in memory.
+    """
+    first_row = next(iter_ct_csv(path), None)
+    if first_row is None:
+        return
+
+    # Detect the formats once, so that all workers parse identically
+    parser = RowParser.for_file(
+        first_row, date_format, decimal_separator, fixed_point_scale
+    )
+    chunks = iter(find_row_boundaries(str(Path(path)), workers * _CHUNKS_PER_WORKER))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+
+        def submit(chunks_to_submit):
+            for start, end in chunks_to_submit:
+                futures.append(
+                    pool.submit(_parse_chunk, path, start, end, parser, record_filter)
+                )
+
+        futures = deque()
+        submit(islice(chunks, workers * _IN_FLIGHT_PER_WORKER))
+        while futures:
+            records = futures.popleft().result()
+            # Refill first, so the workers keep parsing while the consumer is busy
+            submit(islice(chunks, 1))
+            yield from records
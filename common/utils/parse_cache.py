@@ -0,0 +1,161 @@
+import gc
+import hashlib
+import json
+import os
+import pickle
+from dataclasses import fields
+from operator import attrgetter
+from pathlib import Path
+from typing import Optional
+
+from common.models.records import RawRecord
+
+# Bump when the entry format or the parsing semantics change
+CACHE_VERSION = 1
+
+_INDEX_FILE = "index.json"
+_ENTRY_SUFFIX = ".records"
+_HASH_BLOCK_SIZE = 1024 * 1024
+_FIELD_NAMES = [f.name for f in fields(RawRecord)]
+
+
+def hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(_HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    Persistent cache of parsed CoinTracking exports.
+
+    Entries are keyed by the content hash of the import file plus the parse
+    options (date/number format, fixed-point scale). The content hash is
+    remembered per path together with size and mtime, so an unchanged file
+    is not re-hashed. A changed file gets a new hash and thus a new entry.
+
+    Entries hold the unfiltered records in a compact binary format (pickled
+    columns with shared strings). The cache directory is bounded by
+    `max_bytes`; the least recently used entries are evicted first.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _load_index(self) -> dict:
+        try:
+            with open(self.cache_dir / _INDEX_FILE, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_index(self, index: dict) -> None:
+        tmp_path = self.cache_dir / f"{_INDEX_FILE}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self.cache_dir / _INDEX_FILE)
+
+    def content_hash(self, path: Path) -> str:
+        """
+        Content hash of `path`; only recomputed if size or mtime changed.
+        """
+        stat = path.stat()
+        index = self._load_index()
+        key = str(path.resolve())
+        known = index.get(key)
+
+        if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+            return known["sha256"]
+
+        sha256 = hash_file(path)
+        index[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256}
+        self._save_index(index)
+        return sha256
+
+    def entry_path(self, path: Path, options: tuple) -> Path:
+        options_digest = hashlib.sha256(
+            repr((CACHE_VERSION, options)).encode()
+        ).hexdigest()[:16]
+        return self.cache_dir / f"{self.content_hash(path)}-{options_digest}{_ENTRY_SUFFIX}"
+
+    def load(self, path: Path, options: tuple) -> Optional[list[RawRecord]]:
+        entry = self.entry_path(path, options)
+
+        # The cyclic GC cannot free anything here, but would rescan all new objects
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with open(entry, "rb") as f:
+                columns = pickle.load(f)
+            records = [RawRecord(*values) for values in zip(*columns)]
+        except FileNotFoundError:
+            return None
+        except (pickle.UnpicklingError, EOFError, ValueError, TypeError):
+            # Damaged or outdated entry: drop it and parse again
+            entry.unlink(missing_ok=True)
+            return None
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+        os.utime(entry)  # mark as recently used
+        return records
+
+    def store(self, path: Path, options: tuple, records: list[RawRecord]) -> None:
+        entry = self.entry_path(path, options)
+
+        # Columns with shared string objects: pickle writes repeated values as references
+        shared: dict = {}
+        columns: list[list] = [[] for _ in _FIELD_NAMES]
+        values_of = attrgetter(*_FIELD_NAMES)
+        for record in records:
+            for column, value in zip(columns, values_of(record)):
+                if isinstance(value, str):
+                    value = shared.setdefault(value, value)
+                column.append(value)
+
+        tmp_path = entry.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(columns, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, entry)
+
+        self.evict(keep=entry)
+
+    def evict(self, keep: Optional[Path] = None) -> None:
+        """
+        Removes least recently used entries until the cache fits `max_bytes`.
+        """
+        entries = [
+            (p.stat().st_mtime, p.stat().st_size, p)
+            for p in self.cache_dir.glob(f"*{_ENTRY_SUFFIX}")
+        ]
+        total = sum(size for _, size, _ in entries)
+
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if entry == keep:
+                continue
+            entry.unlink(missing_ok=True)
+            total -= size
+
+        self._prune_index()
+
+    def _prune_index(self) -> None:
+        """
+        Drops the content hashes of files that no longer exist or that have
+        no cache entry left, so the index does not grow without bound.
+        """
+        cached = {p.name.split("-", 1)[0] for p in self.cache_dir.glob(f"*{_ENTRY_SUFFIX}")}
+        index = self._load_index()
+        pruned = {
+            key: known
+            for key, known in index.items()
+            if known["sha256"] in cached and Path(key).exists()
+        }
+        if len(pruned) != len(index):
+            self._save_index(pruned)
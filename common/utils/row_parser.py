@@ -0,0 +1,207 @@
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from functools import partial
+from typing import Any, Callable, Optional
+
+from common.models.records import RawRecord
+from common.utils.fixed_point import parse_fixed
+from common.utils.helper import COINTRACKING_DATE_FORMATS, parse_date, to_decimal
+
+ISO_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+GERMAN_DATE_FORMAT = "%d.%m.%Y %H:%M:%S"
+
+# Column positions of the amounts and the date in a CoinTracking full export
+AMOUNT_COLUMNS = (1, 3, 5)
+DATE_COLUMN = 10
+
+
+def _parse_iso_date(value: str) -> datetime:
+    # "2021-12-27 02:40:00"
+    if (
+        len(value) == 19
+        and value[4] == value[7] == "-"
+        and value[10] == " "
+        and value[13] == value[16] == ":"
+    ):
+        try:
+            return datetime(
+                int(value[0:4]),
+                int(value[5:7]),
+                int(value[8:10]),
+                int(value[11:13]),
+                int(value[14:16]),
+                int(value[17:19]),
+            )
+        except ValueError:
+            pass
+    return parse_date(value)
+
+
+def _parse_german_date(value: str) -> datetime:
+    # "27.12.2021 02:40:00"
+    if (
+        len(value) == 19
+        and value[2] == value[5] == "."
+        and value[10] == " "
+        and value[13] == value[16] == ":"
+    ):
+        try:
+            return datetime(
+                int(value[6:10]),
+                int(value[3:5]),
+                int(value[0:2]),
+                int(value[11:13]),
+                int(value[14:16]),
+                int(value[17:19]),
+            )
+        except ValueError:
+            pass
+    return parse_date(value)
+
+
+def compile_date_parser(date_format: str) -> Callable[[str], datetime]:
+    """
+    Returns a date parser specialized for `date_format`.
+    Values that do not match the format fall back to `parse_date`.
+    """
+    if date_format == ISO_DATE_FORMAT:
+        return _parse_iso_date
+    if date_format == GERMAN_DATE_FORMAT:
+        return _parse_german_date
+
+    def parse_with_format(value: str) -> datetime:
+        try:
+            return datetime.strptime(value, date_format)
+        except ValueError:
+            return parse_date(value)
+
+    return parse_with_format
+
+
+def _parse_dot_decimal(value: str) -> Decimal:
+    if not value:
+        return Decimal(0)
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        return to_decimal(value)
+
+
+def _parse_comma_decimal(value: str) -> Decimal:
+    if not value:
+        return Decimal(0)
+    try:
+        return Decimal(value.replace(",", "."))
+    except InvalidOperation:
+        return to_decimal(value)
+
+
+def compile_decimal_parser(
+    decimal_separator: str, fixed_point_scale: Optional[int] = None
+) -> Callable[[str], Any]:
+    """
+    Returns an amount parser specialized for `decimal_separator`.
+    The "." parser skips the strip/replace of `to_decimal`; unusual values
+    (whitespace, other separators) fall back to `to_decimal`.
+    With a `fixed_point_scale`, amounts are parsed into scaled ints instead.
+    """
+    if fixed_point_scale is not None:
+        return partial(
+            parse_fixed, scale=fixed_point_scale, decimal_separator=decimal_separator
+        )
+    if decimal_separator == ",":
+        return _parse_comma_decimal
+    return _parse_dot_decimal
+
+
+def detect_date_format(value: str) -> Optional[str]:
+    for fmt in COINTRACKING_DATE_FORMATS:
+        try:
+            datetime.strptime(value, fmt)
+            return fmt
+        except ValueError:
+            continue
+    return None
+
+
+def detect_decimal_separator(row: list[str]) -> str:
+    for column in AMOUNT_COLUMNS:
+        if "," in row[column]:
+            return ","
+    return "."
+
+
+class RowParser:
+    """
+    Row parser compiled for the date and number format of one file.
+
+    The formats are taken from the config or detected once from a sample row,
+    instead of trying every known format for every row.
+    With a `fixed_point_scale`, amounts become ints scaled by 10**scale.
+
+    The low-cardinality text fields (type, currencies, exchange, group) are
+    interned through `symbols`, so all records share one string object per
+    distinct value instead of holding a fresh copy per CSV row.
+    """
+
+    def __init__(
+        self,
+        date_format: str = ISO_DATE_FORMAT,
+        decimal_separator: str = ".",
+        fixed_point_scale: Optional[int] = None,
+        symbols: Optional[dict[str, str]] = None,
+    ):
+        self.date_format = date_format
+        self.decimal_separator = decimal_separator
+        self.fixed_point_scale = fixed_point_scale
+        self.symbols = {} if symbols is None else symbols
+        self._parse_date = compile_date_parser(date_format)
+        self._to_decimal = compile_decimal_parser(decimal_separator, fixed_point_scale)
+
+    def __reduce__(self):
+        # The compiled parsers are closures; rebuild them from the formats (e.g. in worker processes).
+        # Worker processes start with an empty symbol table.
+        return (RowParser, (self.date_format, self.decimal_separator, self.fixed_point_scale))
+
+    @classmethod
+    def for_file(
+        cls,
+        sample_row: Optional[list[str]],
+        date_format: str = "",
+        decimal_separator: str = "",
+        fixed_point_scale: Optional[int] = None,
+        symbols: Optional[dict[str, str]] = None,
+    ) -> "RowParser":
+        """
+        Builds a parser for a file. Empty format values are detected from `sample_row`.
+        """
+        if not date_format:
+            date_format = ISO_DATE_FORMAT
+            if sample_row:
+                date_format = detect_date_format(sample_row[DATE_COLUMN]) or date_format
+
+        if not decimal_separator:
+            decimal_separator = "."
+            if sample_row:
+                decimal_separator = detect_decimal_separator(sample_row)
+
+        return cls(date_format, decimal_separator, fixed_point_scale, symbols)
+
+    def parse(self, row: list[str]) -> RawRecord:
+        to_decimal = self._to_decimal
+        intern = self.symbols.setdefault
+        return RawRecord(
+            type=intern(row[0], row[0]),
+            buy_amount=to_decimal(row[1]),
+            buy_currency=intern(row[2], row[2]),
+            sell_amount=to_decimal(row[3]),
+            sell_currency=intern(row[4], row[4]),
+            fee_amount=to_decimal(row[5]),
+            fee_currency=intern(row[6], row[6]),
+            exchange=intern(row[7], row[7]),
+            group=intern(row[8], row[8]),
+            comment=row[9],
+            date=self._parse_date(row[10]),
+            lpn=row[11],
+            tx_id=row[12],
+        )
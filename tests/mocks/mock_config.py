@@ -1,3 +1,4 @@
+from pathlib import Path
 from typing import Optional
 
 
@@ -5,14 +6,64 @@ class MockConfig:
     def __init__(
         self,
         coin: str = "",
-        decimal_separator: str = ".",
-        date_format: str = "%Y-%m-%d %H:%M:%S",
+        decimal_separator: str = "",
+        date_format: str = "",
         ct_exchanges: Optional[list[str]] = None,
+        import_file: str = "",
+        export_file: str = "",
+        data_format: str = "CoinTracking",
+        ct_year: str = "",
+        max_records_in_memory: int = 0,
+        include_fees: bool = False,
+        fixed_point_scale: int = 10,
+        amount_mode: str = "decimal",
+        fixed_point_fallback: str = "decimal",
+        parse_cache_dir: str = "",
+        parse_cache_max_mb: int = 1024,
+        parse_workers: int = 1,
+        aggregation_workers: int = 1,
+        incremental_state_file: str = "",
+        balance_checkpoint_file: str = "",
+        scan_window: int = 3,
+        export_format: str = "csv",
+        background_decompression: bool = False,
+        asset_classes: Optional[dict[str, list[str]]] = None,
+        default_asset_class: str = "",
+        aggregation_window: str = "day",
+        aggregation_windows: Optional[dict[str, str]] = None,
+        aggregation_exchange_windows: Optional[dict[str, dict[str, str]]] = None,
+        max_rows: int = 0,
+        query_cache_size: int = 256,
     ):
         self._coin = coin
         self._decimal_separator = decimal_separator
         self._date_format = date_format
         self._ct_exchanges = ct_exchanges or []
+        self._import_file = import_file
+        self._export_file = export_file
+        self._data_format = data_format
+        self._ct_year = ct_year
+        self._max_records_in_memory = max_records_in_memory
+        self._include_fees = include_fees
+        self._fixed_point_scale = fixed_point_scale
+        self._amount_mode = amount_mode
+        self._fixed_point_fallback = fixed_point_fallback
+        self._parse_cache_dir = parse_cache_dir
+        self._parse_cache_max_mb = parse_cache_max_mb
+        self._parse_workers = parse_workers
+        self._aggregation_workers = aggregation_workers
+        self._incremental_state_file = incremental_state_file
+        self._balance_checkpoint_file = balance_checkpoint_file
+        self._scan_window = scan_window
+        self._export_format = export_format
+        self._background_decompression = background_decompression
+        self._asset_classes = asset_classes or {}
+        self._default_asset_class = default_asset_class
+        self._aggregation_window = aggregation_window
+        self._aggregation_windows = aggregation_windows or {}
+        self._aggregation_exchange_windows = aggregation_exchange_windows or {}
+        self._max_rows = max_rows
+        self._query_cache_size = query_cache_size
 
     def get_coin(self) -> str:
         return self._coin
@@ -25,3 +76,78 @@ class MockConfig:
 
     def get_ct_exchanges(self) -> list[str]:
         return self._ct_exchanges
+
+    def get_import_file(self) -> str:
+        return self._import_file
+
+    def get_export_file(self) -> Path:
+        return Path(self._export_file)
+
+    def get_data_format(self) -> str:
+        return self._data_format
+
+    def get_ct_year(self) -> str:
+        return self._ct_year
+
+    def get_max_records_in_memory(self) -> int:
+        return self._max_records_in_memory
+
+    def get_include_fees(self) -> bool:
+        return self._include_fees
+
+    def get_fixed_point_scale(self) -> int:
+        return self._fixed_point_scale
+
+    def get_amount_mode(self) -> str:
+        return self._amount_mode
+
+    def get_fixed_point_fallback(self) -> str:
+        return self._fixed_point_fallback
+
+    def get_parse_cache_dir(self) -> str:
+        return self._parse_cache_dir
+
+    def get_parse_cache_max_mb(self) -> int:
+        return self._parse_cache_max_mb
+
+    def get_parse_workers(self) -> int:
+        return self._parse_workers
+
+    def get_aggregation_workers(self) -> int:
+        return self._aggregation_workers
+
+    def get_incremental_state_file(self) -> str:
+        return self._incremental_state_file
+
+    def get_balance_checkpoint_file(self) -> str:
+        return self._balance_checkpoint_file
+
+    def get_scan_window(self) -> int:
+        return self._scan_window
+
+    def get_export_format(self) -> str:
+        return self._export_format
+
+    def get_background_decompression(self) -> bool:
+        return self._background_decompression
+
+    def get_asset_classes(self) -> dict[str, list[str]]:
+        return self._asset_classes
+
+    def get_default_asset_class(self) -> str:
+        return self._default_asset_class
+
+    def get_aggregation_window(self) -> str:
+        return self._aggregation_window
+
+    def get_aggregation_windows(self) -> dict[str, str]:
+        return self._aggregation_windows
+
+    def get_aggregation_exchange_windows(self) -> dict[str, dict[str, str]]:
+        return self._aggregation_exchange_windows
+
+    def get_max_rows(self) -> int:
+        return self._max_rows
+
+    def get_query_cache_size(self) -> int:
+        return self._query_cache_size
@@ -0,0 +1,68 @@
+from datetime import datetime
+from decimal import Decimal
+
+from aggregation_tool.aggregator import HashCoinTrackingAggregator
+from common.asset_registry import COIN_BUY, COIN_SELL, AssetRegistry
+from common.models.records import RawRecord
+from tests.mocks.mock_config import MockConfig
+
+
+def test_default_classes():
+    assets = AssetRegistry()
+
+    assert assets.asset_class("BTC") == "crypto"
+    assert assets.asset_class("DOGE") == ""
+    assert assets.classify_trade("BTC", "EUR") == COIN_BUY
+    assert assets.classify_trade("USDT", "ETH") == COIN_SELL
+    assert assets.classify_trade("BTC", "ETH") is None
+    assert assets.classify_trade("DOGE", "EUR") is None
+
+
+def test_configured_classes():
+    assets = AssetRegistry({"fiat": ["EUR", "CHF"], "meme": ["PEPE"]}, default_class="crypto")
+
+    assert assets.asset_class("PEPE") == "meme"
+    assert assets.classify_trade("DOGE", "CHF") == COIN_BUY
+    assert assets.classify_trade("PEPE", "EUR") is None
+    assert assets.classify_trade("USD", "BTC") is None  # USD is no longer fiat
+
+
+def test_configured_classes_win_over_built_in_classes():
+    assets = AssetRegistry({"crypto": ["BTC", "USDT", "EUR"]})
+
+    assert assets.asset_class("USDT") == "crypto"
+    assert assets.asset_class("EUR") == "crypto"
+    assert assets.asset_class("USDC") == "stablecoin"
+    assert assets.asset_class("ETH") == ""  # the built-in crypto list is replaced
+    assert assets.classify_trade("BTC", "USDT") is None
+
+
+def _trade(buy_currency: str, hour: int) -> RawRecord:
+    return RawRecord(
+        type="Trade",
+        buy_amount=Decimal(1),
+        buy_currency=buy_currency,
+        sell_amount=Decimal(10),
+        sell_currency="EUR",
+        fee_amount=Decimal(0),
+        fee_currency="",
+        exchange="Kraken",
+        group="",
+        comment="",
+        date=datetime(2022, 1, 3, hour),
+        lpn="",
+        tx_id="",
+    )
+
+
+def test_aggregator_adjusts_configured_coins():
+    records = [_trade("DOGE", 8), _trade("DOGE", 9)]
+
+    unadjusted = HashCoinTrackingAggregator(MockConfig()).aggregate_lines(list(records))
+    adjusted = HashCoinTrackingAggregator(
+        MockConfig(asset_classes={"crypto": ["DOGE"]})
+    ).aggregate_lines(list(records))
+
+    assert unadjusted[0].date == datetime(2022, 1, 3, 9)
+    assert adjusted[0].date == datetime(2022, 1, 3, 23, 55)
+    assert adjusted[0].buy_amount == 2
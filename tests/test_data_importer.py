@@ -0,0 +1,219 @@
+import bz2
+import gzip
+import json
+import lzma
+import pickle
+import threading
+import types
+from concurrent.futures import Future
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+
+from common.data_importer import DataImporter
+from common.test_utils.sample_export import CSV_HEADER, CSV_ROWS, write_export
+from common.utils import parallel_parser
+from common.utils.csv_helpers import open_ct_csv
+from tests.mocks.mock_config import MockConfig
+
+def test_iter_data_is_lazy_and_matches_load_data(tmp_path):
+    config = MockConfig(import_file=write_export(tmp_path))
+    importer = DataImporter(config)
+
+    stream = importer.iter_data()
+
+    assert isinstance(stream, types.GeneratorType)
+    assert list(stream) == importer.load_data()
+    assert len(importer.load_data()) == 4
+
+
+def test_iter_data_applies_filters(tmp_path):
+    config = MockConfig(
+        import_file=write_export(tmp_path),
+        ct_exchanges=["Kraken"],
+        ct_year="2021",
+        coin="KFEE",
+    )
+
+    records = list(DataImporter(config, check_coin=True).iter_data())
+
+    assert [r.tx_id for r in records] == ["Ledger-4"]
+
+
+def to_german_format(row: str) -> str:
+    """Rewrites a CSV row to German formatting (dd.mm.yyyy, comma decimals)."""
+    cells = row.rstrip("\n").split('","')
+    for i in (1, 3, 5):
+        cells[i] = cells[i].replace(".", ",")
+    date, time = cells[10].split(" ")
+    year, month, day = date.split("-")
+    cells[10] = f"{day}.{month}.{year} {time}"
+    return '","'.join(cells) + "\n"
+
+
+def test_german_export_is_detected_per_file(tmp_path):
+    german = tmp_path / "export-de.csv"
+    german.write_text(
+        CSV_HEADER + "".join(to_german_format(r) for r in CSV_ROWS if r.strip()),
+        encoding="utf-8",
+    )
+
+    expected = DataImporter.parse_csv_file(write_export(tmp_path))
+
+    assert DataImporter.parse_csv_file(str(german)) == expected
+    # A wrong format hint is slower, but still parsed correctly
+    hinted = DataImporter.iter_csv_file(str(german), "%Y-%m-%d %H:%M:%S", ".")
+    assert list(hinted) == expected
+
+
+def test_parse_cache_serves_unfiltered_records_and_evicts(tmp_path):
+    export = write_export(tmp_path)
+    cache_dir = tmp_path / "cache"
+    config = MockConfig(import_file=export, parse_cache_dir=str(cache_dir))
+
+    expected = DataImporter(config).load_data()
+    entries = list(cache_dir.glob("*.records"))
+    assert len(entries) == 1
+
+    # A different filter is served from the same entry
+    filtered = DataImporter(
+        MockConfig(import_file=export, parse_cache_dir=str(cache_dir), ct_year="2022")
+    ).load_data()
+    assert filtered == [r for r in expected if r.date.year == 2022]
+    assert list(cache_dir.glob("*.records")) == entries
+
+    # Changing the file invalidates the entry; the size limit evicts the old one
+    with open(export, "a", encoding="utf-8") as f:
+        f.write(CSV_ROWS[0].replace("Ledger-1", "Ledger-9"))
+    tiny_config = MockConfig(
+        import_file=export, parse_cache_dir=str(cache_dir), parse_cache_max_mb=0
+    )
+    assert len(DataImporter(tiny_config).load_data()) == len(expected) + 1
+    assert [p.name for p in cache_dir.glob("*.records")] != [p.name for p in entries]
+    assert len(list(cache_dir.glob("*.records"))) == 1
+
+    # Hashes of removed files and evicted entries are dropped from the index
+    other = tmp_path / "other.csv"
+    other.write_text(CSV_HEADER + CSV_ROWS[1], encoding="utf-8")
+    DataImporter(
+        MockConfig(import_file=str(other), parse_cache_dir=str(cache_dir), parse_cache_max_mb=0)
+    ).load_data()
+    other.unlink()
+    DataImporter(tiny_config).load_data()  # its entry was evicted by the other file
+    index = json.loads((cache_dir / "index.json").read_text())
+    assert list(index) == [str(Path(export).resolve())]
+
+
+def test_parallel_parsing_matches_serial_parsing(tmp_path):
+    # Comments with embedded newlines and escaped quotes must not split rows
+    tricky = '"Trade","1","ADA","2","EUR","","","Kraken","","line 1\nsaid ""hi""\n","2022-02-0{} 10:00:00","","Tx-{}"\n'
+    rows = [tricky.format(i % 9 + 1, i) if i % 3 else r for i, r in enumerate(CSV_ROWS * 40)]
+    path = tmp_path / "export.csv"
+    path.write_text("﻿" + CSV_HEADER + "".join(rows), encoding="utf-8")
+
+    serial = list(DataImporter.iter_csv_file(str(path)))
+    config = MockConfig(import_file=str(path), parse_workers=3, ct_exchanges=["Kraken"])
+    parallel = DataImporter(config).load_data()
+
+    assert parallel == [r for r in serial if r.exchange == "Kraken"]
+    assert any("\n" in r.comment for r in parallel)
+
+
+class _InlineExecutor:
+    """Runs submitted chunks immediately in this process and counts them."""
+
+    submitted = 0
+
+    def __init__(self, max_workers):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, fn, *args):
+        _InlineExecutor.submitted += 1
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+def test_parallel_parsing_bounds_the_chunks_in_flight(tmp_path, monkeypatch):
+    path = tmp_path / "export.csv"
+    path.write_text(CSV_HEADER + "".join(CSV_ROWS * 100), encoding="utf-8")
+    monkeypatch.setattr(parallel_parser, "ProcessPoolExecutor", _InlineExecutor)
+    monkeypatch.setattr(_InlineExecutor, "submitted", 0)
+
+    records = parallel_parser.iter_csv_file_parallel(str(path), workers=3)
+    next(records)
+    assert _InlineExecutor.submitted == 3 * 2 + 1  # the first chunk is already replaced
+
+    assert len(list(records)) == 399
+    assert _InlineExecutor.submitted == 3 * 4
+
+
+@pytest.mark.parametrize(
+    "opener, file_name",
+    [
+        (gzip.open, "export.csv.gz"),
+        (bz2.open, "export.csv.bz2"),
+        (lzma.open, "export.csv.xz"),
+        (gzip.open, "export.csv"),  # detected by magic bytes
+    ],
+)
+@pytest.mark.parametrize("background_decompression", [False, True])
+def test_compressed_exports_are_read_directly(
+    tmp_path, opener, file_name, background_decompression
+):
+    expected = DataImporter(MockConfig(import_file=write_export(tmp_path))).load_data()
+
+    path = tmp_path / "compressed" / file_name
+    path.parent.mkdir()
+    with opener(path, "wt", encoding="utf-8") as f:
+        f.write(CSV_HEADER + "".join(CSV_ROWS))
+
+    config = MockConfig(
+        import_file=str(path),
+        parse_workers=2,  # compressed files are parsed serially
+        background_decompression=background_decompression,
+    )
+    assert DataImporter(config).load_data() == expected
+
+
+def test_failed_background_decompression_does_not_hang(tmp_path):
+    path = tmp_path / "export.csv.gz"
+    data = gzip.compress((CSV_HEADER + "".join(CSV_ROWS * 100)).encode())
+    path.write_bytes(data[: len(data) // 2])  # truncated
+
+    errors = []
+
+    def read_twice(f):
+        for _ in range(2):
+            try:
+                f.read()
+            except EOFError as error:
+                errors.append(error)
+
+    f = open_ct_csv(str(path), background_decompression=True)
+    reader = threading.Thread(target=read_twice, args=(f,), daemon=True)
+    reader.start()
+    reader.join(timeout=10)
+
+    assert not reader.is_alive()  # a hanging read would also block close()
+    f.close()
+    assert len(errors) == 2
+
+
+def test_records_are_slotted_and_share_interned_strings(tmp_path):
+    config = MockConfig(import_file=write_export(tmp_path))
+    records = DataImporter(config).load_data()
+
+    assert not hasattr(records[0], "__dict__")
+    kraken = [r.exchange for r in records if r.exchange == "Kraken"]
+    assert len(kraken) == 3 and all(e is kraken[0] for e in kraken)
+    # Pickled records (external sort, worker processes) keep all fields
+    assert pickle.loads(pickle.dumps(records)) == records
+    assert replace(records[0], group="Bot").group == "Bot"
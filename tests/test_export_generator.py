@@ -0,0 +1,19 @@
+from benchmarks.export_generator import ExportSettings, iter_export_rows, write_export
+from common.data_importer import DataImporter
+
+
+def test_generator_is_deterministic_and_parseable(tmp_path):
+    settings = ExportSettings.german(rows=3000, seed=7, bot_trades_per_day=50)
+
+    rows = list(iter_export_rows(settings))
+    assert len(rows) == 3000
+    assert rows == list(iter_export_rows(settings))
+    assert rows != list(iter_export_rows(ExportSettings.german(rows=3000, seed=8)))
+
+    path = tmp_path / "export.csv"
+    write_export(path, settings)
+    records = DataImporter.parse_csv_file(str(path))
+
+    assert [r.tx_id for r in records] == [row[12] for row in rows]
+    assert {r.type for r in records} >= {"Trade", "Deposit", "Margin Fee", "Margin Profit"}
+    assert all(a.date <= b.date for a, b in zip(records, records[1:]))
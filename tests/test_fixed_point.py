@@ -0,0 +1,102 @@
+from dataclasses import astuple
+from decimal import Decimal
+
+import pytest
+
+from aggregation_tool.aggregator import HashCoinTrackingAggregator
+from calculation_tool.calculator import Calculator
+from common.data_exporter import DataExporter
+from common.data_importer import DataImporter
+from common.test_utils.sample_export import write_export
+from common.utils.fixed_point import FixedPointError, format_fixed, parse_fixed
+from tests.mocks.mock_config import MockConfig
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("", 0),
+        ("0.2", 2_000_000_000),
+        ("-0.5", -5_000_000_000),
+        (".5", 5_000_000_000),
+        ("400", 4_000_000_000_000),
+        ("0.00000000", 0),
+        ("0E-8", 0),
+        ("1.5E+2", 1_500_000_000_000),
+        (" 1.5 ", 15_000_000_000),
+        ("0.12345678900000", 1_234_567_890),
+    ],
+)
+def test_parse_fixed(value, expected):
+    assert parse_fixed(value, 10) == expected
+
+
+@pytest.mark.parametrize(
+    "value, scale",
+    [
+        ("0.123456789012", 10),
+        ("123.4567890123", 8),
+        ("-0.00000000004", 8),
+        ("-0.00000000004", 10),
+    ],
+)
+def test_parse_fixed_fails_loudly_beyond_scale(value, scale):
+    with pytest.raises(FixedPointError):
+        parse_fixed(value, scale)
+
+
+@pytest.mark.parametrize(
+    "value, scale",
+    [
+        (value, scale)
+        for value in ["0", "0.2", "-0.5", "400", "123.4567890123", "-0.00000000004"]
+        for scale in [8, 10, 12]
+        # Values with more decimal places fail, see above
+        if -Decimal(value).as_tuple().exponent <= scale
+    ],
+)
+def test_format_fixed_matches_decimal_formatting(value, scale):
+    fixed = parse_fixed(value, scale)
+
+    assert format_fixed(fixed, scale) == DataExporter._format_decimal(Decimal(value))
+
+
+def test_fixed_point_pipeline_matches_decimal_pipeline(tmp_path):
+    path = write_export(tmp_path)
+    exporter = DataExporter(fixed_point_scale=10)
+
+    decimal_records = DataImporter.parse_csv_file(path)
+    fixed_records = list(DataImporter.iter_csv_file(path, fixed_point_scale=10))
+    assert all(isinstance(r.buy_amount, int) for r in fixed_records)
+
+    def formatted(records):
+        return [[exporter.format_value(v) for v in astuple(r)] for r in records]
+
+    aggregator = HashCoinTrackingAggregator()
+    assert formatted(aggregator.aggregate_lines(fixed_records)) == formatted(
+        aggregator.aggregate_lines(decimal_records)
+    )
+
+    calculator = Calculator(MockConfig(coin="KFEE", include_fees=True))
+    assert formatted(calculator.track_balance(fixed_records)) == formatted(
+        calculator.track_balance(decimal_records)
+    )
+
+
+@pytest.mark.parametrize("fallback", ["decimal", "error"])
+def test_load_with_fallback(tmp_path, fallback):
+    path = write_export(tmp_path)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('"Deposit","0.123456789012345","ADA","","","","","Kraken","","","2022-01-04 08:00:00","",""\n')
+    importer = DataImporter(
+        MockConfig(import_file=path, amount_mode="fixed", fixed_point_fallback=fallback)
+    )
+
+    if fallback == "error":
+        with pytest.raises(FixedPointError):
+            importer.load_with_fallback()
+        return
+
+    records = importer.load_with_fallback()
+    assert importer.amount_mode == "decimal"
+    assert records[-1].buy_amount == Decimal("0.123456789012345")
@@ -0,0 +1,53 @@
+import json
+import pstats
+
+from common import metrics
+from common.data_importer import DataImporter
+from common.metrics import Metrics
+from common.test_utils.sample_export import write_export
+from common.utils.helper import sort_records_for_calculation
+from tests.mocks.mock_config import MockConfig
+
+
+def test_hooks_are_no_ops_without_collector():
+    records = [1, 2, 3]
+
+    assert metrics.iter_stage("parse", records) is records
+    assert metrics.counted("aggregate", records) is records
+    with metrics.stage("sort"):
+        pass
+
+
+def test_stages_of_a_streamed_import(tmp_path):
+    config = MockConfig(import_file=write_export(tmp_path), ct_exchanges=["Kraken"])
+    collector = Metrics(trace_memory=True)
+
+    with metrics.collect(collector):
+        records = DataImporter(config).load_data()
+        sort_records_for_calculation(records)
+
+    report = collector.report()
+    stages = report["stages"]
+    assert list(stages) == ["read", "parse", "filter", "sort"]
+    assert stages["read"]["rows_out"] == 4
+    assert stages["parse"]["rows_in"] == 4
+    assert stages["filter"]["rows_in"] == 4
+    assert stages["filter"]["rows_out"] == len(records) == 3
+    assert stages["sort"]["peak_bytes"] >= 0
+    # Stage times are exclusive, so they add up to at most the run time
+    assert sum(s["wall_seconds"] for s in stages.values()) <= report["wall_seconds"] + 1e-6
+
+
+def test_write_report_and_profile(tmp_path):
+    config = MockConfig(import_file=write_export(tmp_path))
+    collector = Metrics(profile_stages=["parse"], profile_dir=tmp_path / "profiles")
+
+    with metrics.collect(collector):
+        DataImporter(config).load_data()
+    collector.write(str(tmp_path / "metrics.json"))
+
+    with open(tmp_path / "metrics.json") as f:
+        report = json.load(f)
+    assert report["stages"]["parse"]["rows_out"] == 4
+    stats = pstats.Stats(str(tmp_path / "profiles" / "parse.pstats"))
+    assert stats.total_calls > 0
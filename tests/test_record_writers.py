@@ -0,0 +1,50 @@
+import gzip
+import json
+import lzma
+
+import pytest
+
+from common.data_exporter import DataExporter
+from common.record_writers import iter_binary_records
+from common.test_utils.random_records import make_random_records
+from common.utils.csv_helpers import read_ct_csv
+
+FIELD_NAMES = [
+    "type", "buy_amount", "buy_currency", "sell_amount", "sell_currency",
+    "fee_amount", "fee_currency", "exchange", "group", "comment", "date", "lpn", "tx_id",
+]
+
+
+def export(tmp_path, export_format, records):
+    path = tmp_path / f"export.{export_format}"
+    # A generator: the exporter must not need a list
+    DataExporter(export_format=export_format).save_raw_data(path, (r for r in records))
+    return path
+
+
+@pytest.mark.parametrize("export_format, opener", [("csv.gz", gzip.open), ("csv.xz", lzma.open)])
+def test_compressed_csv_matches_csv(tmp_path, export_format, opener):
+    records = make_random_records(500, 11)
+    csv_path = export(tmp_path, "csv", records)
+
+    with opener(export(tmp_path, export_format, records), "rt", encoding="utf-8-sig") as f:
+        assert f.read() == csv_path.read_text(encoding="utf-8-sig")
+
+
+@pytest.mark.parametrize("export_format", ["jsonl", "binary"])
+def test_structured_formats_match_csv(tmp_path, export_format):
+    records = make_random_records(500, 12)
+    expected = [dict(zip(FIELD_NAMES, row)) for row in read_ct_csv(export(tmp_path, "csv", records))]
+
+    path = export(tmp_path, export_format, records)
+    if export_format == "jsonl":
+        result = [json.loads(line) for line in path.read_text().splitlines()]
+    else:
+        result = list(iter_binary_records(path))
+
+    assert result == expected
+
+
+def test_unknown_export_format():
+    with pytest.raises(ValueError, match="Unknown export format"):
+        DataExporter(export_format="xlsx")